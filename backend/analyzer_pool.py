@@ -0,0 +1,85 @@
+"""
+Pool of pre-initialized analyzers reused across sessions.
+
+An analyzer's first camera frame builds its FaceMesh graph and TFLite
+interpreter, which takes far longer than the frames after it. The pool keeps
+up to ``size`` analyzers that have already processed a dummy frame; sessions
+check one out when they start and return it when they end, and ``reset()``
+clears its session state while keeping the graph.
+
+Pooled objects need ``process_frame(frame)``, ``reset()`` and ``release()``,
+which ``ReadingAnalyzer`` and ``EyeTrackingService`` both provide.
+"""
+
+import threading
+from typing import Callable, Tuple
+
+import numpy as np
+
+
+class AnalyzerPool:
+    """Thread-safe pool of warmed-up analyzers."""
+
+    def __init__(self, factory: Callable, size: int, warm_frame_shape: Tuple[int, int] = (480, 640)):
+        """Initialize an empty pool.
+
+        Args:
+            factory (callable): Creates a new analyzer
+            size (int): Number of idle analyzers to keep
+            warm_frame_shape (tuple): (height, width) of the dummy warm-up frame
+        """
+        self.factory = factory
+        self.size = size
+        self.warm_frame_shape = warm_frame_shape
+        self._idle = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def _create_warm(self):
+        analyzer = self.factory()
+        analyzer.process_frame(np.zeros((*self.warm_frame_shape, 3), dtype=np.uint8))
+        analyzer.reset()
+        self.created += 1
+        return analyzer
+
+    def warm(self):
+        """Fill the pool with warmed-up analyzers"""
+        while len(self) < self.size:
+            analyzer = self._create_warm()
+            with self._lock:
+                self._idle.append(analyzer)
+
+    def acquire(self):
+        """Check out an analyzer, creating a warmed-up one if none is idle"""
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+        return self._create_warm()
+
+    def release(self, analyzer):
+        """Return an analyzer; it is reset, or released if the pool is full"""
+        try:
+            analyzer.reset()
+        except Exception:
+            analyzer.release()
+            raise
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(analyzer)
+                return
+        analyzer.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for analyzer in idle:
+            analyzer.release()
+
+    def stats(self):
+        return {'idle': len(self), 'size': self.size, 'created': self.created, 'reused': self.reused}
@@ -1,20 +1,30 @@
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 import logging
 import os
 import sys
-import cv2
-import numpy as np
-import base64
 import asyncio
 import websockets
 import json
 import threading
+import itertools
+import time
 from werkzeug.serving import is_running_from_reloader
 
 # Add parent directory to path to find eye_tracking package
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eye_tracking.gaze_filters import create_gaze_filter
 from eye_tracking.reading_analyzer import ReadingAnalyzer
+from frame_executor import FrameExecutor, start_calibration as calibration_job, \
+    start_reading_test as reading_test_job, render_heatmap as heatmap_job, \
+    word_dwell_times as word_dwell_job
+from frame_mailbox import FrameMailbox
+from session_manager import SessionManager, SessionLimitError
+from session_index import SessionIndex, parse_time
+from metrics import PipelineMetrics
+import frame_protocol
+from landmark_stream import SESSION_SOURCE as LANDMARK_SOURCE, create_landmark_analyzer, \
+    landmark_indices as landmark_indices_job, process_landmark_batch
 
 app = Flask(__name__, static_url_path='/static', static_folder='static')
 CORS(app)
@@ -22,12 +32,40 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Store active sessions
-active_sessions = {}
-
 # Track WebSocket connections per session
 websocket_connections = {}
 
+# Analyzers live in the executor; frame work runs on its workers, not the event loop.
+# FRAME_PROCESS_WORKERS > 0 pins each session to one of that many worker processes.
+# FRAME_POOL_SIZE warmed-up analyzers (per worker process) are reused across sessions.
+frame_executor = FrameExecutor(
+    ReadingAnalyzer,
+    max_workers=int(os.environ.get('FRAME_THREAD_WORKERS', 0)) or None,
+    process_workers=int(os.environ.get('FRAME_PROCESS_WORKERS', 0)),
+    pool_size=int(os.environ.get('FRAME_POOL_SIZE', 2))
+)
+
+# Summary rows of finished sessions, queried by /api/session-index
+session_index = SessionIndex(os.environ.get('SESSION_INDEX_PATH', os.path.join('data', 'sessions.db')))
+
+# Sessions idle for SESSION_TTL_SECONDS are evicted and their analyzers released
+session_manager = SessionManager(
+    frame_executor,
+    ttl_seconds=float(os.environ.get('SESSION_TTL_SECONDS', 900)),
+    max_sessions=int(os.environ.get('MAX_SESSIONS', 50)),
+    analyzer_factories={LANDMARK_SOURCE: create_landmark_analyzer},
+    session_index=session_index
+)
+
+# Per-stage frame latency histograms, globally and per session
+pipeline_metrics = PipelineMetrics()
+
+# Mailboxes of connected sessions, for queue depth and dropped frame metrics
+session_mailboxes = {}
+
+# Numeric handles identifying binary-protocol connections in frame headers
+session_handles = itertools.count(1)
+
 @app.route('/')
 def index():
     return send_from_directory('static', 'test.html')
@@ -42,60 +80,138 @@ def health_check():
 
 @app.route('/api/start-session', methods=['POST'])
 def start_session():
-    session_id = str(len(active_sessions) + 1)
-    active_sessions[session_id] = {
-        "status": "active",
-        "analyzer": ReadingAnalyzer(),
-        "metrics": {
+    # "source": "landmarks" starts a session whose client tracks the face itself;
+    # "gaze_filter": {"type": "one_euro" | "kalman", ...} smooths its gaze
+    options = request.get_json(silent=True) or {}
+    source = options.get('source', 'video')
+    if source not in ('video', LANDMARK_SOURCE):
+        return jsonify({"status": "error", "message": f"Unknown session source {source}"}), 400
+    gaze_filter = options.get('gaze_filter')
+    try:
+        create_gaze_filter(gaze_filter)
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    try:
+        session_id = session_manager.create(source, metrics={
             "reading_speed": 0,
             "fixations": 0,
             "regressions": 0,
             "dyslexia_probability": 0
-        }
-    }
+        }, gaze_filter=gaze_filter)
+    except SessionLimitError as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
     return jsonify({"session_id": session_id})
 
 @app.route('/api/end-session/<session_id>', methods=['POST'])
 def end_session(session_id):
-    if session_id in active_sessions:
-        # Clean up resources
-        if 'analyzer' in active_sessions[session_id]:
-            active_sessions[session_id]['analyzer'].release()
-        active_sessions[session_id]["status"] = "completed"
+    # Releases the analyzer; the record stays queryable until it expires
+    if session_manager.end(session_id):
         return jsonify({"status": "success"})
     return jsonify({"status": "error", "message": "Session not found"}), 404
 
 @app.route('/api/sessions')
 def get_sessions():
-    # Return only the metrics, not the analyzer objects
-    session_data = {
-        sid: {k: v for k, v in data.items() if k != 'analyzer'}
-        for sid, data in active_sessions.items()
-    }
-    return jsonify(session_data)
+    return jsonify(session_manager.snapshot())
 
 @app.route('/api/sessions/<session_id>')
 def get_session(session_id):
-    if session_id in active_sessions:
-        # Return only the metrics, not the analyzer object
-        session_data = {k: v for k, v in active_sessions[session_id].items() if k != 'analyzer'}
-        return jsonify(session_data)
+    session = session_manager.get(session_id)
+    if session is not None:
+        return jsonify(session)
     return jsonify({"status": "error", "message": "Session not found"}), 404
 
+@app.route('/api/sessions/<session_id>/heatmap.png')
+def get_heatmap(session_id):
+    """Gaze heat map over the reading text, re-rendered only after new samples; ?width=480 to scale it"""
+    if not frame_executor.has_session(session_id):
+        return jsonify({"status": "error", "message": "No active analyzer for this session"}), 404
+    width = request.args.get('width', type=int)
+    if width is not None and not 16 <= width <= 4096:
+        return jsonify({"status": "error", "message": "width must be between 16 and 4096"}), 400
+    png = frame_executor.run_sync(session_id, heatmap_job, width)
+    if png is None:
+        return jsonify({"status": "error", "message": "No frames processed yet"}), 404
+    return Response(png, mimetype='image/png', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/sessions/<session_id>/word-dwell')
+def get_word_dwell(session_id):
+    """Seconds of gaze and rereads per word of the reading text"""
+    if not frame_executor.has_session(session_id):
+        return jsonify({"status": "error", "message": "No active analyzer for this session"}), 404
+    return jsonify({"words": frame_executor.run_sync(session_id, word_dwell_job)})
+
+@app.route('/api/session-index')
+def query_session_index():
+    """Finished sessions from the index, e.g. ?start_after=2024-05-01&min_probability=0.6&sort=dyslexia_probability"""
+    args = request.args
+    try:
+        result = session_index.query(
+            sort=args.get('sort', 'start_time'),
+            descending=args.get('order', 'desc').lower() != 'asc',
+            limit=args.get('limit', 50, type=int),
+            offset=args.get('offset', 0, type=int),
+            start_after=parse_time(args.get('start_after')),
+            start_before=parse_time(args.get('start_before')),
+            min_probability=args.get('min_probability', type=float),
+            max_probability=args.get('max_probability', type=float),
+            min_frames=args.get('min_frames', type=int),
+            status=args.get('status'),
+            source=args.get('source'),
+            calibration=args.get('calibration')
+        )
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify(result)
+
+@app.route('/api/admin/sessions')
+def admin_sessions():
+    """Live session count, per-session frame counts and analyzer memory"""
+    return jsonify(session_manager.admin_stats())
+
+@app.route('/api/metrics')
+def prometheus_metrics():
+    """Stage latency histograms, sessions, dropped frames and queue depths"""
+    sessions = session_manager.snapshot()
+    pipeline_metrics.retain_sessions(sessions)
+    
+    series = [
+        ('eyetrack_active_sessions', 'gauge', 'Live sessions', {}, session_manager.live_count()),
+        ('eyetrack_sessions', 'gauge', 'Sessions kept by the session manager', {}, len(sessions)),
+        ('eyetrack_executor_pending_jobs', 'gauge', 'Frame jobs queued or running in the workers', {},
+         frame_executor.pending_jobs)
+    ]
+    if frame_executor.analyzer_pool is not None:
+        series.append(('eyetrack_analyzer_pool_idle', 'gauge', 'Warmed-up analyzers waiting in the pool',
+                       {}, len(frame_executor.analyzer_pool)))
+    mailboxes = list(session_mailboxes.items())
+    for name, metric_type, help_text, value in (
+            ('eyetrack_queue_depth', 'gauge', 'Frames waiting in the session mailbox', lambda m: m.depth),
+            ('eyetrack_received_frames_total', 'counter', 'Frames received', lambda m: m.received),
+            ('eyetrack_dropped_frames_total', 'counter', 'Frames replaced before being processed',
+             lambda m: m.dropped),
+            ('eyetrack_processed_frames_total', 'counter', 'Frames processed', lambda m: m.processed)):
+        for session_id, mailbox in mailboxes:
+            series.append((name, metric_type, help_text, {'session': session_id}, value(mailbox)))
+    
+    return Response(pipeline_metrics.render(series), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/calibrate/<session_id>', methods=['POST'])
 def calibrate(session_id):
-    if session_id not in active_sessions:
+    if session_id not in session_manager:
         return jsonify({"status": "error", "message": "Session not found"}), 404
         
     try:
-        active_sessions[session_id]['analyzer'].start_calibration()
+        session_manager.open_analyzer(session_id)
+        frame_executor.run_sync(session_id, calibration_job)
+        session_manager.update(session_id, calibration="started")
         return jsonify({"status": "success", "message": "Calibration started"})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/start-reading-test/<session_id>', methods=['POST'])
 def start_reading_test(session_id):
-    if session_id not in active_sessions:
+    if session_id not in session_manager:
         return jsonify({"status": "error", "message": "Session not found"}), 404
         
     try:
@@ -103,21 +219,128 @@ def start_reading_test(session_id):
         if not text:
             return jsonify({"status": "error", "message": "No text provided"}), 400
             
-        active_sessions[session_id]['analyzer'].start_reading_test(text)
+        session_manager.open_analyzer(session_id)
+        frame_executor.run_sync(session_id, reading_test_job, text)
         return jsonify({"status": "success", "message": "Reading test started"})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+async def process_frames(websocket, session_id, mailbox, handle=None):
+    """Process the newest pending frame of a session until its mailbox closes.
+
+    JSON connections (``handle`` is None) queue base64 strings and get a JSON
+    reply; binary connections queue ``(header, jpeg)`` and get a processed
+    frame message followed by a metrics message.
+    """
+    while True:
+        item = await mailbox.get()
+        if item is None:
+            return
+        queued_at, frame = item
+        
+        started = mailbox.clock()
+        pipeline_metrics.observe('queue_wait', time.perf_counter() - queued_at, session_id)
+        try:
+            if handle is None:
+                response = await frame_executor.process_frame(session_id, frame)
+            else:
+                header, jpeg = frame
+                result = await frame_executor.process_jpeg(session_id, jpeg)
+                processed_jpeg, response = result if result else (None, None)
+        except Exception as e:
+            logger.error(f"Error processing frame: {str(e)}")
+            await websocket.send(json.dumps({
+                "type": "error",
+                "message": f"Error processing frame: {str(e)}"
+            }))
+            continue
+        mailbox.record_processing(started)
+        
+        stats = mailbox.stats()
+        session_manager.update(session_id, frame_stats=stats)
+        if response:
+            pipeline_metrics.observe_many(response.pop('timings', {}), session_id)
+            # Tell the client how fast to capture so few frames are dropped
+            response.update(stats)
+            session_manager.update(session_id, metrics=response)
+            sending = time.perf_counter()
+            if handle is None:
+                await websocket.send(json.dumps(response))
+            else:
+                await websocket.send(frame_protocol.encode_message(
+                    frame_protocol.PROCESSED_FRAME, handle, header.sequence, header.timestamp,
+                    processed_jpeg))
+                await websocket.send(frame_protocol.encode_metrics(
+                    handle, header.sequence, header.timestamp, response))
+            pipeline_metrics.observe('send', time.perf_counter() - sending, session_id)
+
 async def handle_websocket(websocket):
+    mailbox = None
+    processor = None
+    handle = None
+    landmark_session = False
     try:
         session_id = None
         async for message in websocket:
+            received = time.perf_counter()
+            if isinstance(message, bytes):
+                # Binary frame: fixed header followed by raw JPEG bytes or a landmark batch
+                try:
+                    header, payload = frame_protocol.decode_message(message)
+                except frame_protocol.ProtocolError as e:
+                    await websocket.send(json.dumps({"type": "error", "message": str(e)}))
+                    continue
+                expected_type = frame_protocol.LANDMARKS if landmark_session else frame_protocol.FRAME
+                if handle is None or header.session != handle or header.type != expected_type:
+                    await websocket.send(json.dumps({
+                        "type": "error",
+                        "message": "Invalid or expired session"
+                    }))
+                    continue
+                if not session_manager.touch(session_id):
+                    await websocket.send(json.dumps({
+                        "type": "error",
+                        "message": "Session not found"
+                    }))
+                    await websocket.close()
+                    return
+                
+                if landmark_session:
+                    # Batches are cheap to analyze and must not be dropped, so they are
+                    # processed in order; the socket is not read again until this one is done
+                    try:
+                        batch = frame_protocol.decode_landmarks(payload)
+                        pipeline_metrics.observe('receive', time.perf_counter() - received, session_id)
+                        response = await frame_executor.run(session_id, process_landmark_batch, batch)
+                    except Exception as e:
+                        logger.error(f"Error processing landmarks: {str(e)}")
+                        await websocket.send(json.dumps({
+                            "type": "error",
+                            "message": f"Error processing landmarks: {str(e)}"
+                        }))
+                        continue
+                    if response:
+                        pipeline_metrics.observe_many(response.pop('timings', {}), session_id)
+                        session_manager.update(session_id, metrics=response)
+                        sending = time.perf_counter()
+                        await websocket.send(frame_protocol.encode_metrics(
+                            handle, header.sequence, header.timestamp, response))
+                        pipeline_metrics.observe('send', time.perf_counter() - sending, session_id)
+                    continue
+                
+                # Copy out of the message so the payload can be sent to worker processes
+                payload = bytes(payload)
+                queued_at = time.perf_counter()
+                pipeline_metrics.observe('receive', queued_at - received, session_id)
+                mailbox.put((queued_at, (header, payload)))
+                continue
+            
             data = json.loads(message)
             
             if data['type'] == 'init':
                 # Handle session initialization
                 session_id = data.get('session_id')
-                if not session_id or session_id not in active_sessions:
+                if not session_id or session_id not in session_manager:
                     await websocket.send(json.dumps({
                         "type": "error",
                         "message": "Invalid or expired session"
@@ -137,10 +360,42 @@ async def handle_websocket(websocket):
                     except:
                         pass
                 websocket_connections[session_id] = websocket
+                await asyncio.to_thread(session_manager.open_analyzer, session_id)
+                session = session_manager.get(session_id)
+                landmark_session = session['source'] == LANDMARK_SOURCE
+                
+                # Latest-frame-wins mailbox drained by a per-connection processing task
+                if mailbox is not None:
+                    mailbox.close()
+                    mailbox = processor = None
+                    session_mailboxes.pop(session_id, None)
+                
+                # Frames and metrics switch to binary messages if the client asks for it;
+                # landmark batches only exist in the binary protocol
+                binary = landmark_session or data.get('protocol') == 'binary'
+                handle = next(session_handles) if binary else None
+                if not landmark_session:
+                    mailbox = FrameMailbox()
+                    session_mailboxes[session_id] = mailbox
+                    processor = asyncio.create_task(process_frames(websocket, session_id, mailbox, handle))
                 logger.info(f"Session {session_id} initialized with WebSocket connection")
                 
-                # Send initial metrics
-                await websocket.send(json.dumps(active_sessions[session_id]['metrics']))
+                if handle is None:
+                    # Send initial metrics
+                    await websocket.send(json.dumps(session['metrics']))
+                else:
+                    ack = {
+                        "type": "init_ack",
+                        "protocol": "binary",
+                        "version": frame_protocol.PROTOCOL_VERSION,
+                        "session_handle": handle,
+                        "source": session['source']
+                    }
+                    if landmark_session:
+                        ack["landmark_indices"] = await frame_executor.run(session_id, landmark_indices_job)
+                    await websocket.send(json.dumps(ack))
+                    await websocket.send(frame_protocol.encode_metrics(
+                        handle, 0, 0.0, session['metrics']))
                 
             elif data['type'] == 'frame':
                 # Validate session
@@ -152,53 +407,25 @@ async def handle_websocket(websocket):
                     }))
                     continue
                 
-                if frame_session_id not in active_sessions:
+                if not session_manager.touch(frame_session_id):
                     await websocket.send(json.dumps({
                         "type": "error",
                         "message": "Session not found"
                     }))
                     await websocket.close()
                     return
-                    
-                # Process frame
-                try:
-                    # Decode frame
-                    frame_data = base64.b64decode(data['frame'])
-                    nparr = np.frombuffer(frame_data, np.uint8)
-                    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                    
-                    # Process frame using ReadingAnalyzer
-                    analyzer = active_sessions[frame_session_id]['analyzer']
-                    processed_frame, eye_data = analyzer.analyze_frame(frame)
-                    
-                    # Encode processed frame
-                    _, buffer = cv2.imencode('.jpg', processed_frame)
-                    processed_frame_data = base64.b64encode(buffer).decode('utf-8')
-                    
-                    # Get reading metrics
-                    metrics = analyzer._analyze_reading_patterns()
-                    if metrics and 'dyslexia_indicators' in metrics:
-                        response = {
-                            'reading_speed': int(metrics.get('reading_speed', 0)),
-                            'fixations': metrics.get('fixation_count', 0),
-                            'regressions': int(metrics.get('regression_count', 0)),
-                            'dyslexia_probability': int(metrics['dyslexia_indicators']['probability'] * 100),
-                            'indicators': metrics['dyslexia_indicators']['indicators'],
-                            'severity': metrics['dyslexia_indicators']['severity'],
-                            'processed_frame': processed_frame_data
-                        }
-                        
-                        # Update session metrics
-                        active_sessions[frame_session_id]['metrics'] = response
-                        
-                        # Send metrics to client
-                        await websocket.send(json.dumps(response))
-                except Exception as e:
-                    logger.error(f"Error processing frame: {str(e)}")
+                
+                if mailbox is None:
                     await websocket.send(json.dumps({
                         "type": "error",
-                        "message": f"Error processing frame: {str(e)}"
+                        "message": "Landmark sessions do not accept video frames"
                     }))
+                    continue
+                    
+                # Replaces any frame still waiting; the processing task picks up the newest
+                queued_at = time.perf_counter()
+                pipeline_metrics.observe('receive', queued_at - received, session_id)
+                mailbox.put((queued_at, data['frame']))
             
             elif data['type'] == 'calibration_start':
                 if not session_id or session_id != data.get('session_id'):
@@ -208,13 +435,14 @@ async def handle_websocket(websocket):
                     }))
                     continue
                     
-                if session_id in active_sessions:
+                if session_id in session_manager:
                     try:
-                        active_sessions[session_id]['analyzer'].start_calibration()
+                        points = await frame_executor.run(session_id, calibration_job)
+                        session_manager.update(session_id, calibration="started")
                         await websocket.send(json.dumps({
                             "type": "calibration_status",
                             "status": "started",
-                            "points": active_sessions[session_id]['analyzer'].calibration_points
+                            "points": points
                         }))
                     except Exception as e:
                         await websocket.send(json.dumps({
@@ -230,7 +458,7 @@ async def handle_websocket(websocket):
                     }))
                     continue
                     
-                if session_id in active_sessions:
+                if session_id in session_manager:
                     try:
                         text = data.get('text', '')
                         if not text:
@@ -240,7 +468,7 @@ async def handle_websocket(websocket):
                             }))
                             continue
                             
-                        active_sessions[session_id]['analyzer'].start_reading_test(text)
+                        await frame_executor.run(session_id, reading_test_job, text)
                         await websocket.send(json.dumps({
                             "type": "reading_test_status",
                             "status": "started"
@@ -253,12 +481,11 @@ async def handle_websocket(websocket):
 
             elif data['type'] == 'end_session':
                 end_session_id = data.get('session_id')
-                if end_session_id and end_session_id == session_id and end_session_id in active_sessions:
+                if end_session_id and end_session_id == session_id and end_session_id in session_manager:
                     try:
-                        active_sessions[end_session_id]['analyzer'].release()
+                        await asyncio.to_thread(session_manager.end, end_session_id)
                     except:
                         pass
-                    active_sessions[end_session_id]["status"] = "completed"
                     if end_session_id in websocket_connections:
                         del websocket_connections[end_session_id]
                     await websocket.close()
@@ -275,10 +502,16 @@ async def handle_websocket(websocket):
             pass
     finally:
         # Clean up if needed
+        if mailbox is not None:
+            mailbox.close()
+            if session_mailboxes.get(session_id) is mailbox:
+                del session_mailboxes[session_id]
+        if processor is not None:
+            processor.cancel()
         if session_id:
-            if session_id in active_sessions:
+            if session_id in session_manager:
                 try:
-                    active_sessions[session_id]['analyzer'].release()
+                    await asyncio.to_thread(session_manager.release_analyzer, session_id)
                 except:
                     pass
             if session_id in websocket_connections and websocket_connections[session_id] == websocket:
@@ -297,6 +530,12 @@ def run_websocket_server():
     asyncio.run(start_websocket_server())
 
 if __name__ == '__main__':
+    # Start worker processes and build FaceMesh graphs before the first session
+    # instead of during it, from a request thread
+    frame_executor.start()
+    frame_executor.warm()
+    session_manager.start_eviction()
+    
     # Start WebSocket server in a separate thread
     websocket_thread = threading.Thread(target=run_websocket_server, daemon=True)
     websocket_thread.start()
@@ -1,4 +1,4 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 import json
 import os
 from datetime import datetime
@@ -8,17 +8,21 @@ import cv2
 import mediapipe as mp
 import time
 
+from eye_tracking.calibration import fit_calibration
+from session_analysis import analyze_columns, load_session_columns, time_slice
+from session_log import SessionLogWriter, read_session_log
+
 logger = logging.getLogger(__name__)
 
 class EyeTrackingService:
-    def __init__(self):
+    def __init__(self, face_mesh=None):
         self.data_dir = 'data'
         os.makedirs(self.data_dir, exist_ok=True)
         
         # Calibration settings
         self.calibration_points = []
         self.is_calibrated = False
-        self.calibration_matrix = None
+        self.calibration = None  # GazeCalibration fitted for this session
         
         # Thresholds for detection
         self.thresholds = {
@@ -27,7 +31,9 @@ class EyeTrackingService:
             'blink_duration_max': 0.4,     # seconds
             'gaze_deviation_max': 0.2,     # normalized
             'backward_saccade_threshold': 0.3,  # proportion
-            'reading_line_deviation': 0.15  # normalized
+            'reading_line_deviation': 0.15,  # normalized
+            'fixation_dispersion_max': 25,  # pixels, for offline I-DT
+            'line_change_min': 20  # pixels of downward movement in a return sweep
         }
         
         # Reading metrics
@@ -39,7 +45,7 @@ class EyeTrackingService:
         }
 
         self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
+        self.face_mesh = face_mesh or self.mp_face_mesh.FaceMesh(
             max_num_faces=1,
             refine_landmarks=True,
             min_detection_confidence=0.5,
@@ -62,22 +68,32 @@ class EyeTrackingService:
         self.regression_count = 0
         self.words_read = 0
         self.reading_start_time = None
+        
+        # State carried between gaze samples of process_frame_data/process_batch
+        self._last_point = None
+        self._last_timestamp = None
+        self._last_velocity = None
+        self._last_acc_timestamp = None
+        self._fixation_start = None
+        self._last_gaze_x = None
+        self._last_line_position = None
+
+        # Append-only log the processed samples of the live session stream to
+        self.session_log = None
+        self.session_log_id = None
 
     def calibrate(self, points: List[Tuple[float, float]], gaze_data: List[Tuple[float, float]]) -> bool:
-        """Calibrate eye tracking using reference points"""
+        """Calibrate eye tracking using reference points, e.g. CALIBRATION_GRID"""
         try:
             if len(points) != len(gaze_data) or len(points) < 5:
                 return False
                 
-            # Convert to numpy arrays
-            points = np.array(points)
-            gaze_data = np.array(gaze_data)
-            
-            # Calculate transformation matrix
-            self.calibration_matrix = np.linalg.lstsq(gaze_data, points, rcond=None)[0]
+            # Polynomial order and ridge penalty are picked by leave-one-out error
+            self.calibration = fit_calibration(gaze_data, points)
             self.is_calibrated = True
             
-            logger.info("Calibration completed successfully")
+            logger.info("Calibration completed successfully (order %d, ridge %g)",
+                        self.calibration.degree, self.calibration.ridge)
             return True
         except Exception as e:
             logger.error(f"Calibration failed: {str(e)}")
@@ -102,14 +118,14 @@ class EyeTrackingService:
             acceleration = self._calculate_acceleration(velocity, timestamp)
             
             # Detect eye movements
-            fixation = self._detect_fixation(velocity)
+            fixation = self._detect_fixation(velocity, timestamp)
             saccade = self._detect_saccade(velocity, acceleration)
             blink = self._detect_blink(frame_data.get('blink_data', {}))
             
             # Update reading metrics
             self._update_reading_metrics(gaze_point, fixation, saccade)
             
-            return {
+            result = {
                 'timestamp': timestamp,
                 'gaze_point': gaze_point.tolist(),
                 'metrics': {
@@ -122,14 +138,172 @@ class EyeTrackingService:
                 },
                 'analysis': self._analyze_reading_pattern()
             }
+            if self.session_log is not None:
+                self.session_log.append(result)
+            return result
         except Exception as e:
             logger.error(f"Error processing frame: {str(e)}")
             return {}
 
+    def process_samples(self, frames: List[Dict]) -> List[Dict]:
+        """Process a buffer of frame_data dicts from a client with process_batch"""
+        try:
+            now = datetime.now().timestamp()
+            return self.process_batch(
+                [frame.get('timestamp', now) for frame in frames],
+                [frame.get('left_eye', [0, 0]) for frame in frames],
+                [frame.get('right_eye', [0, 0]) for frame in frames],
+                [frame.get('blink_data', {}) for frame in frames]
+            )
+        except Exception as e:
+            logger.error(f"Error processing frames: {str(e)}")
+            return []
+
+    def process_batch(self, timestamps: Sequence[float], left_eye: Sequence, right_eye: Sequence,
+                      blink_data: Optional[Sequence[Dict]] = None) -> List[Dict]:
+        """Process a batch of gaze samples at once.
+
+        Calibration, velocity, acceleration, fixation/saccade labels (I-VT on
+        the velocity threshold) and regression counts are computed with numpy
+        over the whole batch, continuing from the state left by earlier
+        samples. The results are those of calling process_frame_data on each
+        sample in turn.
+
+        Args:
+            timestamps: (N,) sample times in seconds
+            left_eye: (N, 2) left eye gaze coordinates
+            right_eye: (N, 2) right eye gaze coordinates
+            blink_data: Optional per-sample blink dicts
+
+        Returns:
+            list: One result dict per sample, as process_frame_data returns
+
+        Raises:
+            ValueError: If the arrays do not hold N samples of 2 coordinates
+        """
+        t = np.asarray(timestamps, dtype=float)
+        left = np.asarray(left_eye, dtype=float)
+        right = np.asarray(right_eye, dtype=float)
+        n = len(t)
+        if t.ndim != 1 or left.shape != (n, 2) or right.shape != (n, 2):
+            raise ValueError(f"Expected {n} timestamps and ({n}, 2) eye coordinates, "
+                             f"got {left.shape} and {right.shape}")
+        if blink_data is not None and len(blink_data) != n:
+            raise ValueError(f"Expected {n} blink entries, got {len(blink_data)}")
+        if n == 0:
+            return []
+
+        if self.is_calibrated and self.calibration is not None:
+            # Both eyes in one expansion and matrix multiply
+            left, right = np.split(self.calibration.transform(np.concatenate((left, right))), 2)
+        gaze = (left + right) / 2
+
+        # Velocity and acceleration against the last sample whose timestamp
+        # differed from its predecessor's; the first sample ever seeds the state.
+        # Arrays prefixed with the carried state are indexed by position - 1
+        if self._last_timestamp is None:
+            self._last_point, self._last_timestamp = gaze[0], t[0]
+            self._last_velocity, self._last_acc_timestamp = 0.0, t[0]
+        positions = np.arange(n + 1)
+        times = np.concatenate(([self._last_timestamp], t))
+        dt = t - times[:-1]
+        moved = dt != 0
+        source = _last_index(positions, np.concatenate(([True], moved)))
+        points = np.concatenate((np.asarray(self._last_point, dtype=float)[None], gaze))
+        step = gaze - points[source[:-1]]
+        safe_dt = dt + ~moved  # 1 where the sample is skipped
+        velocity = np.sqrt((step * step).sum(axis=1)) * moved / safe_dt
+        velocities = np.concatenate(([self._last_velocity], velocity))
+        acceleration = np.where(moved, (velocity - velocities[source[:-1]]) / safe_dt, 0.0)
+
+        # I-VT: slow samples are fixations, timed from the start of their run
+        saccade_min = self.thresholds['saccade_velocity_min']
+        is_fixation = velocity < saccade_min
+        is_saccade = velocity >= saccade_min
+        fixating = np.concatenate(([self._fixation_start is not None], is_fixation))
+        run_start = fixating[1:] & ~fixating[:-1]
+        times[0] = self._fixation_start or 0.0
+        fixation_start = times[_last_index(positions, np.concatenate(([True], run_start)))[1:]]
+        duration = (t - fixation_start) * is_fixation
+
+        # Reading metrics keep their last value between the samples that update them
+        metrics = self.reading_metrics
+        fixating[0] = True
+        fixation_source = _last_index(positions, fixating)[1:]
+        line_position = np.concatenate(([metrics['line_position']], gaze[:, 1]))[fixation_source]
+        current_word = np.concatenate(([metrics['current_word']],
+                                       np.trunc(gaze[:, 0] / 50)))[fixation_source].astype(np.int64)
+        timed = is_fixation & (duration > 0)
+        speeds = np.concatenate(([metrics['reading_speed']], 60 / (duration + ~timed)))
+        reading_speed = speeds[_last_index(positions, np.concatenate(([True], timed)))[1:]]
+        previous_x = np.concatenate(([np.nan if self._last_gaze_x is None else self._last_gaze_x],
+                                     gaze[:-1, 0]))
+        regression_count = metrics['regression_count'] + np.cumsum(is_saccade & (gaze[:, 0] < previous_x))
+
+        # Reading pattern analysis, per sample
+        high_regression_rate = regression_count / np.maximum(current_word, 1) \
+            > self.thresholds['backward_saccade_threshold']
+        previous_line = np.concatenate((
+            [np.nan if self._last_line_position is None else self._last_line_position], line_position[:-1]))
+        irregular_line_tracking = np.abs(line_position - previous_line) > self.thresholds['reading_line_deviation']
+        slow_reading_speed = reading_speed < 150
+        # Summed in the same order as _analyze_reading_pattern, for identical rounding
+        probability = 0.4 * high_regression_rate + 0.3 * irregular_line_tracking + 0.3 * slow_reading_speed
+        confidence = np.minimum(1.0, current_word / 100) * (1.0 if self.is_calibrated else 0.5)
+
+        # Carry the state over to the next sample or batch
+        self._last_point = points[source[-1]]
+        self._last_velocity = float(velocities[source[-1]])
+        self._last_timestamp = self._last_acc_timestamp = float(t[-1])
+        self._fixation_start = float(fixation_start[-1]) if is_fixation[-1] else None
+        self._last_gaze_x = float(gaze[-1, 0])
+        self._last_line_position = float(line_position[-1])
+        metrics.update(line_position=float(line_position[-1]), current_word=int(current_word[-1]),
+                       reading_speed=float(reading_speed[-1]), regression_count=int(regression_count[-1]))
+
+        if blink_data is None:
+            blink_data = [{}] * n
+        blinks = [self._detect_blink(blink) for blink in blink_data]
+        if self.session_log is not None:
+            self.session_log.append_columns(
+                timestamp=t, gaze_x=gaze[:, 0], gaze_y=gaze[:, 1], probability=probability,
+                is_blinking=np.array([bool(blink['is_blinking']) for blink in blinks]))
+
+        results = []
+        for row in zip(t.tolist(), gaze.tolist(), velocity.tolist(), acceleration.tolist(),
+                       is_fixation.tolist(), duration.tolist(), is_saccade.tolist(), blinks,
+                       line_position.tolist(), current_word.tolist(), reading_speed.tolist(),
+                       regression_count.tolist(), high_regression_rate.tolist(),
+                       irregular_line_tracking.tolist(), slow_reading_speed.tolist(),
+                       probability.tolist(), confidence.tolist()):
+            (timestamp, point, v, a, fixation, fixation_duration, saccade, blink, line, word, speed,
+             regressions, high_regression, irregular, slow, p, c) = row
+            results.append({
+                'timestamp': timestamp,
+                'gaze_point': point,
+                'metrics': {
+                    'velocity': v,
+                    'acceleration': a,
+                    'fixation': {'is_fixation': fixation, 'duration': fixation_duration},
+                    'saccade': {'is_saccade': saccade, 'velocity': v, 'acceleration': a},
+                    'blink': blink,
+                    'reading_metrics': {'line_position': line, 'current_word': word,
+                                        'reading_speed': speed, 'regression_count': regressions}
+                },
+                'analysis': {
+                    'indicators': {'high_regression_rate': high_regression,
+                                   'irregular_line_tracking': irregular,
+                                   'slow_reading_speed': slow},
+                    'probability': p,
+                    'confidence': c
+                }
+            })
+        return results
+
     def _apply_calibration(self, point: np.ndarray) -> np.ndarray:
         """Apply calibration transformation to gaze point"""
-        if self.calibration_matrix is not None:
-            return np.dot(point, self.calibration_matrix)
+        if self.calibration is not None:
+            return self.calibration.transform_point(point)
         return point
 
     def _calculate_gaze_point(self, left_eye: np.ndarray, right_eye: np.ndarray) -> np.ndarray:
@@ -138,7 +312,7 @@ class EyeTrackingService:
 
     def _calculate_velocity(self, current_point: np.ndarray, timestamp: float) -> float:
         """Calculate gaze velocity"""
-        if not hasattr(self, '_last_point'):
+        if self._last_timestamp is None:
             self._last_point = current_point
             self._last_timestamp = timestamp
             return 0.0
@@ -156,7 +330,7 @@ class EyeTrackingService:
 
     def _calculate_acceleration(self, current_velocity: float, timestamp: float) -> float:
         """Calculate gaze acceleration"""
-        if not hasattr(self, '_last_velocity'):
+        if self._last_acc_timestamp is None:
             self._last_velocity = current_velocity
             self._last_acc_timestamp = timestamp
             return 0.0
@@ -172,14 +346,14 @@ class EyeTrackingService:
         
         return acceleration
 
-    def _detect_fixation(self, velocity: float) -> Dict:
-        """Detect and analyze fixation"""
-        is_fixation = velocity < self.thresholds['saccade_velocity_min']
+    def _detect_fixation(self, velocity: float, timestamp: float) -> Dict:
+        """Detect and analyze fixation, timed by the sample timestamps"""
+        is_fixation = bool(velocity < self.thresholds['saccade_velocity_min'])
         
         if is_fixation:
-            if not hasattr(self, '_fixation_start'):
-                self._fixation_start = datetime.now().timestamp()
-            duration = datetime.now().timestamp() - self._fixation_start
+            if self._fixation_start is None:
+                self._fixation_start = timestamp
+            duration = timestamp - self._fixation_start
         else:
             duration = 0
             self._fixation_start = None
@@ -191,7 +365,7 @@ class EyeTrackingService:
 
     def _detect_saccade(self, velocity: float, acceleration: float) -> Dict:
         """Detect and analyze saccade"""
-        is_saccade = velocity >= self.thresholds['saccade_velocity_min']
+        is_saccade = bool(velocity >= self.thresholds['saccade_velocity_min'])
         
         return {
             'is_saccade': is_saccade,
@@ -222,7 +396,7 @@ class EyeTrackingService:
         
         if saccade['is_saccade']:
             # Detect backward saccades (regressions)
-            if hasattr(self, '_last_gaze_x') and gaze_point[0] < self._last_gaze_x:
+            if self._last_gaze_x is not None and gaze_point[0] < self._last_gaze_x:
                 self.reading_metrics['regression_count'] += 1
                 
         self._last_gaze_x = gaze_point[0]
@@ -235,9 +409,9 @@ class EyeTrackingService:
         indicators = {
             'high_regression_rate': (metrics['regression_count'] / max(metrics['current_word'], 1)
                                    > self.thresholds['backward_saccade_threshold']),
-            'irregular_line_tracking': abs(metrics['line_position'] - getattr(self, '_last_line_position', 0))
+            'irregular_line_tracking': abs(metrics['line_position'] - self._last_line_position)
                                      > self.thresholds['reading_line_deviation']
-                                     if hasattr(self, '_last_line_position') else False,
+                                     if self._last_line_position is not None else False,
             'slow_reading_speed': metrics['reading_speed'] < 150  # typical reading speed threshold
         }
         
@@ -270,53 +444,91 @@ class EyeTrackingService:
         
         return data_points_weight * calibration_weight
 
+    def _session_file(self, session_id: str, extension: str) -> str:
+        return os.path.join(self.data_dir, f"session_{session_id}.{extension}")
+
+    def start_session_log(self, session_id: str):
+        """Stream the samples processed from now on to the session's log file"""
+        self.close_session_log()
+        self.session_log = SessionLogWriter(self._session_file(session_id, 'eylog'))
+        self.session_log_id = session_id
+
+    def close_session_log(self):
+        """Write out the live session log and its index"""
+        if self.session_log is not None:
+            self.session_log.close()
+            self.session_log = None
+            self.session_log_id = None
+
     def save_session_data(self, session_id: str, data: Dict):
-        """Save session data to file"""
-        filename = os.path.join(self.data_dir, f"session_{session_id}.json")
+        """Save the session summary; its samples are in the session log, closed here"""
+        if self.session_log_id == session_id:
+            self.close_session_log()
+        filename = self._session_file(session_id, 'json')
         with open(filename, 'w') as f:
             json.dump(data, f, indent=2, default=str)
 
-    def get_session_data(self, session_id: str) -> Dict:
-        """Retrieve session data"""
-        filename = os.path.join(self.data_dir, f"session_{session_id}.json")
-        try:
-            with open(filename, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
+    def get_session_columns(self, session_id: str, start_time: Optional[float] = None,
+                            end_time: Optional[float] = None) -> Optional[Dict[str, np.ndarray]]:
+        """A session's samples in a time range as numpy columns (see session_analysis.COLUMNS).
+
+        Read from the session log when there is one, which only touches the
+        chunks in the range; sessions saved before the log existed are
+        loaded from their JSON file. None if the session has neither.
+        """
+        log = self._session_file(session_id, 'eylog')
+        if os.path.exists(log):
+            if self.session_log_id == session_id:
+                self.session_log.flush()
+            return read_session_log(log, start_time, end_time)
+
+        filename = self._session_file(session_id, 'json')
+        if not os.path.exists(filename):
             return None
 
-    def analyze_session(self, session_id: str) -> Dict:
-        """Analyze a complete session and generate report"""
-        data = self.get_session_data(session_id)
-        if not data:
-            return None
+        def load(path):
+            with open(path, 'r') as f:
+                return json.load(f)
+
+        return time_slice(load_session_columns(filename, load), start_time, end_time)
 
-        metrics_list = [entry.get('metrics', {}) for entry in data.get('data', [])]
-        if not metrics_list:
+    def get_session_data(self, session_id: str, start_time: Optional[float] = None,
+                         end_time: Optional[float] = None) -> Dict:
+        """Retrieve session data: the saved summary, plus the logged samples in
+        the time range as numpy columns under 'samples'"""
+        data = None
+        try:
+            with open(self._session_file(session_id, 'json'), 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            pass
+        log = self._session_file(session_id, 'eylog')
+        if os.path.exists(log):
+            data = dict(data or {}, samples=self.get_session_columns(session_id, start_time, end_time))
+        return data
+
+    def analyze_session(self, session_id: str, start_time: Optional[float] = None,
+                        end_time: Optional[float] = None) -> Dict:
+        """Analyze a complete session, or the part of it in a time range, and generate report.
+
+        The samples are loaded as numpy columns (see get_session_columns) and
+        analyzed in vectorized form; see session_analysis.
+        """
+        columns = self.get_session_columns(session_id, start_time, end_time)
+        if columns is None:
+            return None
+        if not len(columns['timestamp']):
             return {'error': 'No metrics data found'}
 
-        # Calculate aggregate metrics
-        avg_gaze_stability = np.mean([m.get('gaze_stability', 0) for m in metrics_list])
-        avg_blink_rate = np.mean([m.get('blink_rate', 0) for m in metrics_list])
-        
-        # Get dyslexia probabilities over time
-        probabilities = [m.get('dyslexia_indicators', {}).get('probability', 0) 
-                        for m in metrics_list]
-        
-        return {
-            'session_id': session_id,
-            'duration': len(metrics_list),  # number of data points
-            'average_metrics': {
-                'gaze_stability': float(avg_gaze_stability),
-                'blink_rate': float(avg_blink_rate),
-                'dyslexia_probability': float(np.mean(probabilities))
-            },
-            'trend': {
-                'improving': bool(len(probabilities) > 1 and 
-                                probabilities[-1] < np.mean(probabilities)),
-                'confidence': self._calculate_confidence({'data': metrics_list})
-            }
-        }
+        report = analyze_columns(
+            columns,
+            velocity_threshold=self.thresholds['saccade_velocity_min'],
+            dispersion_threshold=self.thresholds['fixation_dispersion_max'],
+            min_fixation_duration=self.thresholds['fixation_duration_min'],
+            line_change_min=self.thresholds['line_change_min']
+        )
+        report['trend']['confidence'] = self._calculate_confidence({'current_word': report['trend']['samples']})
+        return dict(report, session_id=session_id, duration=report['samples'])  # duration: data points
 
     def process_frame(self, frame):
         if frame is None:
@@ -402,10 +614,25 @@ class EyeTrackingService:
             "dyslexia_probability": dyslexia_probability
         }
 
+    def reset(self):
+        """Clear calibration and all tracking state, keeping the FaceMesh graph"""
+        self.close_session_log()
+        face_mesh = self.face_mesh
+        self.__init__(face_mesh=face_mesh)
+        face_mesh.reset()
+
+    def release(self):
+        self.close_session_log()
+        self.face_mesh.close()
+
     def reset_metrics(self):
         self.fixation_count = 0
         self.regression_count = 0
         self.words_read = 0
         self.reading_start_time = None
         self.last_gaze_point = None
-        self.fixation_start_time = None 
\ No newline at end of file
+        self.fixation_start_time = None 
+
+def _last_index(positions: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """For each position, the last position at or before it where mask is set (0 if none)"""
+    return np.maximum.accumulate(positions * mask)
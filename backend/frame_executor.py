@@ -0,0 +1,351 @@
+"""
+Per-session frame processing off the asyncio event loop.
+
+``FrameExecutor`` owns one analyzer per session and runs all work on it in a
+worker, so the WebSocket coroutines only parse messages and send replies.
+
+- Thread mode (default): analyzers live in this process and jobs run on a
+  thread pool. JPEG decoding/encoding and FaceMesh release the GIL, so
+  sessions overlap on several cores. Jobs of one session are serialized by a
+  per-session lock because analyzers are not thread-safe.
+- Process mode (``process_workers > 0``): each session is pinned to one of
+  ``process_workers`` single-process pools and its analyzer lives in that
+  process, so its state never moves and the pure-Python analysis of
+  different sessions runs in parallel.
+
+With ``pool_size``, sessions using the default analyzer factory check a
+warmed-up analyzer out of an ``AnalyzerPool`` (one per worker process in
+process mode) and return it, reset, when they close.
+
+Jobs are top-level functions ``fn(analyzer, *args)`` so they can be sent to
+worker processes. Worker processes are spawned, not forked: a forked copy of
+a multi-threaded parent holding a MediaPipe graph crashes. Call ``start()``
+at boot so they are not started from a request thread.
+"""
+
+import asyncio
+import base64
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from analyzer_pool import AnalyzerPool
+
+
+def process_frame_jpeg(analyzer, jpeg: bytes) -> Optional[Tuple[bytes, Dict]]:
+    """Decode a JPEG frame, analyze it and encode the processed frame.
+
+    Returns:
+        tuple: (processed frame as JPEG bytes, client metrics), or None if the
+            analyzer produced no reading metrics. The metrics carry the stage
+            timings of the frame under 'timings', to be removed before sending.
+    """
+    start = time.perf_counter()
+    frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Could not decode frame")
+    decoded = time.perf_counter()
+
+    processed_frame, metrics = analyzer.process_frame(frame)
+    response = client_metrics(metrics)
+    if response is None:
+        return None
+
+    analyzed = time.perf_counter()
+    _, buffer = cv2.imencode('.jpg', processed_frame)
+    done = time.perf_counter()
+
+    timings = {'imdecode': decoded - start}
+    timings.update(getattr(analyzer, 'stage_times', {}))
+    timings['imencode'] = done - analyzed
+    timings['worker_total'] = done - start
+    response['timings'] = timings
+    return buffer.tobytes(), response
+
+
+def client_metrics(metrics: Dict) -> Optional[Dict]:
+    """Pick the metrics sent to clients out of the analyzer's reading metrics"""
+    if not metrics or 'dyslexia_indicators' not in metrics:
+        return None
+    return {
+        'reading_speed': int(metrics.get('reading_speed', 0)),
+        'fixations': metrics.get('fixation_count', 0),
+        'regressions': int(metrics.get('regression_count', 0)),
+        'dyslexia_probability': int(metrics['dyslexia_indicators']['probability'] * 100),
+        'indicators': metrics['dyslexia_indicators']['indicators'],
+        'severity': metrics['dyslexia_indicators']['severity']
+    }
+
+
+def process_frame_data(analyzer, frame_b64: str) -> Optional[Dict]:
+    """Decode a base64 JPEG frame, analyze it and build the JSON client response.
+
+    Returns:
+        dict: Metrics and the processed frame as base64 JPEG, or None if the
+            analyzer produced no reading metrics
+    """
+    start = time.perf_counter()
+    jpeg = base64.b64decode(frame_b64)
+    decoded = time.perf_counter()
+    result = process_frame_jpeg(analyzer, jpeg)
+    if result is None:
+        return None
+    processed_jpeg, response = result
+    response['processed_frame'] = base64.b64encode(processed_jpeg).decode('utf-8')
+    response['timings']['base64_decode'] = decoded - start
+    response['timings']['worker_total'] = time.perf_counter() - start
+    return response
+
+
+def start_calibration(analyzer):
+    analyzer.start_calibration()
+    return analyzer.calibration_points
+
+
+def start_reading_test(analyzer, text: str):
+    analyzer.start_reading_test(text)
+
+
+def configure_gaze_filter(analyzer, config):
+    analyzer.eye_tracker.set_gaze_filter(config)
+
+
+def render_heatmap(analyzer, width=None):
+    return analyzer.render_heatmap_png(width)
+
+
+def word_dwell_times(analyzer):
+    return analyzer.get_word_dwell_times()
+
+
+# Analyzers owned by a worker process, keyed by session id
+_process_analyzers = {}
+# Warmed-up default analyzers of a worker process and the sessions using one
+_process_pool = None
+_process_pooled = set()
+
+
+def _worker_pool(factory: Callable, size: int) -> AnalyzerPool:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = AnalyzerPool(factory, size)
+    return _process_pool
+
+
+def _remote_warm(factory: Callable, pool_size: int):
+    _worker_pool(factory, pool_size).warm()
+
+
+def _remote_open(session_id: str, factory: Callable, pool_size: int = 0):
+    if session_id not in _process_analyzers:
+        if pool_size:
+            _process_analyzers[session_id] = _worker_pool(factory, pool_size).acquire()
+            _process_pooled.add(session_id)
+        else:
+            _process_analyzers[session_id] = factory()
+
+
+def _remote_run(session_id: str, fn: Callable, args: tuple):
+    return fn(_process_analyzers[session_id], *args)
+
+
+def _remote_close(session_id: str):
+    analyzer = _process_analyzers.pop(session_id, None)
+    if analyzer is None:
+        return
+    if session_id in _process_pooled:
+        _process_pooled.discard(session_id)
+        _process_pool.release(analyzer)
+    else:
+        analyzer.release()
+
+
+class FrameExecutor:
+    """Runs per-session analyzer work on a thread pool or session-pinned processes."""
+
+    def __init__(self, analyzer_factory: Callable, max_workers: Optional[int] = None,
+                 process_workers: int = 0, pool_size: int = 0):
+        """Initialize the executor.
+
+        Args:
+            analyzer_factory (callable): Creates the analyzer of a new session;
+                must be picklable (a top-level class or function) in process mode
+            max_workers (int): Thread pool size; defaults to the CPU count
+            process_workers (int): Number of worker processes, 0 for thread mode
+            pool_size (int): Warmed-up analyzers of the default factory kept for
+                reuse (per worker process in process mode); 0 disables pooling
+        """
+        self.analyzer_factory = analyzer_factory
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.process_workers = process_workers
+        self.pool_size = pool_size
+        self.analyzer_pool = AnalyzerPool(analyzer_factory, pool_size) \
+            if pool_size and not process_workers else None
+
+        self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                               thread_name_prefix='frame-worker')
+        self._process_pools = [ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+                               for _ in range(process_workers)]
+        self._process_load = [0] * process_workers
+
+        self._lock = threading.Lock()
+        self._analyzers = {}      # Thread mode: session id -> analyzer
+        self._session_locks = {}  # Thread mode: session id -> lock serializing its jobs
+        self._assignments = {}    # Process mode: session id -> pool index
+        self._pooled = set()      # Thread mode: sessions whose analyzer came from the pool
+        self._pending = 0         # Jobs submitted and not finished yet
+
+    def start(self):
+        """Start the worker processes now rather than on the first session, e.g. at boot"""
+        for future in [pool.submit(os.getpid) for pool in self._process_pools]:
+            future.result()
+
+    def warm(self):
+        """Fill the analyzer pools with warmed-up analyzers, e.g. at boot"""
+        if not self.pool_size:
+            return
+        if self.process_workers:
+            futures = [pool.submit(_remote_warm, self.analyzer_factory, self.pool_size)
+                       for pool in self._process_pools]
+            for future in futures:
+                future.result()
+        else:
+            self.analyzer_pool.warm()
+
+    def open_session(self, session_id: str, analyzer_factory: Optional[Callable] = None):
+        """Create the analyzer of a session if it does not exist yet.
+
+        Args:
+            session_id (str): Session to open
+            analyzer_factory (callable): Overrides the executor's factory for
+                this session, e.g. for a different session type
+        """
+        # Only analyzers of the default factory are pooled
+        pooled = analyzer_factory is None and self.pool_size > 0
+        factory = analyzer_factory or self.analyzer_factory
+        if self.process_workers:
+            with self._lock:
+                if session_id in self._assignments:
+                    return
+                index = min(range(self.process_workers), key=self._process_load.__getitem__)
+                self._assignments[session_id] = index
+                self._process_load[index] += 1
+            self._process_pools[index].submit(_remote_open, session_id, factory,
+                                              self.pool_size if pooled else 0).result()
+        else:
+            with self._lock:
+                if session_id in self._analyzers:
+                    return
+            # Creating an analyzer can be slow, so other sessions are not blocked meanwhile
+            analyzer = self.analyzer_pool.acquire() if pooled else factory()
+            with self._lock:
+                if session_id not in self._analyzers:
+                    self._session_locks[session_id] = threading.Lock()
+                    self._analyzers[session_id] = analyzer
+                    if pooled:
+                        self._pooled.add(session_id)
+                    return
+            # Opened concurrently by another caller
+            self._dispose(analyzer, pooled)
+
+    def _dispose(self, analyzer, pooled: bool):
+        if pooled:
+            self.analyzer_pool.release(analyzer)
+        else:
+            analyzer.release()
+
+    def close_session(self, session_id: str):
+        """Release the analyzer of a session"""
+        if self.process_workers:
+            with self._lock:
+                index = self._assignments.pop(session_id, None)
+                if index is None:
+                    return
+                self._process_load[index] -= 1
+            self._process_pools[index].submit(_remote_close, session_id).result()
+        else:
+            with self._lock:
+                analyzer = self._analyzers.pop(session_id, None)
+                session_lock = self._session_locks.pop(session_id, None)
+                pooled = session_id in self._pooled
+                self._pooled.discard(session_id)
+            if analyzer is not None:
+                with session_lock:
+                    self._dispose(analyzer, pooled)
+
+    def has_session(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in (self._assignments if self.process_workers else self._analyzers)
+
+    def _run_local(self, session_id: str, fn: Callable, args: tuple):
+        with self._lock:
+            analyzer = self._analyzers.get(session_id)
+            session_lock = self._session_locks.get(session_id)
+        if analyzer is None:
+            raise KeyError(f"Session {session_id} not found")
+        with session_lock:
+            return fn(analyzer, *args)
+
+    def submit(self, session_id: str, fn: Callable, *args):
+        """Schedule ``fn(analyzer, *args)`` for a session and return a concurrent future"""
+        if self.process_workers:
+            with self._lock:
+                index = self._assignments.get(session_id)
+            if index is None:
+                raise KeyError(f"Session {session_id} not found")
+            pool, job = self._process_pools[index], (_remote_run, session_id, fn, args)
+        else:
+            pool, job = self._thread_pool, (self._run_local, session_id, fn, args)
+        with self._lock:
+            self._pending += 1
+        try:
+            future = pool.submit(*job)
+        except Exception:
+            self._job_done(None)
+            raise
+        future.add_done_callback(self._job_done)
+        return future
+
+    def _job_done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    @property
+    def pending_jobs(self) -> int:
+        """Jobs queued or running in the workers"""
+        with self._lock:
+            return self._pending
+
+    def run_sync(self, session_id: str, fn: Callable, *args):
+        """Run a job for a session from synchronous code and wait for its result"""
+        return self.submit(session_id, fn, *args).result()
+
+    async def run(self, session_id: str, fn: Callable, *args):
+        """Run a job for a session without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(session_id, fn, *args))
+
+    async def process_frame(self, session_id: str, frame_b64: str) -> Optional[Dict]:
+        """Decode, analyze and encode one frame of a session in a worker"""
+        return await self.run(session_id, process_frame_data, frame_b64)
+
+    async def process_jpeg(self, session_id: str, jpeg: bytes) -> Optional[Tuple[bytes, Dict]]:
+        """Analyze one raw JPEG frame of a session in a worker"""
+        return await self.run(session_id, process_frame_jpeg, jpeg)
+
+    def shutdown(self):
+        for session_id in list(self._analyzers) + list(self._assignments):
+            try:
+                self.close_session(session_id)
+            except Exception:
+                pass
+        if self.analyzer_pool is not None:
+            self.analyzer_pool.close()
+        self._thread_pool.shutdown(wait=True)
+        for pool in self._process_pools:
+            pool.shutdown(wait=True)
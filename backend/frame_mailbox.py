@@ -0,0 +1,120 @@
+"""
+Latest-frame-wins mailbox with processing rate feedback.
+
+Clients capture frames at their own pace. Each session's WebSocket reader
+puts incoming frames into a ``FrameMailbox`` of size one, and a separate task
+takes them out for processing. A frame that arrives while another is still
+pending replaces it, so the backlog (and the latency) never grows beyond one
+frame. The mailbox also measures how long frames take to process and derives
+the capture rate the client should use so that few frames get dropped.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from eye_tracking.rolling_stats import ExponentialMovingAverage
+
+
+class FrameMailbox:
+    """Single-slot mailbox for one session's frames."""
+
+    def __init__(self, max_capture_fps: float = 30.0, min_capture_fps: float = 1.0,
+                 headroom: float = 0.9, alpha: float = 0.2, clock=time.monotonic):
+        """Initialize the mailbox.
+
+        Args:
+            max_capture_fps (float): Upper bound of the suggested capture rate
+            min_capture_fps (float): Lower bound of the suggested capture rate
+            headroom (float): Fraction of the measured processing rate to suggest
+            alpha (float): Smoothing factor of the rate estimates
+            clock (callable): Monotonic time source in seconds
+        """
+        self.max_capture_fps = max_capture_fps
+        self.min_capture_fps = min_capture_fps
+        self.headroom = headroom
+        self.clock = clock
+
+        self._pending = None
+        self._event = asyncio.Event()
+        self._closed = False
+
+        self.received = 0
+        self.dropped = 0
+        self.processed = 0
+        self.processing_time = ExponentialMovingAverage(alpha)  # Seconds per frame
+        self.frame_interval = ExponentialMovingAverage(alpha)   # Seconds between completed frames
+        self._last_completed = None
+
+    def put(self, frame: Any):
+        """Offer a frame, replacing the pending one if it was not taken yet"""
+        if self._closed:
+            return
+        self.received += 1
+        if self._pending is not None:
+            self.dropped += 1
+        self._pending = frame
+        self._event.set()
+
+    async def get(self) -> Optional[Any]:
+        """Wait for the newest frame; returns None once the mailbox is closed"""
+        while self._pending is None:
+            if self._closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        frame = self._pending
+        self._pending = None
+        return frame
+
+    @property
+    def depth(self) -> int:
+        """Frames waiting to be processed (0 or 1)"""
+        return 0 if self._pending is None else 1
+
+    def close(self):
+        self._closed = True
+        self._pending = None
+        self._event.set()
+
+    def record_processing(self, started: float, finished: Optional[float] = None):
+        """Record a processed frame given when its processing started and finished"""
+        if finished is None:
+            finished = self.clock()
+        self.processed += 1
+        self.processing_time.update(finished - started)
+        if self._last_completed is not None:
+            self.frame_interval.update(finished - self._last_completed)
+        self._last_completed = finished
+
+    @property
+    def processing_fps(self) -> float:
+        """Frames per second the session's worker can process"""
+        if not self.processing_time.count or self.processing_time.value <= 0:
+            return 0.0
+        return 1.0 / self.processing_time.value
+
+    @property
+    def output_fps(self) -> float:
+        """Frames per second actually processed"""
+        if not self.frame_interval.count or self.frame_interval.value <= 0:
+            return 0.0
+        return 1.0 / self.frame_interval.value
+
+    @property
+    def target_capture_fps(self) -> float:
+        """Capture rate the client should use"""
+        if not self.processing_time.count:
+            return self.max_capture_fps
+        target = self.processing_fps * self.headroom
+        return round(min(self.max_capture_fps, max(self.min_capture_fps, target)), 1)
+
+    def stats(self) -> Dict:
+        return {
+            'received_frames': self.received,
+            'dropped_frames': self.dropped,
+            'processed_frames': self.processed,
+            'processing_fps': round(self.processing_fps, 1),
+            'output_fps': round(self.output_fps, 1),
+            'target_fps': self.target_capture_fps
+        }
@@ -0,0 +1,138 @@
+"""
+Binary WebSocket messages for frames and metrics.
+
+Clients opt in at ``init`` with ``"protocol": "binary"``; the server answers
+with the session handle to put in every binary message. Control traffic
+(init, calibration, reading test, errors) stays JSON.
+
+Every binary message starts with a fixed 20-byte little-endian header::
+
+    type u8 | version u8 | reserved u16 | session handle u32 | sequence u32 | capture timestamp f64
+
+followed by the payload:
+
+    FRAME            raw JPEG bytes captured by the client
+    PROCESSED_FRAME  raw JPEG bytes of the annotated frame
+    METRICS          compact UTF-8 JSON of the metrics for that sequence number
+    LANDMARKS        a batch of face landmarks tracked by the client (see below)
+
+Responses echo the sequence number and capture timestamp of the frame they
+belong to, so clients can match them up and measure round-trip latency.
+
+Landmark sessions run face tracking in the browser and send only the eye
+landmarks listed in ``init_ack``. A LANDMARKS payload is::
+
+    frame height u16 | frame width u16 | frame count u16 | landmark count u16
+
+followed by one fixed-size record per frame::
+
+    capture timestamp f64 | has face u8 | (x, y) f32 per landmark, normalized to 0..1
+
+Frames without a face still carry (ignored) coordinates so every record has
+the same size and a batch decodes into numpy arrays without a Python loop.
+"""
+
+import json
+import struct
+from collections import namedtuple
+from typing import Dict, Tuple
+
+import numpy as np
+
+PROTOCOL_VERSION = 1
+
+FRAME = 1
+PROCESSED_FRAME = 2
+METRICS = 3
+LANDMARKS = 4
+
+HEADER = struct.Struct('<BBHIId')
+HEADER_SIZE = HEADER.size
+
+LANDMARK_BATCH_HEADER = struct.Struct('<HHHH')
+
+FrameHeader = namedtuple('FrameHeader', ['type', 'session', 'sequence', 'timestamp'])
+
+# timestamps (n,), has_face (n,) bool, points (n, landmark count, 2) float32
+LandmarkBatch = namedtuple('LandmarkBatch', ['frame_shape', 'timestamps', 'has_face', 'points'])
+
+
+class ProtocolError(ValueError):
+    """Raised for malformed binary messages"""
+
+
+def encode_message(message_type: int, session: int, sequence: int, timestamp: float,
+                   payload: bytes) -> bytes:
+    """Build a binary message from a header and payload"""
+    return HEADER.pack(message_type, PROTOCOL_VERSION, 0, session, sequence & 0xFFFFFFFF,
+                       timestamp) + payload
+
+
+def decode_message(message: bytes) -> Tuple[FrameHeader, memoryview]:
+    """Split a binary message into its header and payload.
+
+    Raises:
+        ProtocolError: If the message is too short or has an unknown version or type
+    """
+    if len(message) < HEADER_SIZE:
+        raise ProtocolError("Binary message shorter than its header")
+    message_type, version, _, session, sequence, timestamp = HEADER.unpack_from(message, 0)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported protocol version {version}")
+    if message_type not in (FRAME, PROCESSED_FRAME, METRICS, LANDMARKS):
+        raise ProtocolError(f"Unknown message type {message_type}")
+    return FrameHeader(message_type, session, sequence, timestamp), memoryview(message)[HEADER_SIZE:]
+
+
+def _compact(value):
+    """Round floats so the metrics JSON stays small"""
+    if isinstance(value, float):
+        return round(value, 4)
+    if isinstance(value, dict):
+        return {k: _compact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_compact(v) for v in value]
+    return value
+
+
+def encode_metrics(session: int, sequence: int, timestamp: float, metrics: Dict) -> bytes:
+    payload = json.dumps(_compact(metrics), separators=(',', ':')).encode('utf-8')
+    return encode_message(METRICS, session, sequence, timestamp, payload)
+
+
+def decode_metrics(payload) -> Dict:
+    return json.loads(bytes(payload).decode('utf-8'))
+
+
+def _landmark_dtype(n_points: int) -> np.dtype:
+    return np.dtype([('timestamp', '<f8'), ('has_face', 'u1'), ('points', '<f4', (n_points, 2))])
+
+
+def encode_landmarks(session: int, sequence: int, frame_shape: Tuple[int, int], timestamps,
+                     has_face, points) -> bytes:
+    """Build a LANDMARKS message; the header timestamp is that of the first frame"""
+    points = np.asarray(points, dtype=np.float32)
+    records = np.zeros(len(points), dtype=_landmark_dtype(points.shape[1]))
+    records['timestamp'] = timestamps
+    records['has_face'] = has_face
+    records['points'] = points
+    payload = LANDMARK_BATCH_HEADER.pack(frame_shape[0], frame_shape[1], len(points),
+                                         points.shape[1]) + records.tobytes()
+    return encode_message(LANDMARKS, session, sequence, float(records['timestamp'][0]), payload)
+
+
+def decode_landmarks(payload) -> LandmarkBatch:
+    """Decode the payload of a LANDMARKS message.
+
+    Raises:
+        ProtocolError: If the payload size does not match its batch header
+    """
+    if len(payload) < LANDMARK_BATCH_HEADER.size:
+        raise ProtocolError("Landmark batch shorter than its header")
+    height, width, n_frames, n_points = LANDMARK_BATCH_HEADER.unpack_from(payload, 0)
+    dtype = _landmark_dtype(n_points)
+    if len(payload) != LANDMARK_BATCH_HEADER.size + n_frames * dtype.itemsize:
+        raise ProtocolError("Landmark batch size does not match its header")
+    records = np.frombuffer(payload, dtype=dtype, offset=LANDMARK_BATCH_HEADER.size)
+    return LandmarkBatch((height, width), records['timestamp'].copy(),
+                         records['has_face'].astype(bool), records['points'].copy())
@@ -0,0 +1,66 @@
+"""
+Landmark-stream sessions: face tracking runs in the browser.
+
+The client runs face mesh itself and sends batches of eye landmarks (see
+``frame_protocol.LANDMARKS``); the server skips image decoding and FaceMesh
+and only runs the analytics. Each session gets an analyzer on a
+``ReplayClock`` that follows the client's capture timestamps, so a batch of
+frames is analyzed with the timing it was captured with, not the time it
+arrived.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from eye_tracking.clock import ReplayClock
+from eye_tracking.reading_analyzer import ReadingAnalyzer
+from frame_executor import client_metrics
+from frame_protocol import LandmarkBatch
+
+SESSION_SOURCE = 'landmarks'
+
+
+def create_landmark_analyzer() -> ReadingAnalyzer:
+    """Analyzer for a landmark session; its FaceMesh is never created"""
+    return ReadingAnalyzer(clock=ReplayClock())
+
+
+def landmark_indices(analyzer) -> List[int]:
+    """Face-mesh indices the client must send, in order"""
+    tracker = analyzer.eye_tracker
+    return tracker.LEFT_EYE_INDICES + tracker.RIGHT_EYE_INDICES
+
+
+def process_landmark_batch(analyzer, batch: LandmarkBatch) -> Optional[Dict]:
+    """Analyze a batch of client-tracked frames.
+
+    Returns:
+        dict: Client metrics after the last frame with the batch's processing
+            time under 'timings', or None if the analyzer produced no reading metrics
+
+    Raises:
+        ValueError: If the batch does not carry one point per landmark index
+    """
+    indices = landmark_indices(analyzer)
+    if batch.points.shape[1:] != (len(indices), 2):
+        raise ValueError(f"Expected {len(indices)} landmarks per frame, got {batch.points.shape[1]}")
+
+    start = time.perf_counter()
+    clock = analyzer.clock
+    landmarks = np.zeros((max(indices) + 1, 2), dtype=np.float32)
+    metrics = None
+    for timestamp, has_face, points in zip(batch.timestamps.tolist(), batch.has_face.tolist(),
+                                           batch.points):
+        clock.set(timestamp)
+        if has_face:
+            # The eye tracker copies what it needs, so the buffer can be reused
+            landmarks[indices] = points
+            metrics = analyzer.process_landmarks(landmarks, batch.frame_shape, timestamp)
+        else:
+            metrics = analyzer.process_landmarks(None, batch.frame_shape, timestamp)
+    response = client_metrics(metrics)
+    if response is not None:
+        response['timings'] = {'landmark_batch': time.perf_counter() - start}
+    return response
@@ -0,0 +1,156 @@
+"""
+Per-stage latency histograms exported in Prometheus text format.
+
+Every frame's pipeline stages (message parsing, decoding, FaceMesh, reading
+analysis, drawing, encoding, sending) are timed with ``time.perf_counter``
+and recorded into fixed-bucket histograms, globally and per session.
+Recording a sample is a bisect over a dozen bucket bounds plus a few integer
+increments, so instrumenting a frame costs microseconds against frame times
+of several milliseconds.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds in seconds; a final +Inf bucket is implicit
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Stages in pipeline order, used to order the exported series
+STAGES = ('receive', 'queue_wait', 'base64_decode', 'imdecode', 'facemesh', 'eye_metrics',
+          'update_reading_metrics', 'analyze_reading_patterns', 'draw', 'imencode',
+          'landmark_batch', 'worker_total', 'send')
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; not locked, callers serialize access."""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le label, cumulative count) pairs as Prometheus expects"""
+        total = 0
+        result = []
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            result.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound below which a fraction q of the samples fall"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        total = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            if total >= target:
+                return bound
+        return float('inf')
+
+
+def _labels(**labels) -> str:
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+class PipelineMetrics:
+    """Stage histograms for all sessions together and for each session."""
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self._lock = threading.Lock()
+        self._global = {}    # stage -> Histogram
+        self._sessions = {}  # session id -> {stage -> Histogram}
+
+    def _histogram(self, table: Dict, stage: str) -> Histogram:
+        histogram = table.get(stage)
+        if histogram is None:
+            histogram = table[stage] = Histogram(self.bounds)
+        return histogram
+
+    def observe(self, stage: str, seconds: float, session_id: Optional[str] = None):
+        with self._lock:
+            self._histogram(self._global, stage).observe(seconds)
+            if session_id is not None:
+                self._histogram(self._sessions.setdefault(session_id, {}), stage).observe(seconds)
+
+    def observe_many(self, timings: Dict[str, float], session_id: Optional[str] = None):
+        """Record a frame's stage timings under one lock acquisition"""
+        with self._lock:
+            session = self._sessions.setdefault(session_id, {}) if session_id is not None else None
+            for stage, seconds in timings.items():
+                self._histogram(self._global, stage).observe(seconds)
+                if session is not None:
+                    self._histogram(session, stage).observe(seconds)
+
+    def remove_session(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def retain_sessions(self, session_ids: Iterable[str]):
+        """Drop the histograms of sessions that no longer exist"""
+        keep = set(session_ids)
+        with self._lock:
+            for session_id in [s for s in self._sessions if s not in keep]:
+                del self._sessions[session_id]
+
+    def stage_summary(self, session_id: Optional[str] = None) -> Dict[str, Dict]:
+        """Count, mean and p50/p99 bucket bounds per stage"""
+        with self._lock:
+            table = self._global if session_id is None else self._sessions.get(session_id, {})
+            return {stage: {'count': h.count,
+                            'mean': h.sum / h.count if h.count else 0.0,
+                            'p50': h.quantile(0.5),
+                            'p99': h.quantile(0.99)}
+                    for stage, h in table.items()}
+
+    def render(self, gauges: Iterable[Tuple[str, str, str, Dict[str, str], float]] = ()) -> str:
+        """Prometheus text exposition of the histograms and extra series.
+
+        Args:
+            gauges: (name, type, help, labels, value) tuples, e.g. active sessions
+                or dropped frame counters; series sharing a name must be adjacent
+        """
+        lines = []
+        with self._lock:
+            tables = [('eyetrack_stage_seconds', 'Time spent per frame in each pipeline stage',
+                       [({}, self._global)]),
+                      ('eyetrack_session_stage_seconds', 'Per-session time spent per frame in each stage',
+                       [({'session': s}, table) for s, table in self._sessions.items()])]
+            for name, help_text, entries in tables:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for labels, table in entries:
+                    for stage in sorted(table, key=_stage_order):
+                        histogram = table[stage]
+                        base = dict(labels, stage=stage)
+                        for le, count in histogram.cumulative():
+                            lines.append(f'{name}_bucket{{{_labels(**base, le=le)}}} {count}')
+                        lines.append(f'{name}_sum{{{_labels(**base)}}} {histogram.sum:.6f}')
+                        lines.append(f'{name}_count{{{_labels(**base)}}} {histogram.count}')
+
+        declared = set()
+        for name, metric_type, help_text, labels, value in gauges:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+            label_text = f'{{{_labels(**labels)}}}' if labels else ''
+            lines.append(f'{name}{label_text} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _stage_order(stage: str):
+    return (STAGES.index(stage), stage) if stage in STAGES else (len(STAGES), stage)
@@ -0,0 +1,351 @@
+"""
+Offline analysis of saved eye-tracking sessions.
+
+A session file (see ``EyeTrackingService.save_session_data``) is a list of
+per-sample entries whose fields vary: early clients only sent
+``gaze_stability``/``blink_rate``, later ones the results of
+``process_frame_data`` with gaze points, blink flags and probabilities.
+``session_columns`` walks the entries once and stores every field as a numpy
+column, with NaN where it is missing. Everything after that is vectorized:
+
+- I-VT fixations: runs of samples below a velocity threshold
+- I-DT fixations: merged sliding windows of the minimum fixation duration
+  whose dispersion stays below a threshold
+- saccade amplitude and peak velocity distributions
+- regressions (leftward saccades on a line) and return sweeps
+- blink counts and durations, probability trend over the session
+
+The columns are cached next to the JSON file as ``.columns.npz``, so
+re-analyzing a multi-hour session skips the JSON parse.
+"""
+
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+COLUMNS = ('timestamp', 'gaze_x', 'gaze_y', 'is_blinking', 'gaze_stability', 'blink_rate', 'probability')
+
+
+def _timestamps(values) -> np.ndarray:
+    """Seconds from datetime strings or epoch numbers; NaN where missing"""
+    if all(isinstance(v, (int, float)) for v in values):
+        return np.array(values, dtype=float)
+    result = np.full(len(values), np.nan)
+    strings = [i for i, v in enumerate(values) if isinstance(v, str)]
+    if strings:
+        parsed = np.array([values[i] for i in strings], dtype='datetime64[us]')
+        result[strings] = parsed.astype(np.int64) / 1e6
+    numbers = [i for i, v in enumerate(values) if isinstance(v, (int, float))]
+    result[numbers] = [values[i] for i in numbers]
+    return result
+
+
+def entry_values(entry: Dict) -> Tuple:
+    """One saved sample as (timestamp, gaze_x, gaze_y, is_blinking, gaze_stability,
+    blink_rate, probability), with None for missing values"""
+    metrics = entry.get('metrics') or {}
+    point = entry.get('gaze_point')
+    blink = metrics.get('blink')
+    # Live sessions put the probability under the indicators, batch results under the analysis
+    probability = (metrics.get('dyslexia_indicators') or {}).get('probability')
+    if probability is None:
+        probability = (entry.get('analysis') or {}).get('probability')
+    return (
+        entry.get('timestamp'),
+        point[0] if point is not None else None,
+        point[1] if point is not None else None,
+        bool(blink.get('is_blinking', False)) if blink else False,
+        metrics.get('gaze_stability'),
+        metrics.get('blink_rate'),
+        probability
+    )
+
+
+def _float_column(values) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def empty_columns() -> Dict[str, np.ndarray]:
+    return {name: np.empty(0, dtype=bool if name == 'is_blinking' else float) for name in COLUMNS}
+
+
+def value_columns(values) -> Dict[str, np.ndarray]:
+    """Columns from a list of entry_values tuples"""
+    if not values:
+        return empty_columns()
+    timestamps, x, y, blinking, stability, blink_rate, probability = zip(*values)
+    return {
+        'timestamp': _timestamps(timestamps),
+        'gaze_x': _float_column(x),
+        'gaze_y': _float_column(y),
+        'is_blinking': np.array(blinking, dtype=bool),
+        'gaze_stability': _float_column(stability),
+        'blink_rate': _float_column(blink_rate),
+        'probability': _float_column(probability)
+    }
+
+
+def session_columns(data: Dict) -> Dict[str, np.ndarray]:
+    """Turn a session's entries into one numpy array per field"""
+    return value_columns(list(map(entry_values, data.get('data', []))))
+
+
+def time_slice(columns: Dict[str, np.ndarray], start_time: Optional[float] = None,
+               end_time: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """The samples with start_time <= timestamp <= end_time; None leaves that side open"""
+    if start_time is None and end_time is None:
+        return columns
+    t = columns['timestamp']
+    keep = np.ones(len(t), dtype=bool)
+    if start_time is not None:
+        keep &= t >= start_time
+    if end_time is not None:
+        keep &= t <= end_time
+    return {name: values[keep] for name, values in columns.items()}
+
+
+def load_session_columns(path: str, load_json) -> Dict[str, np.ndarray]:
+    """Columns of the session file at path, from the .columns.npz cache when it is current.
+
+    Args:
+        path (str): Session JSON file
+        load_json (callable): Returns the parsed session for path; only called on a cache miss
+    """
+    cache = os.path.splitext(path)[0] + '.columns.npz'
+    try:
+        if os.path.getmtime(cache) >= os.path.getmtime(path):
+            with np.load(cache) as stored:
+                return {name: stored[name] for name in COLUMNS}
+    except (OSError, KeyError, ValueError):
+        pass
+
+    columns = session_columns(load_json(path))
+    try:
+        # Write-then-rename so a concurrent reader never sees a partial cache
+        tmp = cache + '.tmp.npz'
+        np.savez(tmp, **columns)
+        os.replace(tmp, cache)
+    except OSError:
+        pass
+    return columns
+
+
+def run_bounds(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start and (exclusive) end indices of the runs of True in mask"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def distribution(values: np.ndarray) -> Dict:
+    """Count, mean and percentiles of the finite values"""
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return {'count': 0, 'mean': None, 'median': None, 'p90': None, 'max': None}
+    median, p90 = np.percentile(values, [50, 90])
+    return {'count': int(len(values)), 'mean': float(values.mean()), 'median': float(median),
+            'p90': float(p90), 'max': float(values.max())}
+
+
+def gaze_velocity(t: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Sample-to-sample gaze speed; 0 for the first sample, NaN across missing gaze"""
+    dt = np.diff(t, prepend=np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        velocity = np.hypot(np.diff(x, prepend=np.nan), np.diff(y, prepend=np.nan)) / dt
+    velocity[~np.isfinite(velocity)] = np.nan
+    if len(velocity):
+        velocity[0] = 0.0
+    return velocity
+
+
+def ivt_fixations(t, x, y, velocity, velocity_threshold: float,
+                  min_duration: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Runs of samples slower than velocity_threshold lasting at least min_duration"""
+    starts, ends = run_bounds(velocity < velocity_threshold)
+    keep = t[ends - 1] - t[starts] >= min_duration
+    return starts[keep], ends[keep]
+
+
+def idt_fixations(t, x, y, dispersion_threshold: float,
+                  min_duration: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Dispersion-threshold fixations.
+
+    A fixation starts at the first window spanning min_duration (in samples,
+    at the median frame interval) whose dispersion (x range + y range) is
+    within the threshold, and grows for as long as the dispersion of all its
+    samples stays within it. The next one is looked for after its end.
+    """
+    n = len(t)
+    if n < 2:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    interval = np.nanmedian(np.diff(t))
+    width = int(min(n, max(2, np.ceil(min_duration / interval) + 1))) if interval > 0 else 2
+    windows_x = np.lib.stride_tricks.sliding_window_view(x, width)
+    windows_y = np.lib.stride_tricks.sliding_window_view(y, width)
+    dispersion = np.ptp(windows_x, axis=1) + np.ptp(windows_y, axis=1)
+    seeds = dispersion <= dispersion_threshold  # NaN gaze never qualifies
+
+    # Samples covered by a qualifying window form runs that no fixation crosses,
+    # and a run within the threshold as a whole is one fixation
+    coverage = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(coverage, np.flatnonzero(seeds), 1)
+    np.add.at(coverage, np.flatnonzero(seeds) + width, -1)
+    starts, ends = run_bounds(np.cumsum(coverage[:n]) > 0)
+    if not len(starts):
+        return starts, ends
+    split = ~(_run_range(x, starts, ends) + _run_range(y, starts, ends) <= dispersion_threshold)
+    if not split.any():
+        return starts, ends
+
+    # Other runs drifted: grow fixations one after another through them
+    seed_index = np.flatnonzero(seeds)
+    grown_starts, grown_ends = [], []
+    for run_start, run_end in zip(starts[split].tolist(), ends[split].tolist()):
+        start = run_start
+        while start < run_end:
+            end = _grow_window(x, y, start, start + width, dispersion_threshold)
+            grown_starts.append(start)
+            grown_ends.append(end)
+            k = np.searchsorted(seed_index, end)
+            start = int(seed_index[k]) if k < len(seed_index) else n
+    starts = np.concatenate((starts[~split], np.array(grown_starts, dtype=starts.dtype)))
+    ends = np.concatenate((ends[~split], np.array(grown_ends, dtype=ends.dtype)))
+    order = np.argsort(starts)
+    return starts[order], ends[order]
+
+
+def _run_range(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """max - min of values[start:end] for each run of run_bounds"""
+    # Runs are separated, so interleaved bounds are increasing and the even slots reduce the runs;
+    # the padding lets a run end at the last sample
+    bounds = np.column_stack((starts, ends)).ravel()
+    padded = np.append(values, 0.0)
+    return np.maximum.reduceat(padded, bounds)[::2] - np.minimum.reduceat(padded, bounds)[::2]
+
+
+def _grow_window(x, y, start: int, end: int, dispersion_threshold: float) -> int:
+    """Largest end >= end for which x[start:end], y[start:end] stay within the dispersion threshold"""
+    n = len(x)
+    x_lo, x_hi = x[start:end].min(), x[start:end].max()
+    y_lo, y_hi = y[start:end].min(), y[start:end].max()
+    step = max(end - start, 16)
+    while end < n:
+        # Extend by doubling chunks so long fixations cost O(length), not O(length^2)
+        stop = min(n, end + step)
+        xs, ys = x[end:stop], y[end:stop]
+        dispersion = (np.maximum(np.maximum.accumulate(xs), x_hi) - np.minimum(np.minimum.accumulate(xs), x_lo)
+                      + np.maximum(np.maximum.accumulate(ys), y_hi) - np.minimum(np.minimum.accumulate(ys), y_lo))
+        over = np.flatnonzero(~(dispersion <= dispersion_threshold))  # NaN gaze ends the fixation
+        if len(over):
+            return end + int(over[0])
+        x_lo, x_hi = min(x_lo, xs.min()), max(x_hi, xs.max())
+        y_lo, y_hi = min(y_lo, ys.min()), max(y_hi, ys.max())
+        end, step = stop, step * 2
+    return n
+
+
+def saccades(t, x, y, velocity, velocity_threshold: float) -> Dict[str, np.ndarray]:
+    """Amplitude, displacement, duration and peak velocity of each I-VT saccade"""
+    starts, ends = run_bounds(velocity >= velocity_threshold)
+    # A saccade leaves the sample before its first fast sample
+    origin = np.maximum(starts - 1, 0)
+    last = ends - 1
+    dx = x[last] - x[origin]
+    dy = y[last] - y[origin]
+    # reduceat runs each reduction up to the next start, so mask the samples outside the saccades
+    inside = np.where(velocity >= velocity_threshold, velocity, -np.inf)
+    peak = np.maximum.reduceat(inside, starts) if len(starts) else np.empty(0)
+    return {
+        'dx': dx,
+        'dy': dy,
+        'amplitude': np.hypot(dx, dy),
+        'duration': t[last] - t[origin],
+        'peak_velocity': peak
+    }
+
+
+def _events(starts, ends, t, minutes) -> Dict:
+    durations = t[ends - 1] - t[starts] if len(starts) else np.empty(0)
+    return {'count': int(len(starts)), 'duration': distribution(durations),
+            'per_minute': float(len(starts) / minutes) if minutes > 0 else None}
+
+
+def _mean(values: np.ndarray) -> Optional[float]:
+    values = values[np.isfinite(values)]
+    return float(values.mean()) if len(values) else None
+
+
+def analyze_columns(columns: Dict[str, np.ndarray], velocity_threshold: float = 30.0,
+                    dispersion_threshold: float = 25.0, min_fixation_duration: float = 0.1,
+                    line_change_min: float = 20.0) -> Dict:
+    """Session report from columnar samples.
+
+    Args:
+        columns (dict): Arrays as returned by session_columns
+        velocity_threshold (float): I-VT saccade velocity, gaze units per second
+        dispersion_threshold (float): I-DT maximum dispersion, gaze units
+        min_fixation_duration (float): Shortest fixation in seconds
+        line_change_min (float): Downward movement of a return sweep to the next line
+
+    Returns:
+        dict: Fixations, saccades, regressions, blinks, averages and probability trend
+    """
+    t = columns['timestamp']
+    order = np.argsort(t, kind='stable')
+    if np.any(order != np.arange(len(t))):
+        columns = {name: values[order] for name, values in columns.items()}
+        t = columns['timestamp']
+    x, y = columns['gaze_x'], columns['gaze_y']
+    finite_t = t[np.isfinite(t)]
+    seconds = float(finite_t[-1] - finite_t[0]) if len(finite_t) > 1 else 0.0
+    minutes = seconds / 60
+
+    velocity = gaze_velocity(t, x, y)
+    moves = saccades(t, x, y, velocity, velocity_threshold)
+    leftward = moves['dx'] < 0
+    return_sweep = leftward & (moves['dy'] >= line_change_min)
+    regression = leftward & (np.abs(moves['dy']) < line_change_min)
+    n_saccades = len(moves['dx'])
+
+    blink_starts, blink_ends = run_bounds(columns['is_blinking'])
+
+    probability = columns['probability']
+    has_probability = np.isfinite(probability) & np.isfinite(t)
+    trend = {'improving': False, 'slope_per_minute': None, 'first_quarter': None, 'last_quarter': None,
+             'samples': int(has_probability.sum())}
+    if has_probability.sum() > 1:
+        p, pt = probability[has_probability], t[has_probability]
+        quarter = max(1, len(p) // 4)
+        slope = np.polyfit((pt - pt[0]) / 60, p, 1)[0] if pt[-1] > pt[0] else 0.0
+        trend.update(improving=bool(p[-1] < p.mean()), slope_per_minute=float(slope),
+                     first_quarter=float(p[:quarter].mean()), last_quarter=float(p[-quarter:].mean()))
+
+    return {
+        'samples': int(len(t)),
+        'duration_seconds': seconds,
+        'coverage': {name: float(np.isfinite(columns[name]).mean()) if len(t) else 0.0
+                     for name in ('gaze_x', 'gaze_stability', 'blink_rate', 'probability')},
+        'average_metrics': {
+            'gaze_stability': _mean(columns['gaze_stability']),
+            'blink_rate': _mean(columns['blink_rate']),
+            'dyslexia_probability': _mean(probability)
+        },
+        'fixations': {
+            'ivt': _events(*ivt_fixations(t, x, y, velocity, velocity_threshold, min_fixation_duration),
+                           t, minutes),
+            'idt': _events(*idt_fixations(t, x, y, dispersion_threshold, min_fixation_duration), t, minutes)
+        },
+        'saccades': {
+            'count': n_saccades,
+            'amplitude': distribution(moves['amplitude']),
+            'peak_velocity': distribution(moves['peak_velocity'])
+        },
+        'regressions': {
+            'count': int(regression.sum()),
+            'rate': float(regression.sum() / n_saccades) if n_saccades else 0.0,
+            'per_minute': float(regression.sum() / minutes) if minutes > 0 else None,
+            'return_sweeps': int(return_sweep.sum())
+        },
+        'blinks': _events(blink_starts, blink_ends, t, minutes),
+        'trend': trend
+    }
@@ -0,0 +1,308 @@
+"""
+SQLite index of finished reading sessions.
+
+Session results are spread over ``data/session_<id>.json`` files and session
+logs, so a question like "all sessions last week with a probability above 0.6"
+would otherwise have to open every one of them. ``SessionIndex`` keeps one
+summary row per session (times, frame count, calibration, final metrics and
+dyslexia probability) in a SQLite database in WAL mode, written when a session
+ends, so that readers never block the writer and queries are served from the
+indexed columns.
+
+``dyslexia_probability`` is stored as a fraction in [0, 1]; the percentage of
+the client metrics is converted by ``live_session_summary``.
+
+Usage:
+    python session_index.py backfill --data-dir data --db data/sessions.db
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from session_analysis import session_columns
+from session_log import SessionLogReader
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('session_id', 'source', 'status', 'start_time', 'end_time', 'duration', 'frame_count',
+          'calibration', 'reading_speed', 'fixations', 'regressions', 'dyslexia_probability', 'metrics')
+SORT_FIELDS = ('start_time', 'end_time', 'duration', 'frame_count', 'reading_speed', 'fixations',
+               'regressions', 'dyslexia_probability')
+MAX_LIMIT = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    source TEXT,
+    status TEXT,
+    start_time REAL,
+    end_time REAL,
+    duration REAL,
+    frame_count INTEGER,
+    calibration TEXT,
+    reading_speed REAL,
+    fixations INTEGER,
+    regressions INTEGER,
+    dyslexia_probability REAL,
+    metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_start_time ON sessions (start_time);
+CREATE INDEX IF NOT EXISTS sessions_probability ON sessions (dyslexia_probability);
+"""
+
+# Filter name -> SQL condition on the bound value
+_FILTERS = {
+    'start_after': 'start_time >= ?',
+    'start_before': 'start_time < ?',
+    'min_probability': 'dyslexia_probability >= ?',
+    'max_probability': 'dyslexia_probability <= ?',
+    'min_frames': 'frame_count >= ?',
+    'status': 'status = ?',
+    'source': 'source = ?',
+    'calibration': 'calibration = ?'
+}
+
+
+class SessionIndex:
+    """Thread-safe summary table of sessions in a WAL-mode SQLite database."""
+
+    def __init__(self, path: str):
+        """Open (creating if needed) the index at path; ':memory:' for a private one"""
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # One connection shared by the Flask, WebSocket and eviction threads under the lock
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    def record(self, summary: Dict):
+        """Insert or replace a session's row; fields missing from summary are NULL"""
+        self.record_many([summary])
+
+    def record_many(self, summaries: List[Dict]):
+        """Insert or replace several rows in one transaction"""
+        rows = []
+        for summary in summaries:
+            row = [summary.get(name) for name in FIELDS]
+            metrics = summary.get('metrics')
+            row[-1] = json.dumps(metrics, default=str) if metrics is not None else None
+            rows.append(row)
+        with self._lock, self._db:
+            self._db.executemany(f"INSERT OR REPLACE INTO sessions ({', '.join(FIELDS)}) "
+                                 f"VALUES ({', '.join('?' * len(FIELDS))})", rows)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute('SELECT * FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+        return self._row(row) if row is not None else None
+
+    def query(self, sort: str = 'start_time', descending: bool = True, limit: int = 50, offset: int = 0,
+              **filters) -> Dict:
+        """Sessions matching the filters, one page at a time.
+
+        Args:
+            sort (str): One of SORT_FIELDS
+            descending (bool): Sort order; rows without a value come last either way
+            limit (int): Page size, at most MAX_LIMIT
+            offset (int): Rows to skip
+            **filters: Keys of _FILTERS; None values are ignored
+
+        Returns:
+            dict: total matching rows, limit, offset and the page of sessions
+
+        Raises:
+            ValueError: On an unknown sort field or filter, or a negative limit or offset
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort}; use one of {', '.join(SORT_FIELDS)}")
+        unknown = set(filters) - set(_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+        if limit < 0 or offset < 0:
+            raise ValueError("limit and offset must not be negative")
+        limit = min(limit, MAX_LIMIT)
+
+        conditions, values = [], []
+        for name, value in filters.items():
+            if value is not None:
+                conditions.append(_FILTERS[name])
+                values.append(value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        order = f" ORDER BY {sort} IS NULL, {sort} {'DESC' if descending else 'ASC'}, session_id"
+        with self._lock:
+            total = self._db.execute(f'SELECT COUNT(*) FROM sessions{where}', values).fetchone()[0]
+            rows = self._db.execute(f'SELECT * FROM sessions{where}{order} LIMIT ? OFFSET ?',
+                                    values + [limit, offset]).fetchall()
+        return {'total': total, 'limit': limit, 'offset': offset, 'sessions': [self._row(row) for row in rows]}
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict:
+        session = dict(row)
+        if session['metrics'] is not None:
+            session['metrics'] = json.loads(session['metrics'])
+        return session
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def live_session_summary(session_id: str, state: Dict) -> Dict:
+    """Index row of a SessionManager session from its public state"""
+    metrics = state.get('metrics') or {}
+    started, ended = state.get('started_at'), state.get('ended_at')
+    probability = metrics.get('dyslexia_probability')  # Percent, see frame_executor.client_metrics
+    return {
+        'session_id': session_id,
+        'source': state.get('source'),
+        'status': state.get('status'),
+        'start_time': started,
+        'end_time': ended,
+        'duration': ended - started if started is not None and ended is not None else None,
+        'frame_count': (state.get('frame_stats') or {}).get('processed_frames', 0),
+        'calibration': state.get('calibration', 'none'),
+        'reading_speed': metrics.get('reading_speed'),
+        'fixations': metrics.get('fixations'),
+        'regressions': metrics.get('regressions'),
+        'dyslexia_probability': probability / 100 if probability is not None else None,
+        'metrics': metrics
+    }
+
+
+def _last_finite(values: np.ndarray) -> Optional[float]:
+    values = values[np.isfinite(values)]
+    return float(values[-1]) if len(values) else None
+
+
+def file_summary(data_dir: str, session_id: str) -> Optional[Dict]:
+    """Index row of a saved session, from its JSON file and/or session log.
+
+    Handles every format sessions were saved in: WebSocket session summaries
+    (duration, frame count, calibration), end-of-test metrics and analysis,
+    and per-sample 'data' lists. Times come from the samples when there are
+    any, otherwise the file's modification time marks the end.
+    """
+    json_path = os.path.join(data_dir, f"session_{session_id}.json")
+    log_path = os.path.join(data_dir, f"session_{session_id}.eylog")
+    data, columns = {}, None
+    if os.path.exists(json_path):
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            return None
+        if data.get('data'):
+            columns = session_columns(data)
+    if os.path.exists(log_path):
+        with SessionLogReader(log_path) as reader:
+            columns = reader.read()
+    if not data and columns is None:
+        return None
+
+    summary = {'session_id': session_id, 'source': 'file', 'status': 'completed',
+               'frame_count': data.get('frame_count'), 'duration': data.get('duration')}
+    if 'calibrated' in data:
+        summary['calibration'] = 'calibrated' if data['calibrated'] else 'none'
+
+    metrics = data.get('metrics') or {}
+    if metrics:
+        summary.update(reading_speed=metrics.get('reading_speed'),
+                       regressions=metrics.get('regression_count', metrics.get('regressions')),
+                       fixations=metrics.get('fixation_count', metrics.get('fixations')),
+                       metrics=metrics)
+    summary['dyslexia_probability'] = (data.get('analysis') or {}).get('probability')
+
+    if columns is not None and len(columns['timestamp']):
+        t = columns['timestamp'][np.isfinite(columns['timestamp'])]
+        if len(t):
+            summary['start_time'], summary['end_time'] = float(t.min()), float(t.max())
+            summary['duration'] = summary['duration'] or summary['end_time'] - summary['start_time']
+        summary['frame_count'] = summary['frame_count'] or int(len(columns['timestamp']))
+        if summary['dyslexia_probability'] is None:
+            summary['dyslexia_probability'] = _last_finite(columns['probability'])
+    if summary.get('end_time') is None:
+        summary['end_time'] = os.path.getmtime(json_path if os.path.exists(json_path) else log_path)
+        if summary['duration'] is not None:
+            summary['start_time'] = summary['end_time'] - summary['duration']
+    return summary
+
+
+_SESSION_FILE = re.compile(r'^session_(.+?)\.(json|eylog)$')
+
+
+def backfill(index: SessionIndex, data_dir: str, replace: bool = False) -> int:
+    """Index the saved sessions in data_dir; returns the number of rows written.
+
+    Sessions already in the index are skipped unless replace is set, so rows
+    recorded live (which know the session source and final metrics) win.
+    """
+    session_ids = sorted({match.group(1) for match in (
+        _SESSION_FILE.match(os.path.basename(path)) for path in glob.glob(os.path.join(data_dir, 'session_*')))
+        if match})
+    summaries, written = [], 0
+    for session_id in session_ids:
+        if not replace and index.get(session_id) is not None:
+            continue
+        try:
+            summary = file_summary(data_dir, session_id)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not index session {session_id}: {str(e)}")
+            continue
+        if summary is not None:
+            summaries.append(summary)
+        if len(summaries) >= 500:
+            index.record_many(summaries)
+            written += len(summaries)
+            summaries = []
+    index.record_many(summaries)
+    return written + len(summaries)
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from a number or an ISO 8601 date/time string"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the SQLite index of saved reading sessions")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    fill = subparsers.add_parser('backfill', help="Index the session files saved before the index existed")
+    fill.add_argument('--data-dir', default='data', help="Directory of session_<id>.json/.eylog files")
+    fill.add_argument('--db', default=os.path.join('data', 'sessions.db'), help="Index database")
+    fill.add_argument('--replace', action='store_true', help="Re-index sessions already in the index")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    index = SessionIndex(args.db)
+    start = time.perf_counter()
+    written = backfill(index, args.data_dir, args.replace)
+    print(f"Indexed {written} sessions from {args.data_dir} in {time.perf_counter() - start:.1f}s "
+          f"({len(index)} in {args.db})")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Append-only session logs of columnar gaze samples.
+
+``EyeTrackingService`` streams every processed sample of a live session to a
+``.eylog`` file instead of holding the session in memory until it ends. The
+file is a header followed by chunks and, once the log is closed, an index:
+
+    header   MAGIC, u32 length, JSON {"columns": [[name, dtype], ...], "chunk_size": n}
+    chunk    b'CHNK', u32 count, f8 first and f8 last timestamp, then each
+             column's ``count`` values, every column padded to 8 bytes
+    index    one (u8 offset, u4 count, f8 t_first, f8 t_last) record per chunk
+    trailer  u8 index offset, u8 chunk count, INDEX_MAGIC
+
+Chunks hold ``chunk_size`` samples (only the last one, written when the log is
+flushed or closed, may be shorter) and are written by a background thread, so
+appending a sample costs a list append. A crash loses the samples of the chunk
+being filled; the chunks already written are found again by walking the chunk
+headers when the trailer is missing, and reopening the log for writing
+continues after the last complete chunk.
+
+``SessionLogReader`` memory-maps the file and uses the index to read only the
+chunks overlapping a time range, as numpy views on the mapped file.
+"""
+
+import json
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from session_analysis import COLUMNS, empty_columns, entry_values, time_slice, value_columns
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'EYELOG\x00\x01'
+INDEX_MAGIC = b'EYEINDEX'
+CHUNK_MAGIC = b'CHNK'
+DEFAULT_CHUNK_SIZE = 512  # About 17 seconds at 30 fps
+
+DTYPES = {name: np.dtype('?' if name == 'is_blinking' else '<f8') for name in COLUMNS}
+
+_LENGTH = struct.Struct('<I')
+_CHUNK = struct.Struct('<4sIdd')
+_TRAILER = struct.Struct('<QQ8s')
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('count', '<u4'), ('t_first', '<f8'), ('t_last', '<f8')])
+
+
+def _padded(size: int) -> int:
+    return -(-size // 8) * 8
+
+
+def _column_offsets(columns: Sequence, count: int) -> Dict[str, int]:
+    """Offset of each column from the end of the chunk header"""
+    offsets, position = {}, 0
+    for name, dtype in columns:
+        offsets[name] = position
+        position += _padded(count * dtype.itemsize)
+    return offsets
+
+
+def _encode_header(columns: Sequence, chunk_size: int) -> bytes:
+    description = json.dumps({'columns': [[name, dtype.str] for name, dtype in columns],
+                              'chunk_size': chunk_size}).encode()
+    header = MAGIC + _LENGTH.pack(len(description)) + description
+    return header + b'\x00' * (_padded(len(header)) - len(header))
+
+
+def _decode_header(buffer) -> Dict:
+    """Columns (name, dtype pairs), chunk size and data offset of a log"""
+    if len(buffer) < len(MAGIC) + _LENGTH.size or buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a session log")
+    length, = _LENGTH.unpack_from(buffer, len(MAGIC))
+    start = len(MAGIC) + _LENGTH.size
+    description = json.loads(bytes(buffer[start:start + length]))
+    return {
+        'columns': [(name, np.dtype(dtype)) for name, dtype in description['columns']],
+        'chunk_size': description['chunk_size'],
+        'data_offset': _padded(start + length)
+    }
+
+
+def _chunk_size_bytes(columns: Sequence, count: int) -> int:
+    return _CHUNK.size + sum(_padded(count * dtype.itemsize) for _, dtype in columns)
+
+
+def _read_index(buffer, header: Dict):
+    """Chunk index of a log and whether it came from the trailer.
+
+    Without a valid trailer (the log is still being written, or its writer
+    crashed) the chunk headers are walked up to the first incomplete chunk.
+    """
+    size = len(buffer)
+    if size >= header['data_offset'] + _TRAILER.size:
+        index_offset, n_chunks, magic = _TRAILER.unpack_from(buffer, size - _TRAILER.size)
+        if magic == INDEX_MAGIC and index_offset + n_chunks * INDEX_DTYPE.itemsize + _TRAILER.size == size:
+            return np.frombuffer(buffer, INDEX_DTYPE, n_chunks, index_offset).copy(), True
+
+    entries, offset = [], header['data_offset']
+    while offset + _CHUNK.size <= size:
+        magic, count, t_first, t_last = _CHUNK.unpack_from(buffer, offset)
+        length = _chunk_size_bytes(header['columns'], count)
+        if magic != CHUNK_MAGIC or offset + length > size:
+            break
+        entries.append((offset, count, t_first, t_last))
+        offset += length
+    return np.array(entries, dtype=INDEX_DTYPE), False
+
+
+class SessionLogReader:
+    """Memory-mapped, time-indexed access to a session log."""
+
+    def __init__(self, path: str):
+        """Open a session log.
+
+        Raises:
+            ValueError: If the file is not a session log
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            header = _decode_header(self._map)
+        except (ValueError, OSError, KeyError):
+            self._file.close()
+            raise ValueError(f"{path} is not a session log")
+        self.columns = header['columns']
+        self.chunk_size = header['chunk_size']
+        self.data_offset = header['data_offset']
+        self.index, self.complete = _read_index(self._map, header)
+
+    def __len__(self) -> int:
+        return int(self.index['count'].sum())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def time_range(self):
+        """(first, last) timestamp in the log, or None if it holds no timed samples"""
+        first, last = self.index['t_first'], self.index['t_last']
+        if not np.isfinite(first).any():
+            return None
+        return float(np.nanmin(first)), float(np.nanmax(last))
+
+    def chunks(self, start_time: Optional[float] = None, end_time: Optional[float] = None) -> np.ndarray:
+        """Positions in the index of the chunks that may hold samples in the time range"""
+        keep = np.ones(len(self.index), dtype=bool)
+        if start_time is not None:
+            keep &= self.index['t_last'] >= start_time
+        if end_time is not None:
+            keep &= self.index['t_first'] <= end_time
+        return np.flatnonzero(keep)
+
+    def read(self, start_time: Optional[float] = None, end_time: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Samples with start_time <= timestamp <= end_time, as columns.
+
+        Only the chunks the index places in the range are touched; the
+        returned arrays are copies, so they outlive the reader.
+        """
+        selected = self.chunks(start_time, end_time)
+        if not len(selected):
+            return empty_columns()
+        parts = {name: [] for name, _ in self.columns}
+        for offset, count in zip(self.index['offset'][selected].tolist(), self.index['count'][selected].tolist()):
+            start = offset + _CHUNK.size
+            positions = _column_offsets(self.columns, count)
+            for name, dtype in self.columns:
+                parts[name].append(np.frombuffer(self._map, dtype, count, start + positions[name]))
+        columns = {name: np.concatenate(arrays) for name, arrays in parts.items()}
+        del parts  # Drop the views on the map before it can be closed
+        for name in COLUMNS:
+            if name not in columns:
+                columns[name] = np.full(len(columns['timestamp']), np.nan)
+        return time_slice(columns, start_time, end_time)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def read_session_log(path: str, start_time: Optional[float] = None,
+                     end_time: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """Columns of the samples of a session log in a time range"""
+    with SessionLogReader(path) as reader:
+        return reader.read(start_time, end_time)
+
+
+class SessionLogWriter:
+    """Appends samples to a session log from a background thread."""
+
+    def __init__(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Open a session log for appending, creating it if needed.
+
+        An existing log is continued after its last complete chunk; its
+        index, if any, is rewritten when this writer closes.
+
+        Args:
+            path (str): Log file
+            chunk_size (int): Samples per chunk
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.columns = [(name, DTYPES[name]) for name in COLUMNS]
+        self.index = []
+        self.error = None
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with SessionLogReader(path) as reader:
+                self.columns = reader.columns
+                self.chunk_size = reader.chunk_size
+                self.index = [tuple(entry) for entry in reader.index.tolist()]
+                end = reader.data_offset
+            if self.index:
+                offset, count = self.index[-1][:2]
+                end = offset + _chunk_size_bytes(self.columns, count)
+            self._file = open(path, 'r+b')
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(_encode_header(self.columns, self.chunk_size))
+            self._file.flush()
+
+        # Filled by the caller: entry_values rows and column dicts, in order
+        self._rows = []
+        self._parts = []
+        self._pending = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"session-log-{os.path.basename(path)}",
+                                        daemon=True)
+        self._thread.start()
+        self.closed = False
+
+    def __len__(self) -> int:
+        """Samples appended so far, written or not"""
+        return sum(entry[1] for entry in self.index) + self._pending
+
+    def append(self, entry: Dict):
+        """Append a processed sample, a dict as process_frame_data returns"""
+        self._rows.append(entry_values(entry))
+        self._pending += 1
+        if self._pending >= self.chunk_size:
+            self._submit()
+
+    def append_columns(self, **columns):
+        """Append a batch of samples given as arrays; missing columns are NaN"""
+        count = len(columns['timestamp'])
+        if not count:
+            return
+        self._seal_rows()
+        self._parts.append(columns)
+        self._pending += count
+        if self._pending >= self.chunk_size:
+            self._submit()
+
+    def flush(self):
+        """Write everything appended so far, including a partial chunk, and wait for it"""
+        self._submit()
+        done = threading.Event()
+        self._queue.put(('flush', done))
+        done.wait()
+
+    def close(self):
+        """Write the remaining samples and the index, then close the file"""
+        if self.closed:
+            return
+        self.closed = True
+        self._submit()
+        self._queue.put(('close', None))
+        self._thread.join()
+
+    def _seal_rows(self):
+        if self._rows:
+            self._parts.append(self._rows)
+            self._rows = []
+
+    def _submit(self):
+        self._seal_rows()
+        if self._parts:
+            self._queue.put(('data', self._parts))
+            self._parts = []
+            self._pending = 0
+
+    def _columns(self, parts) -> Dict[str, np.ndarray]:
+        """Concatenate row lists and column dicts into one array per log column"""
+        arrays = {name: [] for name, _ in self.columns}
+        for part in parts:
+            if isinstance(part, list):
+                part = value_columns(part)
+            count = len(part['timestamp'])
+            for name, dtype in self.columns:
+                values = part.get(name)
+                if values is None:
+                    values = np.zeros(count, dtype) if dtype.kind == 'b' else np.full(count, np.nan)
+                arrays[name].append(np.asarray(values, dtype=dtype))
+        return {name: np.concatenate(values) for name, values in arrays.items()}
+
+    def _write_chunk(self, columns: Dict[str, np.ndarray], start: int, stop: int):
+        t = columns['timestamp'][start:stop]
+        timed = t[np.isfinite(t)]
+        t_first, t_last = (float(timed.min()), float(timed.max())) if len(timed) else (np.nan, np.nan)
+        count = stop - start
+        offset = self._file.tell()
+        chunk = [_CHUNK.pack(CHUNK_MAGIC, count, t_first, t_last)]
+        for name, dtype in self.columns:
+            data = columns[name][start:stop].tobytes()
+            chunk.append(data + b'\x00' * (_padded(len(data)) - len(data)))
+        self._file.write(b''.join(chunk))
+        self.index.append((offset, count, t_first, t_last))
+
+    def _write(self, buffered, partial: bool):
+        """Write the full chunks of the buffered parts (and the rest, if partial); return the rest"""
+        if not buffered:
+            return []
+        columns = self._columns(buffered)
+        count = len(columns['timestamp'])
+        full = count - count % self.chunk_size
+        for start in range(0, full, self.chunk_size):
+            self._write_chunk(columns, start, start + self.chunk_size)
+        if partial and full < count:
+            self._write_chunk(columns, full, count)
+            full = count
+        self._file.flush()
+        if full == count:
+            return []
+        return [{name: values[full:] for name, values in columns.items()}]
+
+    def _write_index(self):
+        index_offset = self._file.tell()
+        self._file.write(np.array(self.index, dtype=INDEX_DTYPE).tobytes())
+        self._file.write(_TRAILER.pack(index_offset, len(self.index), INDEX_MAGIC))
+
+    def _run(self):
+        buffered = []
+        while True:
+            command, payload = self._queue.get()
+            try:
+                if command == 'data':
+                    buffered = self._write(buffered + payload, partial=False)
+                elif command == 'flush':
+                    buffered = self._write(buffered, partial=True)
+                elif command == 'close':
+                    self._write(buffered, partial=True)
+                    self._write_index()
+            except Exception as e:
+                # Keep draining the queue so close() and flush() never hang
+                logger.error(f"Error writing session log {self.path}: {str(e)}")
+                self.error = e
+                buffered = []
+            finally:
+                if command == 'flush':
+                    payload.set()
+                elif command == 'close':
+                    self._file.close()
+                    return
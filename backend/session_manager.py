@@ -0,0 +1,293 @@
+"""
+Session registry shared by the Flask and WebSocket threads.
+
+``SessionManager`` hands out collision-free session ids, tracks each
+session's public state (status, source, latest metrics, frame statistics)
+and owns the lifetime of its analyzer in the ``FrameExecutor``:
+
+- at most ``max_sessions`` sessions are live (status ``active``) at a time;
+- sessions idle for longer than ``ttl_seconds`` are evicted and their
+  analyzers released, whether they completed or were abandoned;
+- every method takes one re-entrant lock, so the Flask request threads, the
+  WebSocket event loop and the eviction thread can all call it;
+- with a ``SessionIndex``, a summary row is recorded when a session ends or
+  is evicted without having ended (status ``expired``).
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import types
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from frame_executor import configure_gaze_filter
+from session_index import live_session_summary
+
+logger = logging.getLogger(__name__)
+
+
+class SessionLimitError(RuntimeError):
+    """Raised when starting a session would exceed the live session limit"""
+
+
+# Objects shared across sessions rather than owned by one
+_SHARED_TYPES = (types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType)
+
+
+def _estimate_size(obj, seen: set, depth: int = 0) -> int:
+    """Approximate bytes held by an object graph of Python containers and arrays"""
+    if id(obj) in seen or depth > 8 or isinstance(obj, _SHARED_TYPES):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _estimate_size(key, seen, depth + 1) + _estimate_size(value, seen, depth + 1)
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        for item in obj:
+            size += _estimate_size(item, seen, depth + 1)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, np.ndarray):
+        size += _estimate_size(vars(obj), seen, depth + 1)
+    elif isinstance(getattr(type(obj), '__slots__', None), tuple):
+        # Slotted records (eye_tracking.records) keep their fields outside a __dict__
+        for name in type(obj).__slots__:
+            size += _estimate_size(getattr(obj, name, None), seen, depth + 1)
+    return size
+
+
+def analyzer_stats(analyzer) -> Dict:
+    """Executor job reporting an analyzer's frame count and estimated memory.
+
+    The estimate covers the analyzer's Python state (histories, buffers,
+    overlay caches) but not native MediaPipe graphs.
+    """
+    return {
+        'frames': analyzer.eye_tracker.frame_count,
+        'memory_bytes': _estimate_size(analyzer, set())
+    }
+
+
+def process_rss_bytes() -> Optional[int]:
+    """Resident memory of this process, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class SessionManager:
+    """Thread-safe registry of reading sessions and their analyzers."""
+
+    def __init__(self, frame_executor, ttl_seconds: float = 900.0, max_sessions: int = 50,
+                 analyzer_factories: Optional[Dict[str, Callable]] = None, clock=time.monotonic,
+                 session_index=None):
+        """Initialize the manager.
+
+        Args:
+            frame_executor (FrameExecutor): Executor holding the session analyzers
+            ttl_seconds (float): Idle time after which a session is evicted
+            max_sessions (int): Maximum number of live sessions
+            analyzer_factories (dict): Analyzer factory per session source; sources
+                not listed use the executor's default
+            clock (callable): Monotonic time source in seconds
+            session_index (SessionIndex): Where finished sessions are recorded, if anywhere
+        """
+        self.frame_executor = frame_executor
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.analyzer_factories = analyzer_factories or {}
+        self.clock = clock
+        self.session_index = session_index
+
+        self._lock = threading.RLock()
+        self._sessions = {}       # session id -> public state
+        self._last_active = {}    # session id -> clock time of the last activity
+        self._created = {}        # session id -> clock time of creation
+        self._stop_eviction = threading.Event()
+        self._eviction_thread = None
+
+    def __contains__(self, session_id) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def live_count(self) -> int:
+        with self._lock:
+            return sum(1 for s in self._sessions.values() if s['status'] == 'active')
+
+    def create(self, source: str = 'video', metrics: Optional[Dict] = None,
+               gaze_filter: Optional[Dict] = None) -> str:
+        """Register a session and create its analyzer.
+
+        Args:
+            source (str): Session type, selecting the analyzer factory
+            metrics (dict): Initial public metrics
+            gaze_filter (dict): Gaze filter configuration of the session's
+                EyeTracker (see gaze_filters.create_gaze_filter)
+
+        Raises:
+            SessionLimitError: If max_sessions sessions are already live
+        """
+        self.evict_expired()
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            if self.live_count() >= self.max_sessions:
+                raise SessionLimitError(f"Too many active sessions (limit {self.max_sessions})")
+            now = self.clock()
+            self._sessions[session_id] = {
+                "status": "active",
+                "source": source,
+                "metrics": dict(metrics or {}),
+                "calibration": "none",
+                "gaze_filter": gaze_filter,
+                "started_at": time.time()
+            }
+            self._created[session_id] = now
+            self._last_active[session_id] = now
+        try:
+            # Analyzer construction is slow, so it runs outside the lock
+            self.open_analyzer(session_id)
+        except Exception:
+            self._remove(session_id)
+            raise
+        return session_id
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """Copy of a session's public state, or None"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return dict(session) if session is not None else None
+
+    def update(self, session_id: str, **fields) -> bool:
+        """Set fields of a session's state and mark it active; False if it is gone"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            session.update(fields)
+            self._last_active[session_id] = self.clock()
+            return True
+
+    def touch(self, session_id: str) -> bool:
+        """Mark a session active without changing its state"""
+        return self.update(session_id)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {session_id: dict(session) for session_id, session in self._sessions.items()}
+
+    def analyzer_factory(self, session_id: str) -> Optional[Callable]:
+        with self._lock:
+            session = self._sessions.get(session_id, {})
+            return self.analyzer_factories.get(session.get('source'))
+
+    def open_analyzer(self, session_id: str):
+        """Create the session's analyzer again if it was released"""
+        created = not self.frame_executor.has_session(session_id)
+        self.frame_executor.open_session(session_id, self.analyzer_factory(session_id))
+        with self._lock:
+            gaze_filter = self._sessions.get(session_id, {}).get('gaze_filter')
+        if created and gaze_filter:
+            self.frame_executor.run_sync(session_id, configure_gaze_filter, gaze_filter)
+
+    def release_analyzer(self, session_id: str):
+        self.frame_executor.close_session(session_id)
+
+    def end(self, session_id: str) -> bool:
+        """Mark a session completed, release its analyzer and index it; False if unknown"""
+        if not self.update(session_id, status="completed", ended_at=time.time()):
+            return False
+        self.release_analyzer(session_id)
+        self._record(session_id, self.get(session_id))
+        return True
+
+    def _record(self, session_id: str, state: Dict):
+        if self.session_index is None:
+            return
+        try:
+            self.session_index.record(live_session_summary(session_id, state))
+        except Exception as e:
+            logger.error(f"Could not index session {session_id}: {str(e)}")
+
+    def _remove(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._last_active.pop(session_id, None)
+            self._created.pop(session_id, None)
+
+    def evict_expired(self, now: Optional[float] = None) -> List[str]:
+        """Remove sessions idle for longer than the TTL and release their analyzers"""
+        if now is None:
+            now = self.clock()
+        with self._lock:
+            expired = [session_id for session_id, last in self._last_active.items()
+                       if now - last > self.ttl_seconds]
+            abandoned = {session_id: dict(self._sessions[session_id], status="expired", ended_at=time.time())
+                         for session_id in expired if self._sessions[session_id]['status'] == 'active'}
+            for session_id in expired:
+                self._remove(session_id)
+        for session_id in expired:
+            self.release_analyzer(session_id)
+        for session_id, state in abandoned.items():
+            self._record(session_id, state)
+        return expired
+
+    def start_eviction(self, interval: float = 60.0):
+        """Evict expired sessions periodically on a daemon thread"""
+        if self._eviction_thread is not None:
+            return
+
+        def run():
+            while not self._stop_eviction.wait(interval):
+                self.evict_expired()
+
+        self._eviction_thread = threading.Thread(target=run, name='session-eviction', daemon=True)
+        self._eviction_thread.start()
+
+    def stop_eviction(self):
+        self._stop_eviction.set()
+        if self._eviction_thread is not None:
+            self._eviction_thread.join()
+            self._eviction_thread = None
+
+    def admin_stats(self) -> Dict:
+        """Per-session age, idle time, frame counts and analyzer memory"""
+        now = self.clock()
+        with self._lock:
+            sessions = {session_id: (dict(session), now - self._created[session_id],
+                                     now - self._last_active[session_id])
+                        for session_id, session in self._sessions.items()}
+
+        report = {}
+        for session_id, (session, age, idle) in sessions.items():
+            entry = {
+                "status": session['status'],
+                "source": session['source'],
+                "age_seconds": round(age, 1),
+                "idle_seconds": round(idle, 1),
+                "frame_stats": session.get('frame_stats', {})
+            }
+            if self.frame_executor.has_session(session_id):
+                try:
+                    entry.update(self.frame_executor.run_sync(session_id, analyzer_stats))
+                except KeyError:
+                    pass  # Released while we were collecting
+            report[session_id] = entry
+
+        return {
+            "live_sessions": sum(1 for s, _, _ in sessions.values() if s['status'] == 'active'),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "process_rss_bytes": process_rss_bytes(),
+            "sessions": report
+        }
@@ -11,6 +11,13 @@ class EyeTrackingClient {
         this.maxReconnectAttempts = 5;
         this.reconnectDelay = 1000;
         this.isReconnecting = false;
+        this.sessionHandle = null;
+        this.frameSequence = 0;
+        // Landmark sessions: indices the server asks for and frames waiting to be sent
+        this.landmarkIndices = null;
+        this.landmarkBatch = [];
+        this.landmarkBatchSize = 5;
+        this.sessionSource = 'video';
         
         // Bind event handlers
         this.handleVisibilityChange = this.handleVisibilityChange.bind(this);
@@ -60,8 +67,11 @@ class EyeTrackingClient {
             this.updateConnectionStatus('Starting session...');
 
             // Start session with backend first
+            // 'landmarks' when the page tracks the face itself and calls sendLandmarks()
             const response = await fetch('/api/start-session', {
-                method: 'POST'
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ source: this.sessionSource })
             });
             const data = await response.json();
             this.sessionId = data.session_id;
@@ -92,6 +102,8 @@ class EyeTrackingClient {
                 }
 
                 this.ws = new WebSocket('ws://localhost:8765');
+                this.ws.binaryType = 'arraybuffer';
+                this.sessionHandle = null;
                 this.isReconnecting = true;
                 
                 this.ws.onopen = () => {
@@ -102,9 +114,11 @@ class EyeTrackingClient {
                     this.updateConnectionStatus('Connected');
                     
                     // Send session initialization message
+                    // Frames and metrics travel as binary messages once the server acknowledges
                     this.ws.send(JSON.stringify({
                         type: 'init',
-                        session_id: this.sessionId
+                        session_id: this.sessionId,
+                        protocol: 'binary'
                     }));
                     
                     // Initialize metrics
@@ -122,39 +136,34 @@ class EyeTrackingClient {
                         }
                     });
                     
-                    // Start sending frames
-                    this.isTracking = true;
-                    this.startFrameCapture();
                     resolve();
                 };
 
                 this.ws.onmessage = (event) => {
+                    if (event.data instanceof ArrayBuffer) {
+                        this.handleBinaryMessage(event.data);
+                        return;
+                    }
                     const data = JSON.parse(event.data);
+                    if (data.type === 'init_ack') {
+                        this.sessionHandle = data.session_handle;
+                        if (data.source === 'landmarks') {
+                            // The page's face tracker feeds sendLandmarks() instead
+                            this.landmarkIndices = data.landmark_indices;
+                            this.isTracking = true;
+                            return;
+                        }
+                        // Start sending frames
+                        this.isTracking = true;
+                        this.startFrameCapture();
+                        return;
+                    }
                     if (data.type === 'error') {
                         console.error('Server error:', data.message);
                         this.updateConnectionStatus('Server error: ' + data.message, true);
                         return;
                     }
                     
-                    // Update video feed with processed frame if available
-                    if (data.processed_frame) {
-                        const img = new Image();
-                        img.onload = () => {
-                            const canvas = document.createElement('canvas');
-                            canvas.width = this.videoElement.videoWidth;
-                            canvas.height = this.videoElement.videoHeight;
-                            const ctx = canvas.getContext('2d');
-                            ctx.drawImage(img, 0, 0, canvas.width, canvas.height);
-                            
-                            // Create a MediaStream from the canvas
-                            const stream = canvas.captureStream();
-                            if (this.videoElement.srcObject !== stream) {
-                                this.videoElement.srcObject = stream;
-                            }
-                        };
-                        img.src = 'data:image/jpeg;base64,' + data.processed_frame;
-                    }
-                    
                     this.updateMetrics(data);
                 };
 
@@ -181,6 +190,50 @@ class EyeTrackingClient {
         });
     }
 
+    handleBinaryMessage(buffer) {
+        const message = FrameProtocol.decode(buffer);
+        if (message.type === FrameProtocol.METRICS) {
+            const data = FrameProtocol.decodeMetrics(message.payload);
+            this.updateMetrics(data);
+            this.adjustCaptureRate(data.target_fps);
+        } else if (message.type === FrameProtocol.PROCESSED_FRAME) {
+            this.showProcessedFrame(new Blob([message.payload], { type: 'image/jpeg' }));
+        }
+    }
+
+    // Queue face mesh landmarks tracked in the browser (null without a face);
+    // they are sent in batches of landmarkBatchSize frames.
+    sendLandmarks(timestamp, landmarks) {
+        if (!this.landmarkIndices || !this.ws || this.ws.readyState !== WebSocket.OPEN) return;
+        this.landmarkBatch.push({ timestamp, landmarks });
+        if (this.landmarkBatch.length < this.landmarkBatchSize) return;
+        this.ws.send(FrameProtocol.encodeLandmarks(
+            this.sessionHandle, ++this.frameSequence,
+            this.videoElement.videoHeight, this.videoElement.videoWidth,
+            this.landmarkIndices, this.landmarkBatch));
+        this.landmarkBatch = [];
+    }
+
+    showProcessedFrame(jpegBlob) {
+        const url = URL.createObjectURL(jpegBlob);
+        const img = new Image();
+        img.onload = () => {
+            URL.revokeObjectURL(url);
+            const canvas = document.createElement('canvas');
+            canvas.width = this.videoElement.videoWidth;
+            canvas.height = this.videoElement.videoHeight;
+            const ctx = canvas.getContext('2d');
+            ctx.drawImage(img, 0, 0, canvas.width, canvas.height);
+            
+            // Create a MediaStream from the canvas
+            const stream = canvas.captureStream();
+            if (this.videoElement.srcObject !== stream) {
+                this.videoElement.srcObject = stream;
+            }
+        };
+        img.src = url;
+    }
+
     async attemptReconnect() {
         if (this.reconnectAttempts >= this.maxReconnectAttempts || !this.sessionId) {
             console.error('Max reconnection attempts reached or no active session');
@@ -213,7 +266,8 @@ class EyeTrackingClient {
         canvas.height = this.videoElement.videoHeight;
         const ctx = canvas.getContext('2d');
 
-        // Send frames every 100ms (10 fps)
+        // Send frames at the capture rate suggested by the server (10 fps until it reports one)
+        this.captureFps = this.captureFps || 10;
         this.frameInterval = setInterval(() => {
             if (!this.isTracking || !this.ws || this.ws.readyState !== WebSocket.OPEN) {
                 this.stopFrameCapture();
@@ -223,20 +277,24 @@ class EyeTrackingClient {
             // Draw video frame to canvas
             ctx.drawImage(this.videoElement, 0, 0);
 
-            // Convert to base64 and send
+            // Send the raw JPEG behind a binary header
+            const timestamp = performance.now() / 1000;
+            const sequence = ++this.frameSequence;
             canvas.toBlob((blob) => {
-                const reader = new FileReader();
-                reader.onloadend = () => {
-                    const base64data = reader.result.split(',')[1];
-                    this.ws.send(JSON.stringify({
-                        type: 'frame',
-                        session_id: this.sessionId,
-                        frame: base64data
-                    }));
-                };
-                reader.readAsDataURL(blob);
+                if (!blob || !this.ws || this.ws.readyState !== WebSocket.OPEN) return;
+                this.ws.send(FrameProtocol.encodeFrame(this.sessionHandle, sequence, timestamp, blob));
             }, 'image/jpeg', 0.7);
-        }, 100);
+        }, 1000 / this.captureFps);
+    }
+
+    adjustCaptureRate(targetFps) {
+        if (!targetFps || !this.frameInterval || Math.abs(targetFps - this.captureFps) < 1) {
+            return;
+        }
+        this.captureFps = targetFps;
+        clearInterval(this.frameInterval);
+        this.frameInterval = null;
+        this.startFrameCapture();
     }
 
     stopFrameCapture() {
@@ -0,0 +1,69 @@
+// Binary frame messages, mirroring backend/frame_protocol.py.
+// Header (little-endian, 20 bytes):
+//   type u8 | version u8 | reserved u16 | session handle u32 | sequence u32 | capture timestamp f64
+const FrameProtocol = {
+    VERSION: 1,
+    FRAME: 1,
+    PROCESSED_FRAME: 2,
+    METRICS: 3,
+    LANDMARKS: 4,
+    HEADER_SIZE: 20,
+
+    encodeHeader(view, type, handle, sequence, timestamp) {
+        view.setUint8(0, type);
+        view.setUint8(1, this.VERSION);
+        view.setUint16(2, 0, true);
+        view.setUint32(4, handle, true);
+        view.setUint32(8, sequence >>> 0, true);
+        view.setFloat64(12, timestamp, true);
+    },
+
+    encodeFrame(handle, sequence, timestamp, jpegBlob) {
+        const header = new ArrayBuffer(this.HEADER_SIZE);
+        this.encodeHeader(new DataView(header), this.FRAME, handle, sequence, timestamp);
+        return new Blob([header, jpegBlob]);
+    },
+
+    // frames: [{timestamp, landmarks}] where landmarks is the face mesh result (or null
+    // without a face); only the points listed in indices (from init_ack) are sent.
+    encodeLandmarks(handle, sequence, height, width, indices, frames) {
+        const recordSize = 9 + 8 * indices.length;
+        const buffer = new ArrayBuffer(this.HEADER_SIZE + 8 + frames.length * recordSize);
+        const view = new DataView(buffer);
+        this.encodeHeader(view, this.LANDMARKS, handle, sequence, frames[0].timestamp);
+        let offset = this.HEADER_SIZE;
+        view.setUint16(offset, height, true);
+        view.setUint16(offset + 2, width, true);
+        view.setUint16(offset + 4, frames.length, true);
+        view.setUint16(offset + 6, indices.length, true);
+        offset += 8;
+        for (const frame of frames) {
+            view.setFloat64(offset, frame.timestamp, true);
+            view.setUint8(offset + 8, frame.landmarks ? 1 : 0);
+            offset += 9;
+            for (const index of indices) {
+                const point = frame.landmarks ? frame.landmarks[index] : { x: 0, y: 0 };
+                view.setFloat32(offset, point.x, true);
+                view.setFloat32(offset + 4, point.y, true);
+                offset += 8;
+            }
+        }
+        return buffer;
+    },
+
+    decode(buffer) {
+        const view = new DataView(buffer);
+        return {
+            type: view.getUint8(0),
+            version: view.getUint8(1),
+            session: view.getUint32(4, true),
+            sequence: view.getUint32(8, true),
+            timestamp: view.getFloat64(12, true),
+            payload: new Uint8Array(buffer, this.HEADER_SIZE)
+        };
+    },
+
+    decodeMetrics(payload) {
+        return JSON.parse(new TextDecoder().decode(payload));
+    }
+};
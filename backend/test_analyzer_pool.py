@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from analyzer_pool import AnalyzerPool
+from eye_tracking.reading_analyzer import ReadingAnalyzer
+from eye_tracking.test_session_replay import FRAME_SHAPE, synthetic_landmarks
+from frame_executor import FrameExecutor
+from landmark_stream import create_landmark_analyzer
+
+
+def run_session(analyzer, n_frames=150):
+    for i, landmarks in enumerate(synthetic_landmarks(analyzer.eye_tracker, n_frames)):
+        timestamp = 1000.0 + i / 30
+        analyzer.clock.set(timestamp)
+        metrics = analyzer.process_landmarks(landmarks, FRAME_SHAPE, timestamp)
+    return metrics
+
+
+def test_reset_matches_a_new_analyzer():
+    analyzer = create_landmark_analyzer()
+    analyzer.start_reading_test("The quick brown fox jumps over the lazy dog.")
+    run_session(analyzer, n_frames=200)
+
+    analyzer.reset()
+    assert analyzer.test_text is None
+    assert analyzer.eye_tracker.frame_count == 0
+    assert run_session(analyzer) == run_session(create_landmark_analyzer())
+
+
+def test_pool_reuses_warm_analyzers():
+    pool = AnalyzerPool(ReadingAnalyzer, size=1, warm_frame_shape=(120, 160))
+    pool.warm()
+    assert len(pool) == 1
+    first = pool.acquire()
+    # Warmed up: the FaceMesh graph exists but no session state is left behind
+    assert first.eye_tracker.face_mesh is not None
+    assert first.eye_tracker.frame_count == 0
+
+    second = pool.acquire()  # Pool is empty, so a new one is created
+    first.process_frame(np.zeros((120, 160, 3), dtype=np.uint8))
+    pool.release(first)
+    pool.release(second)  # Pool is full, so this one is released
+    assert second.eye_tracker.face_mesh is None
+    assert pool.acquire() is first
+    assert first.eye_tracker.frame_count == 0
+    assert pool.stats()['created'] == 2
+    pool.close()
+
+
+def test_executor_returns_analyzers_to_the_pool():
+    executor = FrameExecutor(ReadingAnalyzer, max_workers=1, pool_size=1)
+    try:
+        executor.warm()
+        pooled = executor.analyzer_pool.acquire()
+        executor.analyzer_pool.release(pooled)
+
+        executor.open_session('a')
+        assert executor.run_sync('a', lambda analyzer: analyzer) is pooled
+        executor.close_session('a')
+        executor.open_session('b')
+        assert executor.run_sync('b', lambda analyzer: analyzer) is pooled
+
+        # Other session types bypass the pool
+        executor.open_session('c', create_landmark_analyzer)
+        assert executor.run_sync('c', lambda analyzer: analyzer) is not pooled
+        assert executor.analyzer_pool.stats() == {'idle': 0, 'size': 1, 'created': 1, 'reused': 3}
+    finally:
+        executor.shutdown()
@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from eye_tracking_service import EyeTrackingService
+
+
+def reading_samples(n, seed=0):
+    """Gaze in pixels moving along lines at 60 Hz, with regressions and repeated timestamps"""
+    rng = np.random.default_rng(seed)
+    timestamps = 1000.0 + np.arange(n) / 60
+    timestamps[rng.choice(n, n // 20, replace=False)] -= 1 / 60  # Duplicate a previous timestamp
+    x = np.cumsum(rng.choice([0.0, 0.0, 0.0, 25.0, -40.0], n))
+    y = 100 + 30 * (np.arange(n) // 120)
+    left = np.column_stack((x, y)) + rng.normal(0, 0.05, (n, 2))
+    right = left + rng.normal(0, 0.05, (n, 2))
+    blinks = [{'is_blinking': bool(i % 50 == 0)} for i in range(n)]
+    return timestamps, left, right, blinks
+
+
+def assert_same_results(expected, actual):
+    assert len(expected) == len(actual)
+    for e, a in zip(expected, actual):
+        assert e.keys() == a.keys()
+        for key in e:
+            if isinstance(e[key], dict):
+                assert_same_results([e[key]], [a[key]])
+            else:
+                assert np.allclose(e[key], a[key], rtol=1e-9, atol=1e-9), (key, e[key], a[key])
+
+
+@pytest.mark.parametrize('calibrated', [False, True])
+def test_batch_matches_per_sample_processing(calibrated):
+    timestamps, left, right, blinks = reading_samples(600)
+    looped, batched = EyeTrackingService(), EyeTrackingService()
+    if calibrated:
+        points = [(0, 0), (1, 0), (0, 1), (1, 1), (0.5, 0.5)]
+        gaze = [(10, 12), (50, 11), (9, 40), (52, 41), (30, 25)]
+        assert looped.calibrate(points, gaze) and batched.calibrate(points, gaze)
+
+    expected = [looped.process_frame_data({'timestamp': t, 'left_eye': l, 'right_eye': r, 'blink_data': b})
+                for t, l, r, b in zip(timestamps.tolist(), left.tolist(), right.tolist(), blinks)]
+    # Batches continue from each other's state like consecutive samples
+    actual = []
+    for start in range(0, 600, 12):
+        end = start + 12
+        actual += batched.process_batch(timestamps[start:end], left[start:end], right[start:end],
+                                        blinks[start:end])
+
+    assert all(expected)
+    assert_same_results(expected, actual)
+    assert sum(r['metrics']['fixation']['is_fixation'] for r in actual) > 100
+    assert actual[-1]['metrics']['reading_metrics']['regression_count'] > 0
+    # Both paths leave the same state behind
+    assert_same_results([looped.process_frame_data({'timestamp': 1100.0, 'left_eye': [5, 5], 'right_eye': [5, 5]})],
+                        [batched.process_frame_data({'timestamp': 1100.0, 'left_eye': [5, 5], 'right_eye': [5, 5]})])
+
+
+def test_fixation_duration_uses_sample_times():
+    service = EyeTrackingService()
+    results = [service.process_frame_data({'timestamp': 10.0 + i * 0.05, 'left_eye': [x, 0], 'right_eye': [x, 0]})
+               for i, x in enumerate([0, 0, 0, 100, 100, 100])]
+    # The fixation restarts after the saccade instead of failing on the cleared start time
+    assert [r['metrics']['fixation']['duration'] for r in results] == pytest.approx([0, 0.05, 0.1, 0, 0, 0.05])
+
+
+def test_process_samples_rejects_malformed_batches():
+    service = EyeTrackingService()
+    assert service.process_samples([{'timestamp': 1.0, 'left_eye': [1, 2, 3], 'right_eye': [1, 2]}]) == []
+    with pytest.raises(ValueError):
+        service.process_batch([1.0, 2.0], [[0, 0]], [[0, 0]])
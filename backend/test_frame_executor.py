@@ -0,0 +1,100 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import base64
+import time
+
+import cv2
+import numpy as np
+
+from frame_executor import FrameExecutor, process_frame_data
+
+
+class SleepyAnalyzer:
+    """Stand-in analyzer whose work releases the GIL, like OpenCV and FaceMesh"""
+
+    def __init__(self):
+        self.frames = 0
+
+    def process_frame(self, frame):
+        time.sleep(0.02)
+        self.frames += 1
+        return frame, {
+            'reading_speed': self.frames,
+            'fixation_count': self.frames,
+            'regression_count': 0,
+            'dyslexia_indicators': {'probability': 0.5, 'indicators': {}, 'severity': 'Mild'}
+        }
+
+    def release(self):
+        pass
+
+
+def frame_count(analyzer):
+    return analyzer.frames
+
+
+def encoded_frame():
+    _, buffer = cv2.imencode('.jpg', np.zeros((48, 64, 3), dtype=np.uint8))
+    return base64.b64encode(buffer).decode('utf-8')
+
+
+def run_sessions(executor, n_sessions, frames_per_session):
+    """Stream frames from several sessions concurrently; returns elapsed seconds"""
+    frame = encoded_frame()
+
+    async def session(session_id):
+        responses = []
+        for _ in range(frames_per_session):
+            responses.append(await executor.process_frame(session_id, frame))
+        return responses
+
+    async def main():
+        return await asyncio.gather(*(session(str(i)) for i in range(n_sessions)))
+
+    for i in range(n_sessions):
+        executor.open_session(str(i))
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+
+    # Each session's frames were processed in order on its own analyzer
+    for responses in results:
+        assert [r['fixations'] for r in responses] == list(range(1, frames_per_session + 1))
+    return elapsed
+
+
+def test_process_frame_data_round_trip():
+    response = process_frame_data(SleepyAnalyzer(), encoded_frame())
+    assert response['dyslexia_probability'] == 50
+    image = cv2.imdecode(np.frombuffer(base64.b64decode(response['processed_frame']), np.uint8),
+                         cv2.IMREAD_COLOR)
+    assert image.shape == (48, 64, 3)
+
+
+def test_throughput_scales_with_workers():
+    single = FrameExecutor(SleepyAnalyzer, max_workers=1)
+    pooled = FrameExecutor(SleepyAnalyzer, max_workers=4)
+    try:
+        single_time = run_sessions(single, n_sessions=4, frames_per_session=10)
+        pooled_time = run_sessions(pooled, n_sessions=4, frames_per_session=10)
+    finally:
+        single.shutdown()
+        pooled.shutdown()
+
+    # 4 sessions x 10 frames x 20 ms: ~0.8 s on one worker, ~0.2 s on four
+    assert single_time / pooled_time > 2.5
+
+
+def test_process_mode_keeps_session_state_in_one_process():
+    executor = FrameExecutor(SleepyAnalyzer, process_workers=2)
+    try:
+        executor.start()
+        workers = {pid for pool in executor._process_pools for pid in pool._processes}
+        assert len(workers) == 2 and os.getpid() not in workers
+        run_sessions(executor, n_sessions=3, frames_per_session=5)
+        assert executor.run_sync('0', frame_count) == 5
+    finally:
+        executor.shutdown()
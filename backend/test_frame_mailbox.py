@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+
+from frame_mailbox import FrameMailbox
+
+
+def test_latest_frame_wins():
+    async def main():
+        mailbox = FrameMailbox()
+        for frame in range(5):
+            mailbox.put(frame)
+        assert await mailbox.get() == 4
+        assert mailbox.dropped == 4
+
+        mailbox.put(5)
+        assert await mailbox.get() == 5
+        mailbox.close()
+        assert await mailbox.get() is None
+
+    asyncio.run(main())
+
+
+def test_slow_consumer_keeps_latency_bounded():
+    async def main():
+        mailbox = FrameMailbox()
+        processed = []
+
+        async def consumer():
+            while True:
+                frame = await mailbox.get()
+                if frame is None:
+                    return
+                started = mailbox.clock()
+                await asyncio.sleep(0.02)  # Processing takes 20 ms
+                mailbox.record_processing(started)
+                processed.append(frame)
+
+        task = asyncio.create_task(consumer())
+        for frame in range(50):  # Producer at ~200 fps
+            mailbox.put(frame)
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.05)
+        mailbox.close()
+        await task
+        return mailbox, processed
+
+    mailbox, processed = asyncio.run(main())
+    assert processed == sorted(processed)
+    assert processed[-1] == 49
+    assert mailbox.dropped == 50 - len(processed)
+    assert len(processed) < 25
+    # About 50 fps of processing capacity; suggest capturing a bit below it
+    assert 20 < mailbox.processing_fps < 55
+    assert mailbox.target_capture_fps < mailbox.processing_fps
+    assert mailbox.stats()['dropped_frames'] == mailbox.dropped
+
+
+def test_target_rate_is_clamped():
+    mailbox = FrameMailbox(max_capture_fps=30)
+    assert mailbox.target_capture_fps == 30
+    mailbox.record_processing(0.0, 0.001)
+    assert mailbox.target_capture_fps == 30
+    mailbox = FrameMailbox(min_capture_fps=2)
+    mailbox.record_processing(0.0, 10.0)
+    assert mailbox.target_capture_fps == 2
@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import base64
+
+import cv2
+import numpy as np
+import pytest
+
+import frame_protocol
+from frame_executor import process_frame_jpeg
+from test_frame_executor import SleepyAnalyzer, encoded_frame
+
+
+def test_header_round_trip():
+    jpeg = base64.b64decode(encoded_frame())
+    message = frame_protocol.encode_message(frame_protocol.FRAME, 7, 42, 1234.5, jpeg)
+    assert len(message) == frame_protocol.HEADER_SIZE + len(jpeg) == 20 + len(jpeg)
+
+    header, payload = frame_protocol.decode_message(message)
+    assert header == (frame_protocol.FRAME, 7, 42, 1234.5)
+    assert bytes(payload) == jpeg
+
+
+def test_metrics_are_compact():
+    message = frame_protocol.encode_metrics(3, 1, 0.0, {'reading_speed': 120, 'output_fps': 9.87654321})
+    header, payload = frame_protocol.decode_message(message)
+    assert header.type == frame_protocol.METRICS
+    assert bytes(payload) == b'{"reading_speed":120,"output_fps":9.8765}'
+    assert frame_protocol.decode_metrics(payload) == {'reading_speed': 120, 'output_fps': 9.8765}
+
+
+def test_rejects_malformed_messages():
+    with pytest.raises(frame_protocol.ProtocolError):
+        frame_protocol.decode_message(b'\x01\x01')
+    bad_version = bytearray(frame_protocol.encode_message(frame_protocol.FRAME, 1, 1, 0.0, b''))
+    bad_version[1] = 99
+    with pytest.raises(frame_protocol.ProtocolError):
+        frame_protocol.decode_message(bytes(bad_version))
+
+
+def test_process_frame_jpeg_returns_raw_jpeg():
+    processed_jpeg, metrics = process_frame_jpeg(SleepyAnalyzer(), base64.b64decode(encoded_frame()))
+    assert 'processed_frame' not in metrics
+    assert metrics['dyslexia_probability'] == 50
+    image = cv2.imdecode(np.frombuffer(processed_jpeg, np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape == (48, 64, 3)
@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+import frame_protocol
+from frame_executor import FrameExecutor, client_metrics, start_reading_test as reading_test_job
+from landmark_stream import create_landmark_analyzer, landmark_indices, process_landmark_batch
+from eye_tracking.test_session_replay import FRAME_SHAPE, synthetic_landmarks
+
+
+def session_batches(indices, frames, batch_size):
+    """Encode synthetic frames as LANDMARKS messages of batch_size frames"""
+    timestamps = [1000.0 + i / 30 for i in range(len(frames))]
+    messages = []
+    for start in range(0, len(frames), batch_size):
+        chunk = frames[start:start + batch_size]
+        points = np.array([f[indices] if f is not None else np.zeros((len(indices), 2)) for f in chunk])
+        messages.append(frame_protocol.encode_landmarks(
+            1, start, FRAME_SHAPE, timestamps[start:start + batch_size],
+            [f is not None for f in chunk], points))
+    return timestamps, messages
+
+
+def test_batches_match_frame_by_frame_analysis():
+    reference = create_landmark_analyzer()
+    indices = landmark_indices(reference)
+    frames = synthetic_landmarks(reference.eye_tracker, 200)
+    timestamps, messages = session_batches(indices, frames, batch_size=8)
+
+    for timestamp, landmarks in zip(timestamps, frames):
+        reference.clock.set(timestamp)
+        expected = reference.process_landmarks(landmarks, FRAME_SHAPE, timestamp)
+
+    executor = FrameExecutor(create_landmark_analyzer, max_workers=1)
+    try:
+        executor.open_session('1')
+        for message in messages:
+            header, payload = frame_protocol.decode_message(message)
+            assert header.type == frame_protocol.LANDMARKS
+            response = executor.run_sync('1', process_landmark_batch,
+                                         frame_protocol.decode_landmarks(payload))
+    finally:
+        executor.shutdown()
+
+    assert 'landmark_batch' in response.pop('timings')
+    assert response == client_metrics(expected)
+    assert response['fixations'] > 0
+    # Landmark sessions never start FaceMesh
+    assert reference.eye_tracker.face_mesh is None
+
+
+def test_rejects_wrong_landmark_count():
+    analyzer = create_landmark_analyzer()
+    message = frame_protocol.encode_landmarks(1, 0, FRAME_SHAPE, [1.0], [True], np.zeros((1, 3, 2)))
+    batch = frame_protocol.decode_landmarks(frame_protocol.decode_message(message)[1])
+    assert batch.points.shape == (1, 3, 2)
+    with pytest.raises(ValueError):
+        process_landmark_batch(analyzer, batch)
+
+    with pytest.raises(frame_protocol.ProtocolError):
+        frame_protocol.decode_landmarks(bytes(message[frame_protocol.HEADER_SIZE:-1]))
+
+
+def test_reading_test_is_timed_from_the_next_batch():
+    analyzer = create_landmark_analyzer()
+    indices = landmark_indices(analyzer)
+    frames = synthetic_landmarks(analyzer.eye_tracker, 120)
+    timestamps, messages = session_batches(indices, frames, batch_size=30)
+    batches = [frame_protocol.decode_landmarks(frame_protocol.decode_message(m)[1]) for m in messages]
+
+    # The client starts the test before sending any landmarks
+    reading_test_job(analyzer, "The quick brown fox jumps over the lazy dog.")
+    process_landmark_batch(analyzer, batches[0])
+    assert analyzer.test_start_time == timestamps[0]
+
+    # A test started mid-session is timed from the batch after it
+    process_landmark_batch(analyzer, batches[1])
+    reading_test_job(analyzer, "The quick brown fox jumps over the lazy dog.")
+    for batch in batches[2:]:
+        response = process_landmark_batch(analyzer, batch)
+    assert analyzer.test_start_time == timestamps[60]
+    elapsed = timestamps[-1] - timestamps[60]
+    assert response['reading_speed'] == int(analyzer.words_read / elapsed * 60)
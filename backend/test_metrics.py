@@ -0,0 +1,74 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+
+import cv2
+import numpy as np
+
+from frame_executor import process_frame_jpeg
+from metrics import Histogram, PipelineMetrics
+
+
+class StubAnalyzer:
+    def __init__(self):
+        self.stage_times = {}
+
+    def process_frame(self, frame):
+        self.stage_times = {'facemesh': 0.001, 'draw': 0.0002}
+        return frame, {'dyslexia_indicators': {'probability': 0.0, 'indicators': [], 'severity': 'low'}}
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.001, 0.01))
+    for value in (0.0005, 0.001, 0.005, 0.5):
+        histogram.observe(value)
+    assert histogram.cumulative() == [('0.001', 2), ('0.01', 3), ('+Inf', 4)]
+    assert histogram.count == 4
+    assert histogram.quantile(0.5) == 0.001
+    assert histogram.quantile(0.99) == float('inf')
+
+
+def test_render_prometheus_text():
+    metrics = PipelineMetrics(bounds=(0.01,))
+    metrics.observe_many({'send': 0.002, 'imdecode': 0.02}, session_id='s1')
+    metrics.observe('receive', 0.001)
+    text = metrics.render([('eyetrack_active_sessions', 'gauge', 'Live sessions', {}, 1),
+                           ('eyetrack_queue_depth', 'gauge', 'Depth', {'session': 's1'}, 0)])
+    lines = text.splitlines()
+
+    assert '# TYPE eyetrack_stage_seconds histogram' in lines
+    assert 'eyetrack_stage_seconds_bucket{stage="imdecode",le="0.01"} 0' in lines
+    assert 'eyetrack_stage_seconds_bucket{stage="imdecode",le="+Inf"} 1' in lines
+    assert 'eyetrack_session_stage_seconds_count{session="s1",stage="send"} 1' in lines
+    assert 'eyetrack_active_sessions 1' in lines
+    assert 'eyetrack_queue_depth{session="s1"} 0' in lines
+    # Stages are listed in pipeline order
+    stages = [line for line in lines if line.startswith('eyetrack_stage_seconds_count')]
+    assert [s.split('"')[1] for s in stages] == ['receive', 'imdecode', 'send']
+
+    metrics.retain_sessions([])
+    assert 'session="s1",stage' not in metrics.render()
+
+
+def test_frame_jobs_report_stage_timings():
+    ok, jpeg = cv2.imencode('.jpg', np.zeros((48, 64, 3), dtype=np.uint8))
+    _, response = process_frame_jpeg(StubAnalyzer(), jpeg.tobytes())
+    assert {'imdecode', 'facemesh', 'draw', 'imencode', 'worker_total'} <= set(response['timings'])
+
+
+def test_recording_overhead_is_small():
+    metrics = PipelineMetrics()
+    timings = {stage: 0.001 for stage in ('receive', 'queue_wait', 'imdecode', 'facemesh', 'eye_metrics',
+                                          'update_reading_metrics', 'analyze_reading_patterns', 'draw',
+                                          'imencode', 'worker_total')}
+    n_frames = 2000
+    start = time.perf_counter()
+    for _ in range(n_frames):
+        metrics.observe_many(timings, 'session')
+        metrics.observe('send', 0.001, 'session')
+    per_frame = (time.perf_counter() - start) / n_frames
+    # Under 1% of a 5 ms frame, the fastest steady-state frames seen
+    assert per_frame < 0.00005
@@ -0,0 +1,112 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+
+import numpy as np
+
+from eye_tracking.synthetic_reading import generate_reading
+from eye_tracking_service import EyeTrackingService
+from session_analysis import analyze_columns, idt_fixations, saccades, session_columns
+
+
+def reading_columns(duration, seed=0):
+    """Columns of a simulated reading session with gaze in pixels"""
+    reading = generate_reading(duration, seed=seed)
+    n = len(reading.timestamps)
+    columns = {
+        'timestamp': reading.timestamps,
+        'gaze_x': 320 + 300 * reading.gaze[:, 0],
+        'gaze_y': 240 + 200 * reading.gaze[:, 1],
+        'is_blinking': reading.is_blink,
+        'gaze_stability': np.full(n, np.nan),
+        'blink_rate': np.full(n, np.nan),
+        'probability': np.linspace(0.6, 0.4, n)
+    }
+    return reading, columns
+
+
+def test_columns_from_mixed_entries():
+    data = {'data': [
+        {'timestamp': '2025-03-31 11:23:28.500000',
+         'metrics': {'gaze_stability': 0.95, 'blink_rate': 20, 'dyslexia_indicators': {'long_fixations': True}}},
+        {'timestamp': '2025-03-31 11:23:29', 'gaze_point': [10.0, 20.0],
+         'metrics': {'blink': {'is_blinking': True}}, 'analysis': {'probability': 0.3}},
+        {'timestamp': '2025-03-31 11:23:30', 'metrics': {'dyslexia_indicators': {'probability': 0.5}}}
+    ]}
+    columns = session_columns(data)
+    assert np.allclose(np.diff(columns['timestamp']), [0.5, 1.0])
+    assert np.array_equal(columns['gaze_x'], [np.nan, 10.0, np.nan], equal_nan=True)
+    assert columns['is_blinking'].tolist() == [False, True, False]
+    assert np.array_equal(columns['gaze_stability'], [0.95, np.nan, np.nan], equal_nan=True)
+    assert np.array_equal(columns['probability'], [np.nan, 0.3, 0.5], equal_nan=True)
+
+    report = analyze_columns(columns)
+    # Averages only count the samples that have the field
+    assert report['average_metrics'] == {'gaze_stability': 0.95, 'blink_rate': 20.0, 'dyslexia_probability': 0.4}
+    assert report['blinks']['count'] == 1
+    assert report['coverage']['gaze_stability'] == 1 / 3
+
+
+def test_report_recovers_simulated_reading():
+    reading, columns = reading_columns(600)
+    report = analyze_columns(columns, velocity_threshold=300)
+
+    assert report['duration_seconds'] == reading.timestamps[-1] - reading.timestamps[0]
+    assert report['regressions']['count'] == reading.regressions
+    # Sweeps from the last line back to the top of the page are not return sweeps
+    assert abs(report['regressions']['return_sweeps'] - reading.return_sweeps * 7 / 8) < 0.05 * reading.return_sweeps
+    for method in ('ivt', 'idt'):
+        assert 0.7 * reading.fixations < report['fixations'][method]['count'] <= reading.fixations
+        assert 0.15 < report['fixations'][method]['duration']['median'] < 0.3
+    # Overlapping blinks merge into one
+    assert 0.8 * reading.blinks < report['blinks']['count'] <= reading.blinks
+    assert report['trend']['improving'] and report['trend']['slope_per_minute'] < 0
+
+
+def test_saccade_peak_ignores_samples_after_it():
+    t = np.arange(10) / 30
+    x = np.array([0, 0, 5, 15, 20, 20, np.nan, 20, 30, 30], dtype=float)
+    y = np.zeros(10)
+    velocity = np.array([0, 0, 150, 300, 150, 0, np.nan, np.nan, 300, 0])
+    moves = saccades(t, x, y, velocity, velocity_threshold=100)
+    assert moves['peak_velocity'].tolist() == [300.0, 300.0]
+    assert moves['amplitude'].tolist() == [20.0, 10.0]
+
+
+def test_idt_splits_slow_drift():
+    # 1 px per sample: every window of the minimum duration qualifies
+    t = np.arange(300) / 30
+    x = np.arange(300, dtype=float)
+    y = np.zeros(300)
+    starts, ends = idt_fixations(t, x, y, dispersion_threshold=25, min_duration=0.1)
+    assert starts.tolist() == list(range(0, 300, 26))
+    assert ends.tolist() == list(range(26, 300, 26)) + [300]
+
+
+def test_multi_hour_session_is_fast():
+    _, columns = reading_columns(2 * 3600)
+    start = time.perf_counter()
+    analyze_columns(columns, velocity_threshold=300)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_analyze_session_caches_columns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = EyeTrackingService()
+    _, columns = reading_columns(60)
+    entries = [{'timestamp': t, 'gaze_point': [x, y], 'metrics': {'blink': {'is_blinking': b}},
+                'analysis': {'probability': p}}
+               for t, x, y, b, p in zip(*(columns[name].tolist() for name in
+                                          ('timestamp', 'gaze_x', 'gaze_y', 'is_blinking', 'probability')))]
+    service.save_session_data('s1', {'data': entries})
+
+    report = service.analyze_session('s1')
+    assert report['session_id'] == 's1' and report['duration'] == len(entries)
+    assert os.path.exists(os.path.join('data', 'session_s1.columns.npz'))
+    assert json.dumps(service.analyze_session('s1')) == json.dumps(report)
+    assert service.analyze_session('missing') is None
+    service.release()
@@ -0,0 +1,125 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+import numpy as np
+import pytest
+
+from eye_tracking.clock import ReplayClock
+from frame_executor import FrameExecutor
+from session_index import SessionIndex, backfill, parse_time
+from session_log import SessionLogWriter
+from session_manager import SessionManager
+from test_frame_executor import SleepyAnalyzer
+
+
+def filled_index(path, n=30):
+    index = SessionIndex(path)
+    index.record_many([{
+        'session_id': f's{i:02d}',
+        'source': 'video' if i % 2 else 'landmarks',
+        'status': 'completed',
+        'start_time': 1000.0 + 100 * i,
+        'end_time': 1050.0 + 100 * i,
+        'duration': 50.0,
+        'frame_count': 10 * i,
+        'calibration': 'none',
+        'dyslexia_probability': i / n if i % 5 else None,
+        'metrics': {'reading_speed': i}
+    } for i in range(n)])
+    return index
+
+
+def test_query_filters_sorts_and_pages(tmp_path):
+    index = filled_index(str(tmp_path / 'sessions.db'))
+    assert len(index) == 30
+    assert index.get('s07')['metrics'] == {'reading_speed': 7}
+
+    page = index.query(min_probability=0.6, start_after=1500.0, limit=5)
+    # s18..s29 have probability >= 0.6 except s20 and s25, which have none
+    assert page['total'] == 10
+    assert [s['session_id'] for s in page['sessions']] == ['s29', 's28', 's27', 's26', 's24']
+    second = index.query(min_probability=0.6, start_after=1500.0, limit=5, offset=5)
+    assert [s['session_id'] for s in second['sessions']] == ['s23', 's22', 's21', 's19', 's18']
+
+    by_probability = index.query(sort='dyslexia_probability', descending=False, source='video', limit=100)
+    probabilities = [s['dyslexia_probability'] for s in by_probability['sessions']]
+    assert probabilities[-3:] == [None] * 3  # s05, s15 and s25 come last
+    assert probabilities[:-3] == sorted(probabilities[:-3])
+
+    with pytest.raises(ValueError):
+        index.query(sort='metrics; DROP TABLE sessions')
+    with pytest.raises(ValueError):
+        index.query(probability=0.5)
+    assert index._db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    index.close()
+
+
+def test_manager_indexes_ended_and_abandoned_sessions():
+    clock = ReplayClock(0.0)
+    index = SessionIndex(':memory:')
+    manager = SessionManager(FrameExecutor(SleepyAnalyzer, max_workers=1), ttl_seconds=60, clock=clock,
+                             session_index=index)
+    ended = manager.create(metrics={'dyslexia_probability': 0})
+    abandoned = manager.create()
+    manager.update(ended, metrics={'reading_speed': 180, 'fixations': 40, 'regressions': 6,
+                                   'dyslexia_probability': 72},
+                   frame_stats={'processed_frames': 300}, calibration='started')
+    assert manager.end(ended)
+    row = index.get(ended)
+    assert row['status'] == 'completed'
+    assert row['frame_count'] == 300
+    assert row['dyslexia_probability'] == pytest.approx(0.72)
+    assert row['calibration'] == 'started'
+    assert row['end_time'] >= row['start_time']
+    assert index.get(abandoned) is None
+
+    clock.set(100.0)
+    manager.evict_expired()
+    assert index.get(abandoned)['status'] == 'expired'
+    assert index.get(ended)['status'] == 'completed'
+
+
+def test_backfill_existing_session_files(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    (data_dir / 'session_summary.json').write_text(json.dumps(
+        {'duration': 42.0, 'frame_count': 1260, 'calibrated': True}))
+    (data_dir / 'session_test.json').write_text(json.dumps(
+        {'metrics': {'reading_speed': 120, 'regression_count': 9}, 'analysis': {'probability': 0.7}}))
+    (data_dir / 'session_samples.json').write_text(json.dumps({'data': [
+        {'timestamp': 2000.0 + i, 'gaze_point': [i, 0], 'analysis': {'probability': 0.1 * i}}
+        for i in range(5)]}))
+    writer = SessionLogWriter(str(data_dir / 'session_logged.eylog'))
+    writer.append_columns(timestamp=3000.0 + np.arange(90) / 30, probability=np.full(90, 0.65))
+    writer.close()
+    (data_dir / 'session_broken.json').write_text('{')
+    (data_dir / 'notes.txt').write_text('not a session')
+
+    index = SessionIndex(str(tmp_path / 'sessions.db'))
+    index.record({'session_id': 'summary', 'source': 'video', 'status': 'completed'})
+    assert backfill(index, str(data_dir)) == 3
+    assert index.get('summary')['source'] == 'video'  # Rows recorded live are kept
+    assert index.get('test')['dyslexia_probability'] == 0.7
+    assert index.get('test')['regressions'] == 9
+    samples = index.get('samples')
+    assert (samples['start_time'], samples['end_time'], samples['frame_count']) == (2000.0, 2004.0, 5)
+    assert samples['dyslexia_probability'] == pytest.approx(0.4)
+    logged = index.get('logged')
+    assert logged['frame_count'] == 90 and logged['dyslexia_probability'] == 0.65
+    assert index.get('broken') is None
+
+    assert backfill(index, str(data_dir), replace=True) == 4
+    summary = index.get('summary')
+    assert summary['calibration'] == 'calibrated' and summary['duration'] == 42.0
+    # 'test' has no start time, so it sorts last
+    assert [s['session_id'] for s in index.query(min_probability=0.6)['sessions']] == ['logged', 'test']
+
+
+def test_parse_time():
+    assert parse_time(None) is None
+    assert parse_time('1700000000') == 1700000000.0
+    assert parse_time('2024-05-01T00:00:00+00:00') == 1714521600.0
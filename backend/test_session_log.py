@@ -0,0 +1,128 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from eye_tracking_service import EyeTrackingService
+from session_log import SessionLogReader, SessionLogWriter, read_session_log
+
+
+def sample_columns(n, start=1000.0):
+    rng = np.random.default_rng(0)
+    return {
+        'timestamp': start + np.arange(n) / 30,
+        'gaze_x': rng.uniform(0, 640, n),
+        'gaze_y': rng.uniform(0, 480, n),
+        'is_blinking': np.arange(n) % 40 == 0,
+        'probability': np.linspace(0.2, 0.8, n)
+    }
+
+
+def test_chunks_round_trip_with_index(tmp_path):
+    path = str(tmp_path / 'session.eylog')
+    columns = sample_columns(1000)
+    writer = SessionLogWriter(path, chunk_size=128)
+    writer.append_columns(**{name: values[:700] for name, values in columns.items()})
+    for i in range(700, 1000):
+        writer.append({'timestamp': columns['timestamp'][i],
+                       'gaze_point': [columns['gaze_x'][i], columns['gaze_y'][i]],
+                       'metrics': {'blink': {'is_blinking': bool(columns['is_blinking'][i])}},
+                       'analysis': {'probability': columns['probability'][i]}})
+    writer.close()
+
+    with SessionLogReader(path) as reader:
+        assert reader.complete
+        assert len(reader) == 1000
+        assert reader.index['count'].tolist() == [128] * 7 + [104]
+        assert reader.time_range() == (columns['timestamp'][0], columns['timestamp'][-1])
+        stored = reader.read()
+    for name, values in columns.items():
+        assert np.array_equal(stored[name], values), name
+    assert np.isnan(stored['gaze_stability']).all()
+
+
+def test_time_range_reads_only_overlapping_chunks(tmp_path):
+    path = str(tmp_path / 'session.eylog')
+    columns = sample_columns(3000)
+    writer = SessionLogWriter(path, chunk_size=100)
+    writer.append_columns(**columns)
+    writer.close()
+
+    start, end = 1010.0, 1020.0
+    with SessionLogReader(path) as reader:
+        assert len(reader.chunks(start, end)) == 4  # Samples 300 to 600
+        part = reader.read(start, end)
+    t = columns['timestamp']
+    keep = (t >= start) & (t <= end)
+    assert np.array_equal(part['timestamp'], t[keep])
+    assert np.array_equal(part['gaze_x'], columns['gaze_x'][keep])
+    assert len(read_session_log(path, 5000.0)['timestamp']) == 0
+
+
+def test_log_without_index_is_recovered_and_continued(tmp_path):
+    path = str(tmp_path / 'session.eylog')
+    columns = sample_columns(500)
+    writer = SessionLogWriter(path, chunk_size=100)
+    writer.append_columns(**{name: values[:250] for name, values in columns.items()})
+    writer.flush()
+    writer.close()
+    # A writer that died while writing: no index and half a chunk at the end
+    with open(path, 'rb') as f:
+        data = f.read()
+    with SessionLogReader(path) as reader:
+        end = int(reader.index['offset'][-1])
+    with open(path, 'wb') as f:
+        f.write(data[:end + 100])
+
+    with SessionLogReader(path) as reader:
+        assert not reader.complete
+        assert len(reader) == 200
+
+    writer = SessionLogWriter(path)
+    assert writer.chunk_size == 100
+    writer.append_columns(**{name: values[200:] for name, values in columns.items()})
+    writer.close()
+    stored = read_session_log(path)
+    assert np.array_equal(stored['timestamp'], columns['timestamp'])
+
+
+def test_not_a_session_log(tmp_path):
+    path = tmp_path / 'session.json'
+    path.write_text('{}')
+    with pytest.raises(ValueError):
+        SessionLogReader(str(path))
+
+
+def test_service_streams_session_to_log(tmp_path):
+    service = EyeTrackingService(face_mesh=object())
+    service.data_dir = str(tmp_path)
+    service.start_session_log('s1')
+    for i in range(10):
+        service.process_frame_data({'timestamp': 1000 + i / 30, 'left_eye': [100 + i, 200],
+                                    'right_eye': [102 + i, 200]})
+    n = 900
+    t = 1001 + np.arange(n) / 30
+    x = 100 + 40 * ((np.arange(n) // 6) % 15)  # Word steps, back to the start every 90 samples
+    eyes = np.column_stack((x, np.full(n, 200.0)))
+    results = service.process_batch(t, eyes, eyes, [{'is_blinking': i % 100 == 0} for i in range(n)])
+
+    # Readable while the session is still running
+    live = service.get_session_columns('s1')
+    assert len(live['timestamp']) == n + 10
+    service.save_session_data('s1', {'frame_count': n + 10})
+    assert service.session_log is None
+
+    data = service.get_session_data('s1', start_time=1001.0)
+    assert data['frame_count'] == n + 10
+    assert np.allclose(data['samples']['gaze_x'], [r['gaze_point'][0] for r in results])
+    assert data['samples']['is_blinking'].sum() == 9
+    assert np.allclose(data['samples']['probability'], [r['analysis']['probability'] for r in results])
+
+    report = service.analyze_session('s1')
+    assert report['samples'] == n + 10
+    assert report['regressions']['count'] > 0
+    assert service.analyze_session('s1', 1001.0, 1011.0)['samples'] == 301
+    assert service.analyze_session('missing') is None
@@ -0,0 +1,127 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+
+import pytest
+
+from eye_tracking.clock import ReplayClock
+from eye_tracking.test_session_replay import synthetic_landmarks
+from frame_executor import FrameExecutor
+from landmark_stream import create_landmark_analyzer, landmark_indices, process_landmark_batch
+from session_manager import SessionLimitError, SessionManager
+from test_frame_executor import SleepyAnalyzer
+from test_landmark_stream import session_batches
+import frame_protocol
+
+
+def make_manager(**kwargs):
+    executor = FrameExecutor(SleepyAnalyzer, max_workers=2)
+    return SessionManager(executor, **kwargs), executor
+
+
+def test_ids_are_unique_and_idle_sessions_expire():
+    clock = ReplayClock(0.0)
+    manager, executor = make_manager(ttl_seconds=60, clock=clock)
+    try:
+        first = manager.create()
+        second = manager.create()
+        assert first != second
+        assert manager.end(first)
+        assert manager.get(first)['status'] == 'completed'
+        assert not executor.has_session(first)
+
+        # Activity keeps a session alive; idle ones are evicted with their analyzers
+        clock.set(50.0)
+        manager.touch(second)
+        clock.set(100.0)
+        assert manager.evict_expired() == [first]
+        clock.set(111.0)
+        assert manager.evict_expired() == [second]
+        assert not executor.has_session(second)
+        assert len(manager) == 0
+
+        third = manager.create()
+        assert third not in (first, second)
+    finally:
+        executor.shutdown()
+
+
+def test_live_session_limit():
+    manager, executor = make_manager(max_sessions=2)
+    try:
+        first = manager.create()
+        manager.create()
+        with pytest.raises(SessionLimitError):
+            manager.create()
+        manager.end(first)
+        manager.create()
+        assert manager.live_count() == 2
+    finally:
+        executor.shutdown()
+
+
+def test_concurrent_access():
+    manager, executor = make_manager(max_sessions=1000)
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(20):
+                session_id = manager.create()
+                manager.update(session_id, metrics={'reading_speed': 1})
+                manager.snapshot()
+                manager.end(session_id)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert len(manager) == 160
+        assert manager.live_count() == 0
+    finally:
+        executor.shutdown()
+
+
+def test_admin_stats_report_frames_and_memory():
+    executor = FrameExecutor(create_landmark_analyzer, max_workers=1)
+    manager = SessionManager(executor)
+    try:
+        session_id = manager.create(source='landmarks')
+        analyzer = create_landmark_analyzer()
+        _, messages = session_batches(landmark_indices(analyzer),
+                                      synthetic_landmarks(analyzer.eye_tracker, 30), 10)
+        for message in messages:
+            batch = frame_protocol.decode_landmarks(frame_protocol.decode_message(message)[1])
+            executor.run_sync(session_id, process_landmark_batch, batch)
+
+        stats = manager.admin_stats()
+        entry = stats['sessions'][session_id]
+        assert stats['live_sessions'] == 1
+        assert entry['frames'] == 30
+        assert entry['memory_bytes'] > 10000
+    finally:
+        executor.shutdown()
+
+
+def test_gaze_filter_is_applied_to_reopened_analyzers():
+    executor = FrameExecutor(create_landmark_analyzer, max_workers=1)
+    manager = SessionManager(executor)
+    config = {'type': 'kalman', 'acceleration_noise': 10.0}
+    try:
+        session_id = manager.create(source='landmarks', gaze_filter=config)
+        filter_config = lambda analyzer: analyzer.eye_tracker.gaze_filter_config
+        assert executor.run_sync(session_id, filter_config) == config
+        manager.release_analyzer(session_id)
+        manager.open_analyzer(session_id)
+        assert executor.run_sync(session_id, filter_config) == config
+        assert executor.run_sync(manager.create(source='landmarks'), filter_config) is None
+    finally:
+        executor.shutdown()
@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from eye_tracking.calibration import CALIBRATION_GRID, GazeCalibration
+from eye_tracking_service import EyeTrackingService
+from session_index import SessionIndex
+from session_log import read_session_log
+from websocket_handler import WebSocketHandler
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message) if isinstance(message, str) else message)
+
+
+def make_handler(tmp_path, **kwargs):
+    handler = WebSocketHandler(pool_size=0, **kwargs)
+    websocket = FakeWebSocket()
+    service = EyeTrackingService(face_mesh=object())
+    service.data_dir = str(tmp_path)
+    handler.services[websocket] = service
+    return handler, websocket, service
+
+
+def send(handler, websocket, **message):
+    asyncio.run(handler.handle_message(websocket, json.dumps(message)))
+    return websocket.sent[-1]
+
+
+def frames(start, count):
+    return [{'timestamp': 1000.0 + i / 30, 'left_eye': [0.4 + 0.001 * i, 0.5], 'right_eye': [0.6, 0.5]}
+            for i in range(start, start + count)]
+
+
+def test_session_log_from_dispatched_messages(tmp_path):
+    handler, websocket, service = make_handler(tmp_path)
+    assert send(handler, websocket, type='init', session_id='s1')['session_id'] == 's1'
+    assert service.session_log_id == 's1'
+
+    send(handler, websocket, type='frame_data', frames=frames(0, 20))
+    send(handler, websocket, type='frame_data', frame_data=frames(20, 1)[0])
+    assert handler.active_sessions['s1']['frame_count'] == 21
+    assert send(handler, websocket, type='end_session', session_id='s1')['type'] == 'session_ended'
+    assert service.session_log is None and 's1' not in handler.active_sessions
+
+    log = read_session_log(str(tmp_path / 'session_s1.eylog'))
+    assert np.allclose(log['timestamp'], [frame['timestamp'] for frame in frames(0, 21)])
+    with open(tmp_path / 'session_s1.json') as f:
+        assert json.load(f)['frame_count'] == 21
+
+
+def test_first_frame_data_starts_the_log(tmp_path):
+    handler, websocket, service = make_handler(tmp_path)
+    send(handler, websocket, type='init')
+    assert service.session_log is None
+    send(handler, websocket, type='frame_data', session_id='s2', frames=frames(0, 5))
+    send(handler, websocket, type='frame_data', session_id='s2', frames=frames(5, 5))
+    send(handler, websocket, type='end_session')
+    assert len(read_session_log(str(tmp_path / 'session_s2.eylog'))['timestamp']) == 10
+
+
+def test_calibration_is_saved_with_the_session(tmp_path):
+    handler, websocket, service = make_handler(tmp_path)
+    send(handler, websocket, type='init', session_id='s3')
+    points = [list(point) for point in CALIBRATION_GRID]
+    gaze = [[0.3 + 0.4 * x + 0.02 * y, 0.25 + 0.5 * y] for x, y in points]
+    reply = send(handler, websocket, type='calibration_start', points=points, gaze_data=gaze)
+    assert reply['status'] == 'completed'
+    assert reply['error'] == service.calibration.error < 1e-3
+
+    send(handler, websocket, type='end_session')
+    with open(tmp_path / 'session_s3.json') as f:
+        saved = json.load(f)
+    assert saved['calibrated']
+    assert saved['calibration'] == service.calibration.to_dict()
+    assert GazeCalibration.from_dict(saved['calibration']).transform(gaze) == pytest.approx(np.array(points), abs=1e-3)
+
+
+def test_ended_session_is_indexed(tmp_path):
+    index = SessionIndex(':memory:')
+    handler, websocket, service = make_handler(tmp_path, session_index=index)
+    send(handler, websocket, type='init', session_id='s4')
+    send(handler, websocket, type='frame_data', frames=frames(0, 30))
+    assert index.get('s4') is None
+    send(handler, websocket, type='end_session')
+
+    row = index.get('s4')
+    assert row['source'] == 'gaze' and row['status'] == 'completed'
+    assert row['frame_count'] == 30 and row['calibration'] == 'none'
+    assert row['start_time'] == frames(0, 1)[0]['timestamp']
@@ -1,66 +1,153 @@
 import asyncio
+import itertools
 import json
 import logging
 import numpy as np
 import base64
 import cv2
-from typing import Dict, Set
+from typing import Dict, Optional, Set
 from websockets.server import WebSocketServerProtocol
 from eye_tracking_service import EyeTrackingService
+from analyzer_pool import AnalyzerPool
+from session_index import file_summary
+import frame_protocol
 
 logger = logging.getLogger(__name__)
 
 class WebSocketHandler:
-    def __init__(self):
+    def __init__(self, pool_size: int = 4, session_index=None):
+        self.session_index = session_index  # SessionIndex that ended sessions are recorded in
         self.clients: Set[WebSocketServerProtocol] = set()
-        self.eye_tracking_service = EyeTrackingService()
+        # Each client gets its own service, checked out of a pool of warmed-up ones
+        self.service_pool = AnalyzerPool(EyeTrackingService, pool_size)
+        self.service_pool.warm()
+        self.services: Dict[WebSocketServerProtocol, EyeTrackingService] = {}
         self.active_sessions: Dict[str, Dict] = {}
+        self.client_sessions: Dict[WebSocketServerProtocol, str] = {}  # Session each client is in
+        # Session handles of clients that negotiated the binary frame protocol
+        self.binary_handles: Dict[WebSocketServerProtocol, int] = {}
+        self._handles = itertools.count(1)
         logger.info("WebSocket handler initialized")
 
     async def register(self, websocket: WebSocketServerProtocol):
         """Register a new WebSocket client"""
         self.clients.add(websocket)
+        self._service(websocket)
         logger.info(f"New client connected. Total clients: {len(self.clients)}")
 
     async def unregister(self, websocket: WebSocketServerProtocol):
         """Unregister a WebSocket client"""
         self.clients.remove(websocket)
+        self.binary_handles.pop(websocket, None)
+        session_id = self.client_sessions.pop(websocket, None)
+        self.active_sessions.pop(session_id, None)
+        service = self.services.pop(websocket, None)
+        if service is not None:
+            # Samples streamed so far stay readable in the session log
+            service.close_session_log()
+            self.service_pool.release(service)
         logger.info(f"Client disconnected. Total clients: {len(self.clients)}")
 
-    async def handle_message(self, websocket: WebSocketServerProtocol, message: str):
+    def _service(self, websocket: WebSocketServerProtocol) -> EyeTrackingService:
+        """The client's eye tracking service, checked out on first use"""
+        service = self.services.get(websocket)
+        if service is None:
+            service = self.services[websocket] = self.service_pool.acquire()
+        return service
+
+    def _start_session(self, websocket: WebSocketServerProtocol, session_id: str) -> Dict:
+        """Start a session for the client and stream its samples to the session log"""
+        previous = self.client_sessions.get(websocket)
+        if previous is not None and previous != session_id:
+            self.active_sessions.pop(previous, None)
+        session = self.active_sessions[session_id] = {
+            'websocket': websocket,
+            'start_time': asyncio.get_event_loop().time(),
+            'frame_count': 0,
+            'calibrated': False,
+            'calibration': None
+        }
+        self.client_sessions[websocket] = session_id
+        self._service(websocket).start_session_log(session_id)
+        return session
+
+    def _client_session(self, websocket: WebSocketServerProtocol, session_id: Optional[str] = None) -> Optional[Dict]:
+        """The client's active session, started if a message names one it is not in yet"""
+        if session_id and self.client_sessions.get(websocket) != session_id:
+            return self._start_session(websocket, session_id)
+        return self.active_sessions.get(self.client_sessions.get(websocket))
+
+    async def handle_message(self, websocket: WebSocketServerProtocol, message):
         """Handle incoming WebSocket messages"""
         try:
+            if isinstance(message, bytes):
+                await self._handle_binary_frame(websocket, message)
+                return
+
             data = json.loads(message)
             message_type = data.get('type')
-
-            if message_type == 'frame':
+            service = self._service(websocket)
+
+            if message_type == 'init':
+                response = {"type": "init_ack", "protocol": "json"}
+                if data.get('protocol') == 'binary':
+                    handle = self.binary_handles.get(websocket) or next(self._handles)
+                    self.binary_handles[websocket] = handle
+                    response.update(protocol="binary", version=frame_protocol.PROTOCOL_VERSION,
+                                    session_handle=handle)
+                if data.get('session_id'):
+                    self._start_session(websocket, data['session_id'])
+                    response['session_id'] = data['session_id']
+                await websocket.send(json.dumps(response))
+
+            elif message_type == 'frame':
                 # Decode base64 image
                 frame_data = base64.b64decode(data['frame'])
                 nparr = np.frombuffer(frame_data, np.uint8)
                 frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
                 
                 # Process frame using your existing implementation
-                metrics = self.eye_tracking_service.process_frame(frame)
+                metrics = service.process_frame(frame)
                 
                 if metrics:
                     # Add additional analysis from your implementation
-                    analysis = self.eye_tracking_service._analyze_reading_pattern()
+                    analysis = service._analyze_reading_pattern()
                     metrics.update(analysis)
                     await websocket.send(json.dumps(metrics))
 
+            elif message_type == 'frame_data':
+                # Gaze coordinates tracked by the client; one frame or a batch of them
+                session = self._client_session(websocket, data.get('session_id'))
+                frames = data.get('frames')
+                if frames:
+                    results = service.process_samples(frames)
+                    result = results[-1] if results else {}
+                else:
+                    result = service.process_frame_data(data.get('frame_data', {}))
+                if session is not None:
+                    session['frame_count'] += len(frames) if frames else 1
+                if result:
+                    await websocket.send(json.dumps(result))
+
             elif message_type == 'calibration_start':
                 # Use your existing calibration logic
                 points = data.get('points', [])
                 gaze_data = data.get('gaze_data', [])
                 
                 if points and gaze_data:
-                    success = self.eye_tracking_service.calibrate(points, gaze_data)
+                    success = service.calibrate(points, gaze_data)
+                    session = self._client_session(websocket, data.get('session_id'))
+                    if session is not None:
+                        # Fitted coefficients are kept with the session and saved when it ends
+                        session['calibrated'] = success
+                        session['calibration'] = service.calibration.to_dict() if success else None
                     await websocket.send(json.dumps({
                         "type": "calibration_status",
-                        "status": "completed" if success else "failed"
+                        "status": "completed" if success else "failed",
+                        "error": service.calibration.error if success else None
                     }))
                 else:
-                    self.eye_tracking_service.reset_metrics()
+                    service.reset_metrics()
                     await websocket.send(json.dumps({
                         "type": "calibration_status",
                         "status": "started"
@@ -68,21 +155,31 @@ class WebSocketHandler:
 
             elif message_type == 'reading_test_start':
                 # Reset metrics and start reading test
-                self.eye_tracking_service.reset_metrics()
+                service.reset_metrics()
                 await websocket.send(json.dumps({
                     "type": "reading_test_status",
                     "status": "started"
                 }))
 
             elif message_type == 'end_session':
-                session_id = data.get('session_id')
+                session_id = data.get('session_id') or self.client_sessions.get(websocket)
                 if session_id:
                     # Save session data using your existing implementation
                     session_data = {
-                        'metrics': self.eye_tracking_service.reading_metrics,
-                        'analysis': self.eye_tracking_service._analyze_reading_pattern()
+                        'metrics': service.reading_metrics,
+                        'analysis': service._analyze_reading_pattern()
                     }
-                    self.eye_tracking_service.save_session_data(session_id, session_data)
+                    session = self.active_sessions.pop(session_id, None)
+                    if session is not None:
+                        self.client_sessions.pop(session['websocket'], None)
+                        session_data.update(
+                            duration=asyncio.get_event_loop().time() - session['start_time'],
+                            frame_count=session['frame_count'],
+                            calibrated=session['calibrated'],
+                            calibration=session['calibration'])
+                    # Also closes the session log, which holds the samples
+                    service.save_session_data(session_id, session_data)
+                    self._index_session(service, session_id)
                     await websocket.send(json.dumps({
                         "type": "session_ended",
                         "status": "success"
@@ -95,97 +192,36 @@ class WebSocketHandler:
                 "message": str(e)
             }))
 
-    async def _handle_start_session(self, websocket: WebSocketServerProtocol, payload: Dict):
-        """Handle session start request"""
-        session_id = payload.get('session_id')
-        if not session_id:
-            await self._send_error(websocket, "Session ID is required")
-            return
-
-        self.active_sessions[session_id] = {
-            'websocket': websocket,
-            'start_time': asyncio.get_event_loop().time(),
-            'frame_count': 0,
-            'calibrated': False
-        }
-
-        await self._send_response(websocket, {
-            'type': 'session_started',
-            'payload': {'session_id': session_id}
-        })
-
-    async def _handle_frame_data(self, websocket: WebSocketServerProtocol, payload: Dict):
-        """Process frame data and send analysis results"""
-        session_id = payload.get('session_id')
-        if not session_id or session_id not in self.active_sessions:
-            await self._send_error(websocket, "Invalid session ID")
+    async def _handle_binary_frame(self, websocket: WebSocketServerProtocol, message: bytes):
+        """Process a binary frame message and reply with a binary metrics message"""
+        header, jpeg = frame_protocol.decode_message(message)
+        handle = self.binary_handles.get(websocket)
+        if handle is None or header.session != handle or header.type != frame_protocol.FRAME:
+            await self._send_error(websocket, "Invalid session handle")
             return
 
-        frame_data = payload.get('frame_data', {})
-        session = self.active_sessions[session_id]
-        session['frame_count'] += 1
-
-        # Process frame data
-        processed_data = self.eye_tracking_service.process_frame_data(frame_data)
-        
-        # Send processed data back to client
-        await self._send_response(websocket, {
-            'type': 'frame_processed',
-            'payload': {
-                'session_id': session_id,
-                'frame_number': session['frame_count'],
-                'data': processed_data
-            }
-        })
-
-    async def _handle_calibration(self, websocket: WebSocketServerProtocol, payload: Dict):
-        """Handle calibration data"""
-        session_id = payload.get('session_id')
-        if not session_id or session_id not in self.active_sessions:
-            await self._send_error(websocket, "Invalid session ID")
+        frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            await self._send_error(websocket, "Could not decode frame")
             return
 
-        points = payload.get('points', [])
-        gaze_data = payload.get('gaze_data', [])
-
-        success = self.eye_tracking_service.calibrate(points, gaze_data)
-        session = self.active_sessions[session_id]
-        session['calibrated'] = success
-
-        await self._send_response(websocket, {
-            'type': 'calibration_result',
-            'payload': {
-                'session_id': session_id,
-                'success': success
-            }
-        })
+        service = self._service(websocket)
+        metrics = service.process_frame(frame)
+        if metrics:
+            metrics.update(service._analyze_reading_pattern())
+            await websocket.send(frame_protocol.encode_metrics(
+                handle, header.sequence, header.timestamp, metrics))
 
-    async def _handle_end_session(self, websocket: WebSocketServerProtocol, payload: Dict):
-        """Handle session end request"""
-        session_id = payload.get('session_id')
-        if not session_id or session_id not in self.active_sessions:
-            await self._send_error(websocket, "Invalid session ID")
+    def _index_session(self, service: EyeTrackingService, session_id: str):
+        """Record a saved session in the session index, if there is one"""
+        if self.session_index is None:
             return
-
-        session = self.active_sessions.pop(session_id)
-        duration = asyncio.get_event_loop().time() - session['start_time']
-
-        # Save session data
-        session_data = {
-            'duration': duration,
-            'frame_count': session['frame_count'],
-            'calibrated': session['calibrated']
-        }
-        self.eye_tracking_service.save_session_data(session_id, session_data)
-
-        await self._send_response(websocket, {
-            'type': 'session_ended',
-            'payload': {
-                'session_id': session_id,
-                'duration': duration,
-                'frame_count': session['frame_count']
-            }
-        })
+        try:
+            summary = file_summary(service.data_dir, session_id)
+            if summary is not None:
+                self.session_index.record(dict(summary, source='gaze'))
+        except Exception as e:
+            logger.error(f"Could not index session {session_id}: {str(e)}")
 
     async def _send_error(self, websocket: WebSocketServerProtocol, message: str):
         """Send error message to client"""
@@ -0,0 +1,287 @@
+"""
+Offline batch analysis of recorded reading videos.
+
+Each video is decoded sequentially and run through ``ReadingAnalyzer`` in a
+worker process without drawing. Every worker creates one MediaPipe FaceMesh
+and reuses it for all the videos it handles. For each video the output
+directory receives:
+
+    <name>.frames.csv     per-frame gaze and reading metrics
+    <name>.summary.json   final session metrics
+
+``manifest.json`` in the output directory records the videos that finished,
+keyed by path, size and modification time, so an interrupted batch resumes
+where it stopped and only changed videos are re-analyzed.
+
+Usage:
+    python -m eye_tracking.batch_analysis videos/ results/ --workers 4
+"""
+
+import argparse
+import csv
+import json
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from .clock import ReplayClock
+from .eye_tracker import create_face_mesh
+from .reading_analyzer import ReadingAnalyzer
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+MANIFEST_NAME = 'manifest.json'
+
+FRAME_COLUMNS = [
+    'frame', 'timestamp', 'face_detected', 'gaze_x', 'gaze_y', 'is_blink',
+    'fixation_count', 'regression_count', 'reading_speed',
+    'dyslexia_probability', 'cognitive_load'
+]
+
+logger = logging.getLogger(__name__)
+
+# One FaceMesh per worker process, created by the pool initializer
+_worker_face_mesh = None
+
+
+def _init_worker():
+    global _worker_face_mesh
+    _worker_face_mesh = create_face_mesh()
+
+
+def _to_json(value):
+    """Convert numpy types and non-finite floats for JSON output"""
+    if isinstance(value, dict):
+        return {str(k): _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _to_json(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def output_name(video_path: str, video_dir: Optional[str] = None) -> str:
+    """Output file stem of a video; subdirectories are kept in the name so stems stay unique"""
+    relative = os.path.relpath(video_path, video_dir) if video_dir else os.path.basename(video_path)
+    return os.path.splitext(relative)[0].replace(os.sep, '__')
+
+
+def output_paths(name: str, output_dir: str) -> Dict[str, str]:
+    return {
+        'frames': os.path.join(output_dir, f"{name}.frames.csv"),
+        'summary': os.path.join(output_dir, f"{name}.summary.json")
+    }
+
+
+def analyze_video(video_path: str, output_dir: str, text: Optional[str] = None,
+                  name: Optional[str] = None) -> Dict:
+    """Analyze one video and write its per-frame metrics and summary.
+
+    Args:
+        video_path (str): Video file to analyze
+        output_dir (str): Directory for the output files
+        text (str): Optional reading text shown during the recording
+        name (str): Output file stem; defaults to the video file name
+
+    Returns:
+        dict: Session summary
+
+    Raises:
+        ValueError: If the video cannot be opened
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video {video_path}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps <= 0 or not math.isfinite(fps):
+        fps = 30.0
+
+    if _worker_face_mesh is not None:
+        # Start from a fresh graph, without face tracking state from the previous video
+        face_mesh = _worker_face_mesh
+        face_mesh.reset()
+    else:
+        face_mesh = create_face_mesh()
+    clock = ReplayClock()
+    analyzer = ReadingAnalyzer(clock=clock, face_mesh=face_mesh)
+    if text is not None:
+        analyzer.start_reading_test(text)
+
+    paths = output_paths(name or output_name(video_path), output_dir)
+    frames_tmp = paths['frames'] + '.tmp'
+    start = time.perf_counter()
+    frame_index = 0
+    faces = 0
+    metrics = None
+    try:
+        with open(frames_tmp, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(FRAME_COLUMNS)
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                # Video time, so results do not depend on decoding speed
+                timestamp = frame_index / fps
+                clock.set(timestamp)
+                face_landmarks = analyzer.eye_tracker.detect_landmarks(frame)
+                metrics = analyzer.process_landmarks(face_landmarks, frame.shape[:2], timestamp)
+
+                eye_data = analyzer.eye_tracker.last_eye_data
+                if face_landmarks is not None:
+                    faces += 1
+                    gaze_x = (eye_data['left_gaze'][0] + eye_data['right_gaze'][0]) / 2.0
+                    gaze_y = (eye_data['left_gaze'][1] + eye_data['right_gaze'][1]) / 2.0
+                else:
+                    gaze_x = gaze_y = ''
+                writer.writerow([
+                    frame_index, f"{timestamp:.4f}", int(face_landmarks is not None),
+                    gaze_x, gaze_y, int(bool(eye_data['is_blink'])),
+                    metrics['fixation_count'], metrics['regression_count'], metrics['reading_speed'],
+                    metrics['dyslexia_indicators']['probability'],
+                    metrics['cognitive_metrics']['load_score']
+                ])
+                frame_index += 1
+    finally:
+        cap.release()
+        if face_mesh is not _worker_face_mesh:
+            face_mesh.close()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        'video': os.path.abspath(video_path),
+        'frames': frame_index,
+        'fps': fps,
+        'duration': frame_index / fps,
+        'face_detected_frames': faces,
+        'processing_time': elapsed,
+        'metrics': metrics,
+        'ml_features': analyzer.eye_tracker.get_ml_features()
+    }
+    with open(paths['summary'] + '.tmp', 'w') as f:
+        json.dump(_to_json(summary), f, indent=2)
+
+    # Publish both files only once the video is complete
+    os.replace(frames_tmp, paths['frames'])
+    os.replace(paths['summary'] + '.tmp', paths['summary'])
+    return summary
+
+
+def find_videos(video_dir: str, extensions=VIDEO_EXTENSIONS) -> List[str]:
+    videos = []
+    for root, _, files in os.walk(video_dir):
+        for name in files:
+            if name.lower().endswith(tuple(extensions)):
+                videos.append(os.path.join(root, name))
+    return sorted(videos)
+
+
+def load_manifest(output_dir: str) -> Dict:
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir: str, manifest: Dict):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def _video_key(video_path: str) -> Dict:
+    stat = os.stat(video_path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _is_done(entry: Optional[Dict], video_path: str, name: str, output_dir: str) -> bool:
+    if not entry or entry.get('status') != 'done':
+        return False
+    key = _video_key(video_path)
+    if entry.get('size') != key['size'] or entry.get('mtime') != key['mtime']:
+        return False
+    return all(os.path.exists(p) for p in output_paths(name, output_dir).values())
+
+
+def run_batch(video_dir: str, output_dir: str, workers: Optional[int] = None,
+              text: Optional[str] = None) -> Dict:
+    """Analyze every video in a directory, resuming from the manifest.
+
+    Args:
+        video_dir (str): Directory searched recursively for videos
+        output_dir (str): Directory for per-video outputs and the manifest
+        workers (int): Worker processes; defaults to the CPU count
+        text (str): Optional reading text shown during the recordings
+
+    Returns:
+        dict: The updated manifest
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    videos = find_videos(video_dir)
+    names = {v: output_name(v, video_dir) for v in videos}
+    pending = [v for v in videos
+               if not _is_done(manifest.get(os.path.abspath(v)), v, names[v], output_dir)]
+    logger.info("%d videos found, %d already analyzed, %d to process",
+                len(videos), len(videos) - len(pending), len(pending))
+    if not pending:
+        return manifest
+
+    start = time.perf_counter()
+    video_seconds = 0.0
+    # Spawned, not forked: a forked copy of a parent holding a MediaPipe graph crashes
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = {executor.submit(analyze_video, v, output_dir, text, names[v]): v for v in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            video = futures[future]
+            entry = dict(_video_key(video))
+            try:
+                summary = future.result()
+                entry.update({'status': 'done', 'frames': summary['frames'],
+                              'duration': summary['duration']})
+                video_seconds += summary['duration']
+                elapsed = time.perf_counter() - start
+                logger.info("[%d/%d] %s: %d frames (%.1f min of video, %.1fx real time overall)",
+                            done, len(pending), video, summary['frames'], summary['duration'] / 60,
+                            video_seconds / elapsed if elapsed > 0 else 0.0)
+            except Exception as e:
+                entry.update({'status': 'failed', 'error': str(e)})
+                logger.error("[%d/%d] %s failed: %s", done, len(pending), video, e)
+            manifest[os.path.abspath(video)] = entry
+            save_manifest(output_dir, manifest)
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a directory of recorded reading videos")
+    parser.add_argument('video_dir')
+    parser.add_argument('output_dir')
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--text', default=None, help="Reading text shown during the recordings")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    manifest = run_batch(args.video_dir, args.output_dir, args.workers, args.text)
+    failed = [video for video, entry in manifest.items() if entry.get('status') == 'failed']
+    if failed:
+        logger.warning("%d videos failed; rerun to retry them", len(failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Benchmark the eye-tracking pipeline without a camera.
+
+Synthetic reading sessions (see ``synthetic_reading``) are fed through the
+post-FaceMesh ``EyeTracker`` logic, ``ReadingAnalyzer`` and
+``CognitiveLoadAnalyzer`` on a ``ReplayClock``, and stored images are run
+through FaceMesh. Per-frame cost is reported as p50/p99 per component over
+the final minute of each session, so running a short and a long session
+shows whether the per-frame cost grows with session length. With
+``--filters`` the gaze filters are compared on saccade lag and noise (see
+``gaze_filters.compare_filters``).
+
+Usage:
+    python -m eye_tracking.benchmark
+    python -m eye_tracking.benchmark --durations 60 1800 --images data/dyslexic --json results.json
+    python -m eye_tracking.benchmark --durations 300 --images --filters
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from .clock import ReplayClock
+from .cognitive_load_analyzer import CognitiveLoadAnalyzer
+from .eye_tracker import EyeTracker
+from .gaze_filters import compare_filters
+from .reading_analyzer import ReadingAnalyzer
+from .synthetic_reading import generate_reading, landmark_frames
+
+FRAME_SHAPE = (480, 640)
+DEFAULT_IMAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def summarize(seconds: np.ndarray) -> Dict:
+    """Frame count, mean, p50 and p99 of per-frame times, in milliseconds"""
+    if len(seconds) == 0:
+        return {'frames': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0}
+    p50, p99 = np.percentile(seconds, [50, 99]) * 1000
+    return {'frames': int(len(seconds)), 'mean_ms': float(np.mean(seconds) * 1000),
+            'p50_ms': float(p50), 'p99_ms': float(p99)}
+
+
+def benchmark_session(duration: float, fps: float = 30.0, window: float = 60.0,
+                      regression_probability: float = 0.1, seed: int = 0) -> Dict[str, Dict]:
+    """Time each analyzer on one synthetic reading session.
+
+    Args:
+        duration (float): Session length in seconds
+        fps (float): Frame rate of the session
+        window (float): Report the last this many seconds of the session
+        regression_probability (float): Passed to ``generate_reading``
+        seed (int): Random seed of the session
+
+    Returns:
+        dict: Component name -> per-frame timing summary over the final window
+    """
+    reading = generate_reading(duration, fps, regression_probability=regression_probability, seed=seed)
+    n_frames = len(reading.timestamps)
+    timestamps = reading.timestamps.tolist()
+    times = {name: np.empty(n_frames) for name in (
+        'eye_tracker', 'reading_analyzer', 'reading_analyzer.update_reading_metrics',
+        'reading_analyzer.analyze_reading_patterns', 'cognitive_load')}
+
+    # EyeTracker on its own: everything after FaceMesh
+    tracker = EyeTracker(clock=ReplayClock())
+    frames = landmark_frames(reading, tracker.LEFT_EYE_INDICES, tracker.RIGHT_EYE_INDICES, seed=seed)
+    eye_times = times['eye_tracker']
+    for i, (timestamp, landmarks) in enumerate(zip(timestamps, frames)):
+        tracker.clock.set(timestamp)
+        start = time.perf_counter()
+        tracker.process_landmarks(landmarks, FRAME_SHAPE, timestamp)
+        eye_times[i] = time.perf_counter() - start
+    tracker.release()
+
+    # ReadingAnalyzer, which runs its own EyeTracker and CognitiveLoadAnalyzer
+    analyzer = ReadingAnalyzer(clock=ReplayClock())
+    tracker = analyzer.eye_tracker
+    frames = landmark_frames(reading, tracker.LEFT_EYE_INDICES, tracker.RIGHT_EYE_INDICES, seed=seed)
+    for i, (timestamp, landmarks) in enumerate(zip(timestamps, frames)):
+        analyzer.clock.set(timestamp)
+        start = time.perf_counter()
+        analyzer.process_landmarks(landmarks, FRAME_SHAPE, timestamp)
+        times['reading_analyzer'][i] = time.perf_counter() - start
+        times['reading_analyzer.update_reading_metrics'][i] = analyzer.stage_times['update_reading_metrics']
+        times['reading_analyzer.analyze_reading_patterns'][i] = analyzer.stage_times['analyze_reading_patterns']
+    analyzer.release()
+
+    # CognitiveLoadAnalyzer fed the gaze stream directly
+    cognitive = CognitiveLoadAnalyzer()
+    load_times = times['cognitive_load']
+    for i, (timestamp, pupil, blink) in enumerate(zip(timestamps, reading.pupil_size.tolist(),
+                                                      reading.is_blink.tolist())):
+        start = time.perf_counter()
+        pupil_metrics = cognitive.update_pupil_size(pupil, timestamp)
+        blink_metrics = cognitive.update_blink(blink, timestamp)
+        cognitive.calculate_cognitive_load(pupil_metrics, blink_metrics)
+        load_times[i] = time.perf_counter() - start
+
+    tail = max(1, int(round(window * fps)))
+    return {name: summarize(samples[-tail:]) for name, samples in times.items()}
+
+
+def find_images(paths: Sequence[str]) -> List[str]:
+    """Image files in the given files and directories (searched recursively)"""
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            for extension in IMAGE_EXTENSIONS:
+                images.extend(glob.glob(os.path.join(path, '**', '*' + extension), recursive=True))
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            images.append(path)
+    return sorted(images)
+
+
+def benchmark_facemesh(image_paths: Sequence[str], repeats: int = 3,
+                       frame_size: Optional[Sequence[int]] = (640, 480)) -> Dict:
+    """Time FaceMesh on stored images.
+
+    Images are resized to the camera frame size so the timings match live
+    frames; the first pass is excluded as it builds the FaceMesh graph.
+
+    Args:
+        image_paths (list): Images to run
+        repeats (int): Timed passes over the images
+        frame_size (tuple): (width, height) to resize to, or None to keep the image size
+
+    Returns:
+        dict: Timing summary plus the number of images and of images with a face
+    """
+    frames = []
+    for path in image_paths:
+        image = cv2.imread(path)
+        if image is not None:
+            frames.append(cv2.resize(image, tuple(frame_size)) if frame_size else image)
+    if not frames:
+        return dict(summarize(np.empty(0)), images=0, faces=0)
+
+    tracker = EyeTracker()
+    try:
+        faces = sum(tracker.detect_landmarks(frame) is not None for frame in frames)
+        samples = np.empty(repeats * len(frames))
+        for i in range(len(samples)):
+            start = time.perf_counter()
+            tracker.detect_landmarks(frames[i % len(frames)])
+            samples[i] = time.perf_counter() - start
+    finally:
+        tracker.release()
+    return dict(summarize(samples), images=len(frames), faces=int(faces))
+
+
+def run_benchmarks(durations: Sequence[float], image_paths: Sequence[str], fps: float = 30.0,
+                   repeats: int = 3, filter_noise: Optional[float] = None) -> Dict:
+    """Session benchmarks for each duration plus the FaceMesh benchmark, and the
+    gaze filter comparison on the longest session if filter_noise is given"""
+    results = {'sessions': {}, 'facemesh': None, 'filters': None}
+    for duration in durations:
+        results['sessions'][f'{duration:g}s'] = benchmark_session(duration, fps)
+    if image_paths:
+        results['facemesh'] = benchmark_facemesh(image_paths, repeats)
+    if filter_noise is not None:
+        results['filters'] = compare_filters(max(durations), fps, filter_noise)
+    return results
+
+
+def print_results(results: Dict):
+    row = "{:<9} {:<42} {:>7} {:>9} {:>9} {:>9}"
+    print(row.format('session', 'component (last minute)', 'frames', 'mean ms', 'p50 ms', 'p99 ms'))
+    entries = [(session, name, stats) for session, components in results['sessions'].items()
+               for name, stats in components.items()]
+    facemesh = results['facemesh']
+    if facemesh:
+        entries.append(('images', f"facemesh ({facemesh['faces']}/{facemesh['images']} with a face)", facemesh))
+    for session, name, stats in entries:
+        print(row.format(session, name, stats['frames'], f"{stats['mean_ms']:.3f}",
+                         f"{stats['p50_ms']:.3f}", f"{stats['p99_ms']:.3f}"))
+
+    if results.get('filters'):
+        row = "{:<18} {:>12} {:>12} {:>15} {:>9} {:>12}"
+        print()
+        print(row.format('gaze filter', 'lag p50 ms', 'lag p90 ms', 'fixation noise', 'rmse', 'us/sample'))
+        for name, stats in results['filters'].items():
+            print(row.format(name, f"{stats['lag_ms']:.1f}", f"{stats['lag_p90_ms']:.1f}",
+                             f"{stats['fixation_noise']:.4f}", f"{stats['rmse']:.4f}",
+                             f"{stats['us_per_sample']:.2f}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the eye-tracking pipeline on synthetic sessions")
+    parser.add_argument('--durations', type=float, nargs='+', default=[60, 1800],
+                        help="Session lengths in seconds (default: 1 and 30 minutes)")
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--images', nargs='*', default=[DEFAULT_IMAGE_DIR],
+                        help="Image files or directories to run through FaceMesh; pass none to skip")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed passes over the images")
+    parser.add_argument('--filters', action='store_true',
+                        help="Compare the gaze filters' saccade lag and noise on the longest session")
+    parser.add_argument('--filter-noise', type=float, default=0.02,
+                        help="Standard deviation of the gaze noise added for --filters")
+    parser.add_argument('--json', default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.durations, find_images(args.images), args.fps, args.repeats,
+                             args.filter_noise if args.filters else None)
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Gaze calibration: map raw gaze coordinates to screen positions.
+
+Calibration shows the targets of ``CALIBRATION_GRID`` one after another and
+records where the tracker says the reader is looking. ``fit_calibration``
+fits polynomial models of the raw gaze (orders 1 to 3) with a ridge penalty
+and keeps the one with the lowest leave-one-out error. With only nine points
+an unpenalized third-order model would interpolate the noise; the ridge term
+and the held-out error keep it in check.
+
+A fitted ``GazeCalibration`` holds one coefficient matrix, so a whole batch of
+samples is transformed by expanding it into polynomial features and doing a
+single matrix multiply.
+"""
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Normalized screen positions of the calibration targets, row by row
+CALIBRATION_GRID = (
+    (0.2, 0.2), (0.5, 0.2), (0.8, 0.2),
+    (0.2, 0.5), (0.5, 0.5), (0.8, 0.5),
+    (0.2, 0.8), (0.5, 0.8), (0.8, 0.8)
+)
+
+DEFAULT_DEGREES = (1, 2, 3)
+DEFAULT_RIDGES = (1e-6, 1e-3, 1e-2, 1e-1, 1.0)
+
+
+def polynomial_features(points: np.ndarray, degree: int) -> np.ndarray:
+    """Expand (N, 2) points into the monomials x^i * y^j with i + j <= degree.
+
+    Columns are ordered by total degree: 1, x, y, x^2, xy, y^2, x^3, ...
+    """
+    x, y = points[:, 0], points[:, 1]
+    columns = [np.ones(len(points))]
+    for total in range(1, degree + 1):
+        for j in range(total + 1):
+            columns.append(x ** (total - j) * y ** j)
+    return np.column_stack(columns)
+
+
+class GazeCalibration:
+    """Polynomial gaze-to-screen mapping with fixed coefficients."""
+
+    def __init__(self, coefficients: np.ndarray, degree: int, center: Sequence[float],
+                 scale: Sequence[float], ridge: float = 0.0, error: Optional[float] = None):
+        """Initialize a fitted calibration.
+
+        Args:
+            coefficients (np.ndarray): (n_features, 2) polynomial coefficients
+            degree (int): Polynomial order
+            center (tuple): Mean of the raw gaze the model was fitted on
+            scale (tuple): Spread of the raw gaze; inputs are standardized with it
+            ridge (float): Ridge penalty the model was fitted with
+            error (float): Leave-one-out RMSE on the calibration targets
+        """
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.degree = degree
+        self.center = np.asarray(center, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.ridge = ridge
+        self.error = error
+
+    def features(self, points) -> np.ndarray:
+        """Polynomial expansion of standardized raw gaze points"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return polynomial_features((points - self.center) / self.scale, self.degree)
+
+    def transform(self, points) -> np.ndarray:
+        """Map an (N, 2) batch of raw gaze points to screen positions"""
+        return self.features(points) @ self.coefficients
+
+    def transform_point(self, point) -> np.ndarray:
+        """Map a single raw gaze point"""
+        return self.transform(point)[0]
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form, for storing with a session"""
+        return {
+            'degree': self.degree,
+            'ridge': self.ridge,
+            'center': self.center.tolist(),
+            'scale': self.scale.tolist(),
+            'coefficients': self.coefficients.tolist(),
+            'error': self.error
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'GazeCalibration':
+        return cls(data['coefficients'], data['degree'], data['center'], data['scale'],
+                   data.get('ridge', 0.0), data.get('error'))
+
+
+def _ridge_solve(features: np.ndarray, targets: np.ndarray, ridge: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Ridge coefficients and leave-one-out residuals; the intercept is not penalized"""
+    penalty = ridge * np.eye(features.shape[1])
+    penalty[0, 0] = 0.0
+    inverse = np.linalg.pinv(features.T @ features + penalty)
+    coefficients = inverse @ features.T @ targets
+    leverage = np.einsum('ij,jk,ik->i', features, inverse, features)
+    residuals = targets - features @ coefficients
+    with np.errstate(divide='ignore', invalid='ignore'):
+        held_out = residuals / (1.0 - leverage)[:, None]
+    return coefficients, held_out
+
+
+def fit_calibration(gaze_points, screen_points, degrees: Iterable[int] = DEFAULT_DEGREES,
+                    ridges: Iterable[float] = DEFAULT_RIDGES) -> GazeCalibration:
+    """Fit the polynomial order and ridge penalty with the lowest leave-one-out error.
+
+    Args:
+        gaze_points: (N, 2) raw gaze measured while looking at each target
+        screen_points: (N, 2) target positions, e.g. ``CALIBRATION_GRID``
+        degrees: Polynomial orders to try
+        ridges: Ridge penalties to try
+
+    Returns:
+        GazeCalibration: The best model
+
+    Raises:
+        ValueError: If the point lists differ in length or hold fewer than 3 points
+    """
+    gaze = np.asarray(gaze_points, dtype=float).reshape(-1, 2)
+    targets = np.asarray(screen_points, dtype=float).reshape(-1, 2)
+    if len(gaze) != len(targets) or len(gaze) < 3:
+        raise ValueError(f"Need matching lists of at least 3 points, got {len(gaze)} and {len(targets)}")
+
+    center = gaze.mean(axis=0)
+    scale = gaze.std(axis=0)
+    scale[scale == 0] = 1.0
+    standardized = (gaze - center) / scale
+
+    best = None
+    for degree in degrees:
+        features = polynomial_features(standardized, degree)
+        for ridge in ridges:
+            coefficients, held_out = _ridge_solve(features, targets, ridge)
+            error = float(np.sqrt(np.mean(held_out ** 2)))
+            if not np.isfinite(error):
+                continue
+            if best is None or error < best.error:
+                best = GazeCalibration(coefficients, degree, center, scale, ridge, error)
+    if best is None:
+        # Every model interpolates the points exactly; fall back to a penalized linear fit
+        coefficients, _ = _ridge_solve(polynomial_features(standardized, 1), targets, 1.0)
+        best = GazeCalibration(coefficients, 1, center, scale, 1.0, None)
+    return best
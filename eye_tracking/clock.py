@@ -0,0 +1,72 @@
+"""
+Clocks for the analyzers.
+
+``EyeTracker`` and ``ReadingAnalyzer`` take any zero-argument callable that
+returns the current time in seconds; live analysis uses ``time.time``.
+``RateScheduler`` runs periodic work at a fixed rate of that clock's time, so
+a replay schedules it exactly as the live session did.
+"""
+
+from typing import Optional
+
+
+class ReplayClock:
+    """Clock that only moves when told to, used to replay recorded sessions."""
+
+    def __init__(self, start: float = 0.0):
+        self.current = start
+
+    def __call__(self) -> float:
+        return self.current
+
+    def set(self, timestamp: float):
+        self.current = timestamp
+
+    def advance(self, seconds: float):
+        self.current += seconds
+
+
+class RateScheduler:
+    """Decides when a periodic task is due, at most hz times per second of clock time.
+
+    The owner calls advance() once per processed frame; the task is only due
+    once a frame arrived since it last ran, however often due() is asked.
+    Ticks keep their phase, so at 30 fps a 10 Hz task runs on every third
+    frame instead of drifting to every fourth through rounding. A clock that
+    jumps back (a replay restarting) makes the task due at once.
+    """
+
+    def __init__(self, hz: Optional[float] = None):
+        """Initialize the scheduler.
+
+        Args:
+            hz (float): Maximum rate of the task; None or 0 runs it on every frame
+        """
+        self.hz = hz
+        self.reset()
+
+    def reset(self):
+        self._last = None
+        self._next = None
+        self._pending = 0
+        self.steps = 0  # Frames covered by the latest tick, including its own
+
+    def advance(self, frames: int = 1):
+        """Count processed frames"""
+        self._pending += frames
+
+    def due(self, now: float) -> bool:
+        """Whether the task runs at time now; if so, steps is the frames since it last ran"""
+        if not self._pending:
+            return False
+        if self.hz:
+            if self._next is not None and self._last <= now < self._next - 1e-9:
+                return False
+            interval = 1.0 / self.hz
+            if self._next is None or now < self._last or now >= self._next + interval:
+                self._next = now + interval
+            else:
+                self._next += interval
+            self._last = now
+        self.steps, self._pending = self._pending, 0
+        return True
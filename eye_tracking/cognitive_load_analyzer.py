@@ -1,6 +1,7 @@
 import numpy as np
-from collections import deque
 import logging
+from .rolling_stats import RollingSums
+from .records import BlinkMetrics, CognitiveLoad, PupilMetrics
 
 class CognitiveLoadAnalyzer:
     def __init__(self, window_size=60):  # 60 frames = 2 seconds at 30 fps
@@ -12,10 +13,11 @@ class CognitiveLoadAnalyzer:
         # Window size for rolling calculations
         self.window_size = window_size
         
-        # Deques for storing historical data
-        self.pupil_sizes = deque(maxlen=window_size)
-        self.blink_durations = deque(maxlen=window_size)
-        self.blink_intervals = deque(maxlen=window_size)
+        # Sliding windows with running sums and sums of squares, so the mean
+        # and standard deviation are updated in O(1) per sample
+        self.pupil_sizes = RollingSums(window_size)
+        self.blink_durations = RollingSums(window_size)
+        self.blink_intervals = RollingSums(window_size)
         
         # Timestamps for calculations
         self.last_blink_timestamp = None
@@ -38,7 +40,7 @@ class CognitiveLoadAnalyzer:
             timestamp (float): Current timestamp
         
         Returns:
-            dict: Dictionary containing pupil metrics
+            PupilMetrics: Pupil metrics, or None until three sizes are known
         """
         try:
             # Add new pupil size to history
@@ -50,8 +52,8 @@ class CognitiveLoadAnalyzer:
             
             # Calculate pupil metrics
             current_dilation = pupil_size
-            mean_dilation = np.mean(self.pupil_sizes)
-            dilation_variability = np.std(self.pupil_sizes)
+            mean_dilation = self.pupil_sizes.mean
+            dilation_variability = self.pupil_sizes.std
             
             # Calculate dilation velocity (rate of change)
             dilation_velocity = (self.pupil_sizes[-1] - self.pupil_sizes[-2])
@@ -63,13 +65,8 @@ class CognitiveLoadAnalyzer:
             # Calculate relative dilation (compared to baseline)
             relative_dilation = (current_dilation - self.baseline_pupil_size) / self.baseline_pupil_size
             
-            return {
-                'current_dilation': current_dilation,
-                'mean_dilation': mean_dilation,
-                'dilation_variability': dilation_variability,
-                'dilation_velocity': dilation_velocity,
-                'relative_dilation': relative_dilation
-            }
+            return PupilMetrics(current_dilation, mean_dilation, dilation_variability,
+                                dilation_velocity, relative_dilation)
             
         except Exception as e:
             self.logger.error(f"Error in update_pupil_size: {str(e)}")
@@ -83,7 +80,7 @@ class CognitiveLoadAnalyzer:
             timestamp (float): Current timestamp
         
         Returns:
-            dict: Dictionary containing blink metrics
+            BlinkMetrics: Blink metrics, or None until two blinks have ended
         """
         try:
             # Detect blink start
@@ -112,36 +109,220 @@ class CognitiveLoadAnalyzer:
                 return None
             
             # Calculate blink metrics
-            mean_duration = np.mean(self.blink_durations)
-            blink_variability = np.std(self.blink_durations)
+            mean_duration = self.blink_durations.mean
+            blink_variability = self.blink_durations.std
             
             # Calculate blink rate (blinks per minute)
             if self.blink_intervals:
-                mean_interval = np.mean(self.blink_intervals)
+                mean_interval = self.blink_intervals.mean
                 blink_rate = 60.0 / mean_interval if mean_interval > 0 else 0
             else:
                 blink_rate = 0
             
-            return {
-                'mean_blink_duration': mean_duration,
-                'blink_variability': blink_variability,
-                'blink_rate': blink_rate,
-                'is_blinking': self.is_blinking
-            }
+            return BlinkMetrics(mean_duration, blink_variability, blink_rate, self.is_blinking)
             
         except Exception as e:
             self.logger.error(f"Error in update_blink: {str(e)}")
             return None
     
+    def update_batch(self, pupil_sizes, eye_closed, timestamps):
+        """Process a recorded sequence of frames in one vectorized pass.
+        
+        Produces the same values as calling ``update_pupil_size``,
+        ``update_blink`` and ``calculate_cognitive_load`` frame by frame, and
+        leaves the analyzer in the same state afterwards, so batches and live
+        updates can be mixed.
+        
+        Args:
+            pupil_sizes (array-like): Pupil size per frame
+            eye_closed (array-like): Whether the eye is closed in each frame
+            timestamps (array-like): Timestamp of each frame in seconds
+        
+        Returns:
+            dict: Per-frame numpy arrays of pupil, blink and cognitive load
+                metrics; NaN (or '' for load_level) where the per-frame call
+                would have returned None
+        """
+        pupil = np.asarray(pupil_sizes, dtype=float)
+        closed = np.asarray(eye_closed, dtype=bool)
+        times = np.asarray(timestamps, dtype=float)
+        if not (len(pupil) == len(closed) == len(times)):
+            raise ValueError("pupil_sizes, eye_closed and timestamps must have the same length")
+        
+        pupil_metrics = self._batch_pupil_metrics(pupil)
+        blink_metrics = self._batch_blink_metrics(closed, times)
+        
+        # Cognitive load where both metric sets are available
+        PUPIL_WEIGHT = 0.4
+        BLINK_WEIGHT = 0.3
+        VARIABILITY_WEIGHT = 0.3
+        
+        pupil_load = (pupil_metrics['relative_dilation'] * PUPIL_WEIGHT +
+                      pupil_metrics['dilation_variability'] * VARIABILITY_WEIGHT)
+        mean_duration = blink_metrics['mean_blink_duration']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            blink_load = np.where(mean_duration > 0,
+                                  blink_metrics['blink_variability'] / mean_duration * BLINK_WEIGHT,
+                                  0.0)
+        valid = ~np.isnan(pupil_load) & ~np.isnan(mean_duration)
+        pupil_load = np.where(valid, pupil_load, np.nan)
+        blink_load = np.where(valid, blink_load, np.nan)
+        cognitive_load = np.clip(pupil_load + blink_load, 0, 1)
+        
+        load_level = np.full(len(pupil), '', dtype=object)
+        load_level[valid] = np.where(cognitive_load[valid] < 0.3, 'Low',
+                                     np.where(cognitive_load[valid] < 0.7, 'Medium', 'High'))
+        
+        result = dict(pupil_metrics)
+        result.update(blink_metrics)
+        result.update({
+            'cognitive_load_score': cognitive_load,
+            'load_level': load_level,
+            'pupil_load_component': pupil_load,
+            'blink_load_component': blink_load
+        })
+        return result
+    
+    def _batch_pupil_metrics(self, pupil):
+        """Vectorized equivalent of update_pupil_size over a batch"""
+        n_frames = len(pupil)
+        w = self.window_size
+        history = np.fromiter(self.pupil_sizes, dtype=float, count=len(self.pupil_sizes))
+        full = np.concatenate([history, pupil])
+        offset = len(history)
+        
+        # Windowed sums via cumulative sums (shifted to limit cancellation)
+        shift = full[0] if len(full) else 0.0
+        shifted = full - shift
+        cs = np.concatenate([[0.0], np.cumsum(shifted)])
+        cs2 = np.concatenate([[0.0], np.cumsum(shifted * shifted)])
+        end = np.arange(offset + 1, offset + n_frames + 1)
+        count = np.minimum(end, w)
+        window_sum = cs[end] - cs[end - count]
+        window_sum_sq = cs2[end] - cs2[end - count]
+        mean_shifted = window_sum / count
+        mean = mean_shifted + shift
+        std = np.sqrt(np.maximum(window_sum_sq / count - mean_shifted ** 2, 0.0))
+        velocity = full[end - 1] - full[np.maximum(end - 2, 0)]
+        
+        valid = count >= 3
+        if self.baseline_pupil_size is None and valid.any():
+            self.baseline_pupil_size = float(mean[np.argmax(valid)])
+        baseline = self.baseline_pupil_size
+        if baseline:
+            relative = (pupil - baseline) / baseline
+        else:
+            # Per-frame updates fail on a zero baseline
+            valid = np.zeros(n_frames, dtype=bool)
+            relative = np.zeros(n_frames)
+        
+        # Carry the window forward
+        self.pupil_sizes.clear()
+        self.pupil_sizes.extend(full[-w:])
+        
+        def masked(values):
+            return np.where(valid, values, np.nan)
+        
+        return {
+            'current_dilation': masked(pupil),
+            'mean_dilation': masked(mean),
+            'dilation_variability': masked(std),
+            'dilation_velocity': masked(velocity),
+            'relative_dilation': masked(relative)
+        }
+    
+    def _batch_blink_metrics(self, closed, times):
+        """Vectorized equivalent of update_blink over a batch"""
+        n_frames = len(closed)
+        w = self.window_size
+        idx = np.arange(n_frames)
+        
+        # The blink state after each frame equals eye_closed for that frame
+        previous = np.concatenate([[self.is_blinking], closed[:-1]])
+        starts = closed & ~previous
+        ends = ~closed & previous
+        
+        # Start time of the blink each end closes
+        last_start = np.maximum.accumulate(np.where(starts, idx, -1))
+        start_known = last_start >= 0
+        start_times = np.where(start_known, times[np.maximum(last_start, 0)],
+                               np.nan if self.blink_start_time is None else self.blink_start_time)
+        completed = ends & ~np.isnan(start_times)
+        end_idx = idx[completed]
+        end_times = times[end_idx]
+        durations = end_times - start_times[end_idx]
+        
+        # Inter-blink intervals between consecutive completed blinks
+        previous_end = np.concatenate([[np.nan if self.last_blink_timestamp is None
+                                        else self.last_blink_timestamp], end_times[:-1]])
+        intervals = end_times - previous_end
+        has_interval = ~np.isnan(intervals)
+        intervals = intervals[has_interval]
+        
+        def windowed(history, new_values, new_counts):
+            """Mean/std of the last w values after each frame"""
+            values = np.concatenate([np.fromiter(history, dtype=float, count=len(history)), new_values])
+            shift = values[0] if len(values) else 0.0
+            shifted = values - shift
+            cs = np.concatenate([[0.0], np.cumsum(shifted)])
+            cs2 = np.concatenate([[0.0], np.cumsum(shifted * shifted)])
+            end = len(history) + new_counts
+            count = np.minimum(end, w)
+            safe = np.maximum(count, 1)
+            window_sum = cs[end] - cs[end - count]
+            window_sum_sq = cs2[end] - cs2[end - count]
+            mean_shifted = window_sum / safe
+            std = np.sqrt(np.maximum(window_sum_sq / safe - mean_shifted ** 2, 0.0))
+            return values, count, mean_shifted + shift, std
+        
+        blinks_so_far = np.cumsum(completed)
+        intervals_so_far = np.zeros(n_frames, dtype=int)
+        if len(end_idx):
+            interval_frames = np.zeros(n_frames, dtype=int)
+            np.add.at(interval_frames, end_idx[has_interval], 1)
+            intervals_so_far = np.cumsum(interval_frames)
+        
+        all_durations, duration_count, mean_duration, duration_std = windowed(
+            self.blink_durations, durations, blinks_so_far)
+        all_intervals, interval_count, mean_interval, _ = windowed(
+            self.blink_intervals, intervals, intervals_so_far)
+        
+        with np.errstate(divide='ignore'):
+            blink_rate = np.where((interval_count > 0) & (mean_interval > 0), 60.0 / mean_interval, 0.0)
+        
+        valid = duration_count >= 2
+        
+        # Carry the state forward
+        if n_frames:
+            self.is_blinking = bool(closed[-1])
+            if starts.any():
+                self.blink_start_time = float(times[idx[starts][-1]])
+        if len(end_times):
+            self.last_blink_timestamp = float(end_times[-1])
+        self.blink_durations.clear()
+        self.blink_durations.extend(all_durations[-w:])
+        self.blink_intervals.clear()
+        self.blink_intervals.extend(all_intervals[-w:])
+        
+        def masked(values):
+            return np.where(valid, values, np.nan)
+        
+        return {
+            'mean_blink_duration': masked(mean_duration),
+            'blink_variability': masked(duration_std),
+            'blink_rate': masked(blink_rate),
+            'is_blinking': closed.copy()
+        }
+    
     def calculate_cognitive_load(self, pupil_metrics, blink_metrics):
         """Calculate overall cognitive load based on pupil and blink metrics.
         
         Args:
-            pupil_metrics (dict): Dictionary of pupil-related metrics
-            blink_metrics (dict): Dictionary of blink-related metrics
+            pupil_metrics (PupilMetrics): Result of update_pupil_size
+            blink_metrics (BlinkMetrics): Result of update_blink
         
         Returns:
-            dict: Dictionary containing cognitive load metrics
+            CognitiveLoad: Cognitive load metrics
         """
         try:
             if not pupil_metrics or not blink_metrics:
@@ -154,18 +335,18 @@ class CognitiveLoadAnalyzer:
             
             # Calculate pupil load component
             pupil_load = (
-                pupil_metrics['relative_dilation'] * PUPIL_WEIGHT +
-                pupil_metrics['dilation_variability'] * VARIABILITY_WEIGHT
+                pupil_metrics.relative_dilation * PUPIL_WEIGHT +
+                pupil_metrics.dilation_variability * VARIABILITY_WEIGHT
             )
             
             # Calculate blink load component
             blink_load = (
-                (blink_metrics['blink_variability'] / blink_metrics['mean_blink_duration'])
-                * BLINK_WEIGHT if blink_metrics['mean_blink_duration'] > 0 else 0
+                (blink_metrics.blink_variability / blink_metrics.mean_blink_duration)
+                * BLINK_WEIGHT if blink_metrics.mean_blink_duration > 0 else 0
             )
             
             # Combine into overall cognitive load score (0-1 range)
-            cognitive_load = np.clip(pupil_load + blink_load, 0, 1)
+            cognitive_load = min(1.0, max(0.0, pupil_load + blink_load))
             
             # Determine load level
             if cognitive_load < 0.3:
@@ -175,12 +356,7 @@ class CognitiveLoadAnalyzer:
             else:
                 load_level = "High"
             
-            return {
-                'cognitive_load_score': cognitive_load,
-                'load_level': load_level,
-                'pupil_load_component': pupil_load,
-                'blink_load_component': blink_load
-            }
+            return CognitiveLoad(cognitive_load, load_level, pupil_load, blink_load)
             
         except Exception as e:
             self.logger.error(f"Error in calculate_cognitive_load: {str(e)}")
@@ -0,0 +1,321 @@
+import math
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+class GazeEventDetector:
+    """Incremental fixation, saccade and regression detector.
+
+    Gaze samples are fed one at a time through ``update``, which advances a
+    small state machine in constant time and returns the events completed by
+    that sample. Only a bounded window of recent events is retained, so the
+    per-sample cost does not depend on how long the session has been running.
+    """
+
+    IDLE = 'idle'
+    FIXATION = 'fixation'
+    SACCADE = 'saccade'
+
+    def __init__(self, fixation_threshold: float = 0.1, saccade_threshold: float = 0.2,
+                 min_fixation_duration: float = 0.2,
+                 regression_thresholds: Optional[Dict[str, float]] = None,
+                 vertical_threshold: float = 0.3, max_events: int = 100):
+        """Initialize the detector.
+
+        Args:
+            fixation_threshold (float): Maximum sample-to-sample movement inside a fixation
+            saccade_threshold (float): Minimum sample-to-sample movement of a saccade
+            min_fixation_duration (float): Minimum duration (seconds) of a reported fixation
+            regression_thresholds (dict): Backward distances for 'short', 'medium' and 'long' regressions
+            vertical_threshold (float): Vertical distance that counts as a line change
+            max_events (int): Number of recent fixations/saccades/regressions kept for inspection
+        """
+        self.fixation_threshold = fixation_threshold
+        self.saccade_threshold = saccade_threshold
+        self.min_fixation_duration = min_fixation_duration
+        self.regression_thresholds = regression_thresholds or {
+            'short': 0.15,
+            'medium': 0.3,
+            'long': 0.45
+        }
+        self.vertical_threshold = vertical_threshold
+
+        # Weights used to turn regression counts into a 0-1 severity score
+        self.severity_weights = {
+            'short': 0.5,
+            'medium': 1.0,
+            'long': 1.5,
+            'vertical': 1.5
+        }
+        # Pseudo-count of saccades so a single early regression does not saturate severity
+        self.severity_prior = 5
+
+        # Recent completed events
+        self.fixations = deque(maxlen=max_events)
+        self.saccades = deque(maxlen=max_events)
+        self.regressions = deque(maxlen=max_events)
+
+        # Running counts (kept in place so callers may hold a reference)
+        self.regression_patterns = {
+            'short': 0,
+            'medium': 0,
+            'long': 0,
+            'vertical': 0
+        }
+        self.reset()
+
+    def reset(self):
+        """Clear the state machine, recent events and running counts."""
+        self.state = self.IDLE
+        self.prev_x = None
+        self.prev_y = None
+        self.prev_time = None
+
+        # Current fixation
+        self._fix_start_time = None
+        self._fix_samples = 0
+        self._fix_sum_x = 0.0
+        self._fix_sum_y = 0.0
+        self._fix_stability = 1.0
+
+        # Current saccade
+        self._sac_start_time = None
+        self._sac_start = None
+        self._sac_peak_velocity = 0.0
+
+        self.fixations.clear()
+        self.saccades.clear()
+        self.regressions.clear()
+
+        self.fixation_count = 0
+        self.saccade_count = 0
+        self.regression_count = 0
+        for key in self.regression_patterns:
+            self.regression_patterns[key] = 0
+
+        self.last_regression_time = None
+        self._regression_interval_sum = 0.0
+        self._regression_interval_count = 0
+
+    def update(self, x: float, y: float, timestamp: float) -> List[Dict]:
+        """Feed one gaze sample and return the events it completed.
+
+        Args:
+            x (float): Horizontal gaze position
+            y (float): Vertical gaze position
+            timestamp (float): Sample time in seconds
+
+        Returns:
+            list: Completed fixation, saccade and regression events (often empty)
+        """
+        events = []
+        if self.prev_x is None:
+            self._set_previous(x, y, timestamp)
+            return events
+
+        dx = x - self.prev_x
+        dy = y - self.prev_y
+        movement = math.hypot(dx, dy)
+
+        if movement < self.fixation_threshold:
+            if self.state == self.SACCADE:
+                # The saccade landed on the previous sample
+                self._end_saccade(self.prev_x, self.prev_y, self.prev_time, events)
+            if self.state != self.FIXATION:
+                self._start_fixation(self.prev_x, self.prev_y, self.prev_time)
+            else:
+                self._fix_stability *= max(0.0, 1.0 - movement)
+            self._fix_samples += 1
+            self._fix_sum_x += x
+            self._fix_sum_y += y
+        elif movement > self.saccade_threshold:
+            if self.state == self.FIXATION:
+                self._end_fixation(timestamp, events)
+            if self.state != self.SACCADE:
+                self.state = self.SACCADE
+                self._sac_start_time = self.prev_time
+                self._sac_start = (self.prev_x, self.prev_y)
+                self._sac_peak_velocity = 0.0
+            dt = timestamp - self.prev_time
+            if dt > 0:
+                self._sac_peak_velocity = max(self._sac_peak_velocity, movement / dt)
+        else:
+            # Drift between the two thresholds ends whatever was in progress
+            if self.state == self.FIXATION:
+                self._end_fixation(timestamp, events)
+            elif self.state == self.SACCADE:
+                self._end_saccade(x, y, timestamp, events)
+            self.state = self.IDLE
+
+        self._set_previous(x, y, timestamp)
+        return events
+
+    def gap(self) -> List[Dict]:
+        """Mark a gap in the gaze, e.g. lost tracking, and return the events it completed.
+
+        A fixation in progress ends at the last sample before the gap and a
+        saccade in progress is dropped, as where it landed is unknown. The next
+        sample starts afresh instead of being compared with the one before
+        the gap.
+        """
+        events = []
+        if self.state == self.FIXATION:
+            self._end_fixation(self.prev_time, events)
+        self.state = self.IDLE
+        self.prev_x = None
+        self.prev_y = None
+        self.prev_time = None
+        return events
+
+    def get_regression_summary(self, current_time: Optional[float] = None) -> Dict:
+        """Return running regression statistics.
+
+        Args:
+            current_time (float): Optional time used to report time since the last regression
+
+        Returns:
+            dict: Regression counts per category, frequency and severity
+        """
+        if self._regression_interval_count > 0:
+            avg_frequency = self._regression_interval_sum / self._regression_interval_count
+        else:
+            avg_frequency = float('inf')
+
+        weighted = sum(self.severity_weights[k] * v for k, v in self.regression_patterns.items())
+        severity = min(1.0, weighted / (self.saccade_count + self.severity_prior))
+
+        time_since_last = float('inf')
+        if current_time is not None and self.last_regression_time is not None:
+            time_since_last = current_time - self.last_regression_time
+
+        return {
+            'regression_patterns': dict(self.regression_patterns),
+            'total_regressions': self.regression_count,
+            'regression_rate': self.regression_count / self.saccade_count if self.saccade_count else 0.0,
+            'avg_regression_frequency': avg_frequency,
+            'time_since_last_regression': time_since_last,
+            'regression_severity': severity
+        }
+
+    def _set_previous(self, x: float, y: float, timestamp: float):
+        self.prev_x = x
+        self.prev_y = y
+        self.prev_time = timestamp
+
+    def _start_fixation(self, x: float, y: float, timestamp: float):
+        self.state = self.FIXATION
+        self._fix_start_time = timestamp
+        self._fix_samples = 1
+        self._fix_sum_x = x
+        self._fix_sum_y = y
+        self._fix_stability = 1.0
+
+    def _end_fixation(self, timestamp: float, events: List[Dict]):
+        """Close the current fixation and emit it if it lasted long enough"""
+        self.state = self.IDLE
+        duration = timestamp - self._fix_start_time
+        if duration < self.min_fixation_duration:
+            return
+
+        fixation = {
+            'event': 'fixation',
+            'start_time': self._fix_start_time,
+            'end_time': timestamp,
+            'duration': duration,
+            'position': (self._fix_sum_x / self._fix_samples, self._fix_sum_y / self._fix_samples),
+            'sample_count': self._fix_samples,
+            'stability': self._fix_stability,
+            'average_stability': self._fix_stability / self._fix_samples
+        }
+        self.fixation_count += 1
+        self.fixations.append(fixation)
+        events.append(fixation)
+
+    def _end_saccade(self, x: float, y: float, timestamp: float, events: List[Dict]):
+        """Close the current saccade, classify it and emit it"""
+        self.state = self.IDLE
+        start_x, start_y = self._sac_start
+        dx = x - start_x
+        dy = y - start_y
+        length = math.hypot(dx, dy)
+        duration = timestamp - self._sac_start_time
+        category = self._classify_regression(dx, dy)
+
+        if category is not None:
+            saccade_type = 'regression'
+        elif dx < 0 and dy > self.vertical_threshold:
+            saccade_type = 'return_sweep'
+        else:
+            saccade_type = 'normal'
+
+        saccade = {
+            'event': 'saccade',
+            'start_time': self._sac_start_time,
+            'end_time': timestamp,
+            'timestamp': timestamp,
+            'duration': duration,
+            'start_position': self._sac_start,
+            'end_position': (x, y),
+            'length': length,
+            'horizontal_movement': dx,
+            'vertical_movement': dy,
+            'direction': 'backward' if dx < 0 else 'forward',
+            'type': saccade_type,
+            'velocity': length / duration if duration > 0 else 0.0,
+            'peak_velocity': self._sac_peak_velocity
+        }
+        self.saccade_count += 1
+        self.saccades.append(saccade)
+        events.append(saccade)
+
+        if category is not None:
+            self._record_regression(category, saccade, events)
+
+    def _classify_regression(self, dx: float, dy: float) -> Optional[str]:
+        """Return the regression category of a saccade, or None for forward reading"""
+        if dy < -self.vertical_threshold:
+            # Jumped back up to an earlier line
+            return 'vertical'
+        if dx >= 0 or dy > self.vertical_threshold:
+            # Forward saccade or return sweep to the next line
+            return None
+
+        distance = -dx
+        if distance >= self.regression_thresholds['long']:
+            return 'long'
+        if distance >= self.regression_thresholds['medium']:
+            return 'medium'
+        if distance >= self.regression_thresholds['short']:
+            return 'short'
+        return None
+
+    def _record_regression(self, category: str, saccade: Dict, events: List[Dict]):
+        timestamp = saccade['end_time']
+        interval = None
+        if self.last_regression_time is not None:
+            interval = timestamp - self.last_regression_time
+            self._regression_interval_sum += interval
+            self._regression_interval_count += 1
+        self.last_regression_time = timestamp
+
+        self.regression_count += 1
+        self.regression_patterns[category] += 1
+
+        regression = {
+            'event': 'regression',
+            'category': category,
+            'timestamp': timestamp,
+            'amplitude': saccade['length'],
+            'horizontal_movement': saccade['horizontal_movement'],
+            'vertical_movement': saccade['vertical_movement'],
+            'interval': interval
+        }
+        self.regressions.append(regression)
+        events.append(regression)
+
+    @property
+    def current_fixation(self) -> Optional[Tuple[float, float]]:
+        """Centroid of the fixation in progress, if any"""
+        if self.state != self.FIXATION or self._fix_samples == 0:
+            return None
+        return (self._fix_sum_x / self._fix_samples, self._fix_sum_y / self._fix_samples)
@@ -6,17 +6,46 @@ import math
 from collections import deque
 import time
 from .cognitive_load_analyzer import CognitiveLoadAnalyzer
+from .gaze_filters import create_gaze_filter
+from .records import EyeSample, Fixation, SaccadeSample
+from .rolling_stats import ExponentialMovingAverage, RollingWelford
+from .session_recorder import SessionRecorder
+
+# Eye landmarks of a frame without a face
+_NO_EYE = np.zeros((1, 2))
+_NO_EYE.flags.writeable = False
+
+def create_face_mesh():
+    """Create the MediaPipe FaceMesh used for tracking"""
+    return mp.solutions.face_mesh.FaceMesh(
+        max_num_faces=1,
+        refine_landmarks=True,
+        min_detection_confidence=0.7,  # Increased confidence threshold
+        min_tracking_confidence=0.7
+    )
 
 class EyeTracker:
-    def __init__(self):
+    def __init__(self, history_seconds: float = 60.0, clock=None, face_mesh=None,
+                 gaze_filter: Optional[Dict] = None):
+        """Initialize the eye tracker.
+        
+        Args:
+            history_seconds (float): How much per-frame history to retain; older
+                samples are dropped so long sessions use constant memory
+            clock (callable): Returns the current time in seconds; defaults to time.time
+            face_mesh: Shared FaceMesh to use instead of creating one; the caller
+                keeps ownership and closes it
+            gaze_filter (dict): Gaze filter configuration for create_gaze_filter,
+                e.g. {'type': 'one_euro'}; None leaves the gaze unfiltered
+        """
+        self.clock = clock or time.time
         self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.7,  # Increased confidence threshold
-            min_tracking_confidence=0.7
-        )
+        # Created on the first camera frame unless shared; replayed landmarks do not need it
+        self.face_mesh = face_mesh
+        self.owns_face_mesh = face_mesh is None
         self.mp_drawing = mp.solutions.drawing_utils
+        self.recorder = None
+        self.stage_times = {}  # Seconds spent in each stage of the last frame
         
         # Enhanced eye landmark indices for better accuracy
         self.LEFT_EYE_INDICES = [33, 246, 161, 160, 159, 158, 157, 173, 133, 155, 154, 153, 145, 144, 163, 7]
@@ -37,28 +66,49 @@ class EyeTracker:
         self.blink_frames = deque(maxlen=15)  # Increased buffer
         self.min_blink_frames = 3
         self.blink_history = deque(maxlen=300)  # 10 seconds at 30fps
+        self.recent_blinks = deque()  # Blink timestamps within the last minute
+        self.first_blink_time = None
         
         # Enhanced gaze tracking parameters
         self.gaze_history = deque(maxlen=10)
         self.smoothing_factor = 0.4
         self.gaze_stability_threshold = 0.1
-        
-        # Data collection for ML
-        self.frame_timestamps = []
-        self.eye_metrics = {
-            'fixations': [],
-            'saccades': [],
-            'blinks': [],
-            'gaze_positions': [],
-            'pupil_sizes': []
-        }
+        self.default_gaze_filter = gaze_filter
+        self.set_gaze_filter(gaze_filter)
         
         # Frame processing
         self.frame_count = 0
         self.last_landmarks = None
         self.last_eye_data = None
         self.frame_shape = None
-        self.fps = 30.0  # Assumed fps
+        self.fps = 30.0  # Assumed until measured from frame timestamps
+        self.frame_interval = ExponentialMovingAverage(0.1)
+        self.last_frame_time = None
+        self.max_frame_gap = 1.0  # Longer gaps are pauses, not the frame rate
+        
+        # Data collection for ML, bounded to the retention window
+        self.history_seconds = history_seconds
+        self.max_history = int(history_seconds * self.fps)
+        self.session_start_time = None
+        self.frame_timestamps = deque(maxlen=self.max_history)
+        self.eye_metrics = {
+            'fixations': deque(maxlen=self.max_history),
+            'saccades': deque(maxlen=self.max_history),
+            'blinks': deque(maxlen=self.max_history),
+            'gaze_positions': deque(maxlen=self.max_history),
+            'pupil_sizes': deque(maxlen=self.max_history),
+            'cognitive_load_score': 0.0,
+            'pupil_load': 0.0,
+            'blink_load': 0.0
+        }
+        
+        # Running aggregates over the whole session, so feature extraction
+        # does not depend on how much history is retained
+        self.fixation_total = 0
+        self.fixation_duration_sum = 0.0
+        self.saccade_total = 0
+        self.saccade_velocity_sum = 0.0
+        self.pupil_stats = RollingWelford()
         
         # Initialize feature extraction parameters
         self.min_fixation_duration = 0.1  # 100ms
@@ -79,23 +129,50 @@ class EyeTracker:
         if frame is None:
             return None, {}
 
+        timestamp = self.clock()
+
+        # Process frame with MediaPipe
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        start = time.perf_counter()
+        face_landmarks = self._detect_landmarks_rgb(rgb_frame)
+        self.stage_times['facemesh'] = time.perf_counter() - start
+        frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+        
+        if self.recorder is not None:
+            self.recorder.write(timestamp, frame.shape[:2], face_landmarks)
+        
+        return frame, self.process_landmarks(face_landmarks, frame.shape[:2], timestamp, frame)
+
+    def process_landmarks(self, face_landmarks, frame_shape: Tuple[int, int],
+                          timestamp: Optional[float] = None, frame: Optional[np.ndarray] = None) -> Dict:
+        """Compute eye metrics from face-mesh landmarks.
+        
+        Args:
+            face_landmarks: MediaPipe face landmarks, an (N, 2) array of normalized
+                landmark coordinates, or None when no face was detected
+            frame_shape (tuple): (height, width) of the captured frame
+            timestamp (float): Capture time in seconds; defaults to the clock
+            frame (np.ndarray): Optional frame to draw the visualizations on
+        
+        Returns:
+            EyeSample: Eye metrics for the frame
+        """
+        if timestamp is None:
+            timestamp = self.clock()
         self.frame_count += 1
-        timestamp = time.time()
         self.frame_timestamps.append(timestamp)
+        self._update_fps(timestamp)
+        if self.session_start_time is None:
+            self.session_start_time = timestamp
         
         # Store frame shape for coordinate conversion
         if self.frame_shape is None:
-            self.frame_shape = frame.shape[:2]
-
-        # Process frame with MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb_frame)
-        frame = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2BGR)
+            self.frame_shape = tuple(frame_shape[:2])
         
-        if not results.multi_face_landmarks:
-            return frame, self._get_empty_metrics()
+        if face_landmarks is None:
+            self.last_eye_data = self._get_empty_metrics(timestamp)
+            return self.last_eye_data
         
-        face_landmarks = results.multi_face_landmarks[0]
         
         # Extract eye landmarks and metrics
         left_eye = self._extract_eye_landmarks(face_landmarks, self.LEFT_EYE_INDICES)
@@ -110,41 +187,77 @@ class EyeTracker:
         is_blink = self._detect_blink(avg_ear)
         if is_blink:
             self.blink_history.append(timestamp)
+            self.recent_blinks.append(timestamp)
+            if self.first_blink_time is None:
+                self.first_blink_time = timestamp
         
         # Calculate gaze metrics
-        left_gaze = self._calculate_gaze_direction(left_eye)
-        right_gaze = self._calculate_gaze_direction(right_eye)
+        left_gaze = self.left_gaze_filter(*self._calculate_gaze_direction(left_eye), timestamp)
+        right_gaze = self.right_gaze_filter(*self._calculate_gaze_direction(right_eye), timestamp)
         
         # Calculate pupil size
         left_pupil_size = self._calculate_pupil_size(left_eye)
         right_pupil_size = self._calculate_pupil_size(right_eye)
         
         # Store metrics for ML
-        metrics = {
-            'timestamp': timestamp,
-            'left_eye': left_eye,
-            'right_eye': right_eye,
-            'left_ear': left_ear,
-            'right_ear': right_ear,
-            'avg_ear': avg_ear,
-            'is_blink': is_blink,
-            'left_gaze': left_gaze,
-            'right_gaze': right_gaze,
-            'left_pupil_size': left_pupil_size,
-            'right_pupil_size': right_pupil_size,
-            'gaze_stability': self._calculate_gaze_stability(),
-            'blink_rate': self._calculate_blink_rate(timestamp)
-        }
+        metrics = EyeSample(timestamp, left_eye, right_eye, left_ear, right_ear, avg_ear, is_blink,
+                            left_gaze, right_gaze, left_pupil_size, right_pupil_size,
+                            self._calculate_gaze_stability(), self._calculate_blink_rate(timestamp))
         
         self._update_ml_features(metrics)
+        cognitive = self.cognitive_metrics
+        metrics.cognitive_load_score = cognitive['cognitive_load_score']
+        metrics.pupil_load = cognitive['pupil_load']
+        metrics.blink_load = cognitive['blink_load']
         
         # Draw visualizations
-        self._draw_face_mesh(frame, face_landmarks)
-        self._draw_eye_landmarks(frame, left_eye, right_eye)
-        self._draw_blink_status(frame, is_blink)
-        self._draw_gaze_direction(frame, left_eye, right_eye, left_gaze, right_gaze)
-        
-        return frame, metrics
+        if frame is not None:
+            if not isinstance(face_landmarks, np.ndarray):
+                self._draw_face_mesh(frame, face_landmarks)
+            self._draw_eye_landmarks(frame, left_eye, right_eye)
+            self._draw_blink_status(frame, is_blink)
+            self._draw_gaze_direction(frame, left_eye, right_eye, left_gaze, right_gaze)
+        
+        self.last_eye_data = metrics
+        return metrics
+
+    def set_gaze_filter(self, config: Optional[Dict]):
+        """Filter each eye's gaze direction with a new filter from config (see create_gaze_filter).
+
+        Raises:
+            ValueError: On an invalid configuration
+        """
+        left, right = create_gaze_filter(config), create_gaze_filter(config)
+        self.gaze_filter_config = config
+        self.left_gaze_filter, self.right_gaze_filter = left, right
+
+    def _update_fps(self, timestamp: float):
+        """Measure the frame rate, used for saccade velocities, from frame timestamps"""
+        if self.last_frame_time is not None:
+            dt = timestamp - self.last_frame_time
+            if 0 < dt < self.max_frame_gap:
+                self.fps = 1.0 / self.frame_interval.update(dt)
+        self.last_frame_time = timestamp
+
+    def detect_landmarks(self, frame: np.ndarray):
+        """Run FaceMesh on a BGR frame and return the face landmarks, or None"""
+        return self._detect_landmarks_rgb(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def _detect_landmarks_rgb(self, rgb_frame: np.ndarray):
+        if self.face_mesh is None:
+            self.face_mesh = create_face_mesh()
+        results = self.face_mesh.process(rgb_frame)
+        return results.multi_face_landmarks[0] if results.multi_face_landmarks else None
+
+    def start_recording(self, path: str):
+        """Record landmarks and capture timestamps of processed frames to a file"""
+        self.stop_recording()
+        self.recorder = SessionRecorder(path, self.LEFT_EYE_INDICES + self.RIGHT_EYE_INDICES)
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
     def _draw_face_mesh(self, frame: np.ndarray, face_landmarks) -> None:
         """Draw face mesh with improved visibility"""
@@ -316,15 +429,14 @@ class EyeTracker:
         landmarks = []
         
         try:
-            # Extract iris landmarks first (first 4 points)
-            for idx in indices[:4]:
-                point = face_landmarks.landmark[idx]
-                landmarks.append([int(point.x * w), int(point.y * h)])
-                
-            # Then extract eye contour landmarks
-            for idx in indices[4:]:
-                point = face_landmarks.landmark[idx]
-                landmarks.append([int(point.x * w), int(point.y * h)])
+            # Iris landmarks come first (first 4 points), then the eye contour
+            if isinstance(face_landmarks, np.ndarray):
+                points = face_landmarks[indices]
+            else:
+                points = [(face_landmarks.landmark[idx].x, face_landmarks.landmark[idx].y)
+                          for idx in indices]
+            for x, y in points:
+                landmarks.append([int(float(x) * w), int(float(y) * h)])
         except (IndexError, AttributeError):
             return np.zeros((1, 2))
             
@@ -365,10 +477,26 @@ class EyeTracker:
             if right_center:
                 draw_eye_gaze(right_center, right_gaze, (0, 255, 0))
 
+    def reset(self):
+        """Return to the state of a new tracker, keeping the FaceMesh graph.
+        
+        Lets pooled analyzers be reused across sessions without paying for
+        FaceMesh initialization again.
+        """
+        self.stop_recording()
+        face_mesh, owns_face_mesh = self.face_mesh, self.owns_face_mesh
+        self.__init__(self.history_seconds, self.clock, face_mesh, self.default_gaze_filter)
+        self.owns_face_mesh = owns_face_mesh
+        if face_mesh is not None and owns_face_mesh:
+            # Forget the previous session's face tracking
+            face_mesh.reset()
+
     def release(self):
         """Release resources"""
-        if hasattr(self, 'face_mesh'):
+        self.stop_recording()
+        if self.face_mesh is not None and self.owns_face_mesh:
             self.face_mesh.close()
+        self.face_mesh = None
         cv2.destroyAllWindows()
 
     def _calculate_pupil_size(self, eye_landmarks: np.ndarray) -> float:
@@ -393,12 +521,14 @@ class EyeTracker:
         if len(self.blink_history) < 2:
             return 0.0
             
-        # Count blinks in the last minute
+        # Drop blinks older than a minute; amortized O(1) per frame
         one_minute_ago = current_time - 60
-        recent_blinks = sum(1 for t in self.blink_history if t > one_minute_ago)
+        while self.recent_blinks and self.recent_blinks[0] <= one_minute_ago:
+            self.recent_blinks.popleft()
+        recent_blinks = len(self.recent_blinks)
         
         # Calculate rate based on available time window
-        time_window = min(60.0, current_time - self.blink_history[0])
+        time_window = min(60.0, current_time - self.first_blink_time)
         if time_window <= 0:
             return 0.0
             
@@ -469,37 +599,38 @@ class EyeTracker:
                 left_pupil,
                 right_pupil
             ))
+            self.pupil_stats.update(left_pupil)
             
             # Update fixations and saccades
             if len(self.eye_metrics['gaze_positions']) >= 2:
                 try:
-                    prev_gaze = np.array(self.eye_metrics['gaze_positions'][-2])
-                    curr_gaze = np.array(self.eye_metrics['gaze_positions'][-1])
+                    prev_gaze = self.eye_metrics['gaze_positions'][-2]
+                    curr_gaze = self.eye_metrics['gaze_positions'][-1]
+                    amplitude = math.hypot(curr_gaze[0] - prev_gaze[0], curr_gaze[1] - prev_gaze[1])
                     
                     # Detect saccade
-                    velocity = np.linalg.norm(curr_gaze - prev_gaze) * self.fps
+                    velocity = amplitude * self.fps
+                    fixations = self.eye_metrics['fixations']
                     if velocity > self.saccade_threshold:
-                        self.eye_metrics['saccades'].append({
-                            'timestamp': metrics['timestamp'],
-                            'velocity': float(velocity),
-                            'amplitude': float(np.linalg.norm(curr_gaze - prev_gaze))
-                        })
+                        self.eye_metrics['saccades'].append(
+                            SaccadeSample(metrics['timestamp'], float(velocity), float(amplitude)))
+                        self.saccade_total += 1
+                        self.saccade_velocity_sum += velocity
                     # Detect fixation
-                    elif len(self.eye_metrics['fixations']) == 0 or \
-                         metrics['timestamp'] - self.eye_metrics['fixations'][-1]['end_time'] > self.min_fixation_duration:
-                        self.eye_metrics['fixations'].append({
-                            'start_time': metrics['timestamp'],
-                            'end_time': metrics['timestamp'],
-                            'position': curr_gaze
-                        })
+                    elif len(fixations) == 0 or \
+                         metrics['timestamp'] - fixations[-1].end_time > self.min_fixation_duration:
+                        fixations.append(Fixation(metrics['timestamp'], metrics['timestamp'], curr_gaze))
+                        self.fixation_total += 1
                     else:
-                        self.eye_metrics['fixations'][-1]['end_time'] = metrics['timestamp']
+                        fixation = fixations[-1]
+                        self.fixation_duration_sum += metrics['timestamp'] - fixation.end_time
+                        fixation.end_time = metrics['timestamp']
                 except (TypeError, ValueError, IndexError):
                     # Skip this update if there's an error
                     pass
             
             # Update cognitive load metrics
-            timestamp = time.time()
+            timestamp = metrics['timestamp']
             
             # Calculate average pupil size from the tuple
             pupil_size_tuple = self.eye_metrics['pupil_sizes'][-1] if self.eye_metrics['pupil_sizes'] else (0.0, 0.0)
@@ -526,12 +657,12 @@ class EyeTracker:
                 )
                 
                 if cognitive_load:
-                    self.cognitive_metrics = {
-                        'cognitive_load_score': cognitive_load['cognitive_load_score'],
-                        'load_level': cognitive_load['load_level'],
-                        'pupil_load': cognitive_load['pupil_load_component'],
-                        'blink_load': cognitive_load['blink_load_component']
-                    }
+                    # Updated in place; get_cognitive_metrics hands out this dict
+                    cognitive = self.cognitive_metrics
+                    cognitive['cognitive_load_score'] = cognitive_load.cognitive_load_score
+                    cognitive['load_level'] = cognitive_load.load_level
+                    cognitive['pupil_load'] = cognitive_load.pupil_load_component
+                    cognitive['blink_load'] = cognitive_load.blink_load_component
             
             # Add cognitive metrics to ML features
             self.eye_metrics['cognitive_load_score'] = self.cognitive_metrics['cognitive_load_score']
@@ -542,63 +673,37 @@ class EyeTracker:
             print(f"Error in _update_ml_features: {str(e)}")
             pass
 
-    def _get_empty_metrics(self) -> Dict:
-        """Return empty metrics structure"""
-        return {
-            'timestamp': time.time(),
-            'left_eye': np.zeros((1, 2)),
-            'right_eye': np.zeros((1, 2)),
-            'left_ear': 0.0,
-            'right_ear': 0.0,
-            'avg_ear': 0.0,
-            'is_blink': False,
-            'left_gaze': (0, 0),
-            'right_gaze': (0, 0),
-            'left_pupil_size': 0.0,
-            'right_pupil_size': 0.0,
-            'gaze_stability': 1.0,
-            'blink_rate': 0.0,
-            'cognitive_load_score': 0.0,
-            'pupil_load': 0.0,
-            'blink_load': 0.0
-        }
+    def _get_empty_metrics(self, timestamp: Optional[float] = None) -> EyeSample:
+        """Return the metrics of a frame without a face; the eye arrays are shared and read-only"""
+        return EyeSample(self.clock() if timestamp is None else timestamp, _NO_EYE, _NO_EYE,
+                         0.0, 0.0, 0.0, False, (0, 0), (0, 0), 0.0, 0.0, 1.0, 0.0, face_detected=False)
 
     def get_ml_features(self) -> Dict:
         """Get collected features for machine learning"""
         try:
-            # Calculate fixation metrics
-            fixation_count = len(self.eye_metrics['fixations'])
+            # Fixation and saccade metrics from running aggregates
+            fixation_count = self.fixation_total
             avg_fixation_duration = 0.0
-            if self.eye_metrics['fixations']:
-                durations = [f['end_time'] - f['start_time'] for f in self.eye_metrics['fixations']]
-                avg_fixation_duration = float(np.mean(durations)) if durations else 0.0
+            if fixation_count:
+                avg_fixation_duration = self.fixation_duration_sum / fixation_count
             
-            # Calculate saccade metrics
-            saccade_count = len(self.eye_metrics['saccades'])
+            saccade_count = self.saccade_total
             avg_saccade_velocity = 0.0
-            if self.eye_metrics['saccades']:
-                velocities = [float(s['velocity']) for s in self.eye_metrics['saccades']]
-                avg_saccade_velocity = float(np.mean(velocities)) if velocities else 0.0
+            if saccade_count:
+                avg_saccade_velocity = self.saccade_velocity_sum / saccade_count
             
             # Calculate blink rate
             blink_rate = 0.0
-            if self.frame_timestamps and len(self.frame_timestamps) > 1:
-                time_span = time.time() - self.frame_timestamps[0]
+            if self.session_start_time is not None and len(self.frame_timestamps) > 1:
+                time_span = self.clock() - self.session_start_time
                 if time_span > 0:
                     blink_rate = float(len(self.blink_history) / time_span * 60)
             
             # Calculate gaze stability
             gaze_stability = self._calculate_gaze_stability()
             
-            # Calculate pupil size variability
-            pupil_size_variability = 0.0
-            if self.eye_metrics['pupil_sizes']:
-                try:
-                    # Extract left pupil sizes (first element of each tuple)
-                    left_pupil_sizes = [float(p[0]) for p in self.eye_metrics['pupil_sizes']]
-                    pupil_size_variability = float(np.std(left_pupil_sizes)) if left_pupil_sizes else 0.0
-                except (TypeError, IndexError, ValueError):
-                    pupil_size_variability = 0.0
+            # Left pupil size variability over the session
+            pupil_size_variability = self.pupil_stats.std
             
             return {
                 'fixation_count': int(fixation_count),
@@ -0,0 +1,114 @@
+"""
+Incremental gaze heat map.
+
+``GazeHeatmap`` is a fixed-resolution 2D histogram over the frame in
+normalized coordinates. Each sample adds one to a single bin, so the map is
+always current and costs the same per sample however long the session runs;
+there is nothing to rebuild from the raw gaze afterwards.
+
+Rendering (blur, color map, blending over a background and PNG encoding) is
+done on demand, and the PNG is cached until a sample arrives or the
+rendering parameters change.
+"""
+
+from typing import Callable, Hashable, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+
+
+class GazeHeatmap:
+    """Histogram of gaze positions on a bins_x by bins_y grid over the frame."""
+
+    def __init__(self, bins_x: int = 128, bins_y: int = 96):
+        self.bins_x = bins_x
+        self.bins_y = bins_y
+        self.counts = np.zeros((bins_y, bins_x), dtype=np.float64)
+        self.samples = 0  # Samples inside the frame
+        self.outside = 0  # Samples that fell off the frame
+        self.version = 0  # Changes whenever the counts do
+        self._png_key = None
+        self._png = None
+
+    def reset(self):
+        self.counts.fill(0.0)
+        self.samples = 0
+        self.outside = 0
+        self.version += 1
+
+    def add(self, x: float, y: float) -> bool:
+        """Add a sample at normalized frame position (x, y), both in [0, 1).
+
+        Returns:
+            bool: Whether the sample fell inside the frame
+        """
+        ix = int(x * self.bins_x) if x >= 0 else -1
+        iy = int(y * self.bins_y) if y >= 0 else -1
+        if ix < 0 or iy < 0 or ix >= self.bins_x or iy >= self.bins_y:
+            self.outside += 1
+            return False
+        self.counts[iy, ix] += 1.0
+        self.samples += 1
+        self.version += 1
+        return True
+
+    def add_many(self, x: Sequence[float], y: Sequence[float]) -> int:
+        """Add a batch of normalized positions; returns how many fell inside the frame"""
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        inside = (x >= 0) & (x < 1) & (y >= 0) & (y < 1)
+        ix = np.minimum((x[inside] * self.bins_x).astype(np.intp), self.bins_x - 1)
+        iy = np.minimum((y[inside] * self.bins_y).astype(np.intp), self.bins_y - 1)
+        np.add.at(self.counts, (iy, ix), 1.0)
+        added = int(inside.sum())
+        self.samples += added
+        self.outside += len(x) - added
+        self.version += 1
+        return added
+
+    def render(self, width: int, height: int, background: Optional[np.ndarray] = None,
+               blur_sigma: float = 1.5, opacity: float = 0.7,
+               colormap: int = cv2.COLORMAP_JET) -> np.ndarray:
+        """Color-mapped heat over a background.
+
+        Args:
+            width (int): Output width in pixels
+            height (int): Output height in pixels
+            background (np.ndarray): BGR image of the output size; black if None
+            blur_sigma (float): Gaussian blur of the histogram, in bins
+            opacity (float): Opacity of the hottest bin; cooler bins fade out
+
+        Returns:
+            np.ndarray: BGR image
+        """
+        out = np.zeros((height, width, 3), dtype=np.uint8) if background is None else background.copy()
+        heat = self.counts
+        if blur_sigma > 0:
+            heat = cv2.GaussianBlur(heat, (0, 0), blur_sigma)
+        peak = heat.max()
+        if peak <= 0:
+            return out
+        heat = cv2.resize((heat / peak).astype(np.float32), (width, height), interpolation=cv2.INTER_LINEAR)
+        heat = np.clip(heat, 0.0, 1.0)
+        colors = cv2.applyColorMap((heat * 255).astype(np.uint8), colormap)
+        alpha = (heat * opacity)[:, :, None]
+        return (out * (1.0 - alpha) + colors * alpha).astype(np.uint8)
+
+    def render_png(self, width: int, height: int,
+                   background: Union[np.ndarray, Callable[[], np.ndarray], None] = None,
+                   background_key: Hashable = None, **options) -> bytes:
+        """PNG of render(), cached until a sample arrives or the arguments change.
+
+        background_key identifies the background image, as comparing images
+        on every request would cost as much as rendering. The background may
+        be a function drawing it, which is only called on a cache miss.
+        """
+        key = (self.version, width, height, background_key, tuple(sorted(options.items())))
+        if key != self._png_key:
+            if callable(background):
+                background = background()
+            ok, buffer = cv2.imencode('.png', self.render(width, height, background, **options))
+            if not ok:
+                raise ValueError("Could not encode the heat map")
+            self._png, self._png_key = buffer.tobytes(), key
+        return self._png
+
@@ -0,0 +1,207 @@
+import cv2
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+
+class OverlayLayer:
+    """A cached BGRA layer blended onto a fixed region of the frame.
+
+    The blend terms (``255 - alpha`` and ``color * alpha``) are computed when
+    the layer content changes, cropped to the bounding box of its visible
+    pixels. The per-frame blend is then two saturating OpenCV operations
+    applied in place to that region of interest only.
+    """
+
+    def __init__(self, x: int, y: int, width: int, height: int):
+        self.x = x
+        self.y = y
+        self.bgra = np.zeros((height, width, 4), dtype=np.uint8)
+        self._box = None
+        self._inv_alpha = None
+        self._premultiplied = None
+
+    def commit(self):
+        """Recompute the blend terms after drawing into ``bgra``"""
+        alpha = np.ascontiguousarray(self.bgra[:, :, 3])
+        x, y, w, h = cv2.boundingRect(alpha)
+        if w == 0 or h == 0:
+            self._box = None
+            return
+
+        alpha = alpha[y:y + h, x:x + w]
+        alpha3 = cv2.merge([alpha, alpha, alpha])
+        self._box = (self.x + x, self.y + y, w, h)
+        self._inv_alpha = cv2.bitwise_not(alpha3)
+        self._premultiplied = cv2.multiply(
+            np.ascontiguousarray(self.bgra[y:y + h, x:x + w, :3]), alpha3, scale=1 / 255.0)
+
+    def blend(self, frame: np.ndarray):
+        """Alpha-blend the layer onto its region of the frame in place"""
+        if self._box is None:
+            return
+        x, y, w, h = self._box
+        roi = frame[y:y + h, x:x + w]
+        cv2.multiply(roi, self._inv_alpha, dst=roi, scale=1 / 255.0)
+        cv2.add(roi, self._premultiplied, dst=roi)
+
+
+class OverlayCompositor:
+    """Renders the reading text and metrics HUD from cached layers.
+
+    The reading text is pre-rendered once per (text, resolution) into a BGRA
+    layer covering only the text band. HUD labels are pre-rendered once per
+    (layout, resolution); the dynamic values are redrawn onto a copy of that
+    layer at most ``hud_refresh_hz`` times per second and the cached result
+    is blended on the frames in between.
+    """
+
+    def __init__(self, font: int = cv2.FONT_HERSHEY_DUPLEX, hud_refresh_hz: float = 5.0,
+                 hud_scale: float = 0.7, hud_thickness: int = 2):
+        """Initialize the compositor.
+
+        Args:
+            font (int): OpenCV font face
+            hud_refresh_hz (float): Maximum rate at which HUD values are redrawn
+            hud_scale (float): Font scale of HUD text
+            hud_thickness (int): Stroke thickness of HUD text
+        """
+        self.font = font
+        self.hud_refresh_hz = hud_refresh_hz
+        self.hud_scale = hud_scale
+        self.hud_thickness = hud_thickness
+
+        self._text_key = None
+        self._text_layer = None
+
+        self._hud_key = None
+        self._hud_static = None
+        self._hud_layer = None
+        self._hud_value_positions = []
+        self._last_hud_refresh = None
+
+    def draw_text(self, frame: np.ndarray, lines: Sequence[str], origin_y: int, line_spacing: int,
+                  scale: float, thickness: int, background_alpha: float = 0.7):
+        """Blend the reading text, centered on a dark band, onto the frame"""
+        h, w = frame.shape[:2]
+        key = (tuple(lines), w, h, origin_y, line_spacing, scale, thickness, background_alpha)
+        if key != self._text_key:
+            self._text_layer = self._render_text_layer(lines, w, h, origin_y, line_spacing,
+                                                       scale, thickness, background_alpha)
+            self._text_key = key
+        if self._text_layer is not None:
+            self._text_layer.blend(frame)
+
+    def _render_text_layer(self, lines, w, h, origin_y, line_spacing, scale, thickness,
+                           background_alpha) -> Optional[OverlayLayer]:
+        top = max(0, origin_y - 40)
+        bottom = min(h, origin_y + len(lines) * line_spacing + 50)
+        if bottom <= top:
+            return None
+
+        layer = OverlayLayer(0, top, w, bottom - top)
+        layer.bgra[:, :, 3] = int(round(background_alpha * 255))  # Black background
+
+        y = origin_y - top
+        for line in lines:
+            (text_width, _), _ = cv2.getTextSize(line, self.font, scale, thickness)
+            x = (w - text_width) // 2
+            cv2.putText(layer.bgra, line, (x, y), self.font, scale,
+                        (0, 0, 0, 255), thickness + 2, cv2.LINE_AA)  # Black outline
+            cv2.putText(layer.bgra, line, (x, y), self.font, scale,
+                        (255, 255, 255, 255), thickness, cv2.LINE_AA)  # White text
+            y += line_spacing
+
+        layer.commit()
+        return layer
+
+    def draw_hud(self, frame: np.ndarray, rows: Sequence[Tuple[str, Tuple[int, int]]],
+                 values: Sequence[Tuple[str, Tuple[int, int, int]]], now: float,
+                 bar: Optional[Tuple[int, int, float, Tuple[int, int, int]]] = None,
+                 label_color: Tuple[int, int, int] = (255, 255, 255)):
+        """Blend the HUD onto the frame, redrawing values if a refresh is due.
+
+        Args:
+            frame (np.ndarray): Frame to draw on
+            rows (sequence): Static (label, (x, y)) entries; the layout cache key
+            values (sequence): (text, color) drawn after each label
+            now (float): Current time in seconds
+            bar (tuple): Optional (x, y, fraction, color) load bar
+            label_color (tuple): Color of the static labels
+        """
+        h, w = frame.shape[:2]
+        key = (tuple(rows), w, h, label_color)
+        rebuilt = key != self._hud_key
+        if rebuilt:
+            self._render_hud_static(rows, w, h, label_color)
+            self._hud_key = key
+
+        if self._hud_layer is None:
+            return
+
+        due = (self._last_hud_refresh is None or
+               now - self._last_hud_refresh >= 1.0 / self.hud_refresh_hz)
+        if rebuilt or due:
+            self._render_hud_values(values, bar)
+            self._last_hud_refresh = now
+
+        self._hud_layer.blend(frame)
+
+    def _render_hud_static(self, rows, w, h, label_color):
+        """Pre-render HUD labels and remember where each value starts"""
+        self._hud_static = None
+        self._hud_layer = None
+        self._hud_value_positions = []
+        if not rows:
+            return
+
+        # Region of interest: everything the HUD can draw into, clipped to the frame
+        pad = 6
+        (_, text_height), baseline = cv2.getTextSize("Ag", self.font, self.hud_scale, self.hud_thickness)
+        left = max(0, min(x for _, (x, _) in rows) - pad)
+        top = max(0, min(y for _, (_, y) in rows) - text_height - pad)
+        right = w
+        bottom = min(h, max(y for _, (_, y) in rows) + baseline + 40)
+        if bottom <= top or right <= left:
+            return
+
+        static = np.zeros((bottom - top, right - left, 4), dtype=np.uint8)
+        color = tuple(label_color) + (255,)
+        for label, (x, y) in rows:
+            position = (x - left, y - top)
+            cv2.putText(static, label, position, self.font, self.hud_scale,
+                        (0, 0, 0, 255), self.hud_thickness + 2, cv2.LINE_AA)
+            cv2.putText(static, label, position, self.font, self.hud_scale,
+                        color, self.hud_thickness, cv2.LINE_AA)
+            (label_width, _), _ = cv2.getTextSize(label, self.font, self.hud_scale, self.hud_thickness)
+            self._hud_value_positions.append((position[0] + label_width, position[1]))
+
+        self._hud_static = static
+        self._hud_layer = OverlayLayer(left, top, right - left, bottom - top)
+
+    def _render_hud_values(self, values, bar):
+        """Redraw the dynamic HUD values onto a copy of the static labels"""
+        layer = self._hud_layer
+        np.copyto(layer.bgra, self._hud_static)
+        for (text, color), position in zip(values, self._hud_value_positions):
+            if not text:
+                continue
+            cv2.putText(layer.bgra, text, position, self.font, self.hud_scale,
+                        (0, 0, 0, 255), self.hud_thickness + 2, cv2.LINE_AA)
+            cv2.putText(layer.bgra, text, position, self.font, self.hud_scale,
+                        tuple(color) + (255,), self.hud_thickness, cv2.LINE_AA)
+
+        if bar is not None:
+            x, y, fraction, color = bar
+            x -= layer.x
+            y -= layer.y
+            bar_length = 200
+            bar_height = 20
+            cv2.rectangle(layer.bgra, (x, y), (x + bar_length, y + bar_height),
+                          (128, 128, 128, 255), -1)
+            filled_length = int(bar_length * min(max(fraction, 0.0), 1.0))
+            cv2.rectangle(layer.bgra, (x, y), (x + filled_length, y + bar_height),
+                          tuple(color) + (255,), -1)
+            cv2.rectangle(layer.bgra, (x, y), (x + bar_length, y + bar_height),
+                          (255, 255, 255, 255), 1)
+
+        layer.commit()
@@ -7,12 +7,59 @@ import math
 import re
 from collections import defaultdict
 from .cognitive_load_analyzer import CognitiveLoadAnalyzer
+from .event_detector import GazeEventDetector
+from .rolling_stats import ExponentialMovingAverage, RollingWelford, P2Quantile
+from .text_layout import TextLayoutIndex, wrap_text
+from .overlay import OverlayCompositor
+from .calibration import CALIBRATION_GRID
+from .clock import RateScheduler
+from .gaze_heatmap import GazeHeatmap
+from .records import EyeSample, ReadingSample
+
+# Position of an eye feature the tracker did not report
+_NO_POSITION = (0.0, 0.0)
+
+
+def _as_position(value) -> Tuple[float, float]:
+    """A position as a tuple of floats; a bare number is an x offset"""
+    try:
+        if isinstance(value, tuple):
+            return tuple(map(float, value))
+        return (float(value), 0.0)
+    except (TypeError, ValueError):
+        return _NO_POSITION
+
 
 class ReadingAnalyzer:
-    def __init__(self):
-        """Initialize reading analyzer"""
+    # Default rates in Hz of the analytics tiers above the per-frame counters
+    ANALYTICS_RATES = {'metrics': 10.0, 'indicators': 4.0}
+
+    def __init__(self, clock=None, face_mesh=None, eye_tracker=None, gaze_filter=None,
+                 analytics_rates: Optional[Dict[str, float]] = None):
+        """Initialize reading analyzer
+        
+        Args:
+            clock (callable): Returns the current time in seconds; defaults to time.time.
+                Replays pass a ReplayClock so recorded sessions run faster than real time.
+            face_mesh: Optional shared FaceMesh passed on to the EyeTracker
+            eye_tracker (EyeTracker): Existing tracker to use instead of creating one
+            gaze_filter (dict): Gaze filter configuration of the created EyeTracker
+            analytics_rates (dict): Rates in Hz overriding ANALYTICS_RATES; None
+                or 0 for a tier computes it on every frame
+        """
+        self.clock = clock or time.time
+        
         # Initialize eye tracker
-        self.eye_tracker = EyeTracker()
+        self.eye_tracker = eye_tracker or EyeTracker(clock=self.clock, face_mesh=face_mesh,
+                                                        gaze_filter=gaze_filter)
+        self.stage_times = {}  # Seconds spent in each stage of the last frame
+        
+        # Analytics tiers: counters are computed every frame, the enhanced metrics
+        # and the indicators/probability on their scheduler's ticks, and the last
+        # result of a tier is reused in between
+        self.analytics_schedulers = {}
+        self.analytics_cache = {}
+        self.set_analytics_rates(**dict(self.ANALYTICS_RATES, **(analytics_rates or {})))
         
         # Initialize test state
         self.test_start_time = None
@@ -28,21 +75,18 @@ class ReadingAnalyzer:
         
         # Initialize eye metrics
         self.eye_metrics = {
-            'fixations': [],
-            'saccades': [],
             'blinks': [],
             'gaze_positions': [],
             'pupil_sizes': []
         }
         
-        # Add smoothing parameters
-        self.metric_history = {
-            'dyslexia_probability': [],
-            'cognitive_load': [],
-            'fixation_stability': [],
-            'reading_linearity': []
+        # Add smoothing parameters (incremental EMA per smoothed metric)
+        self.smoothing_alpha = 0.1
+        self.metric_smoothers = {
+            name: ExponentialMovingAverage(self.smoothing_alpha)
+            for name in ('dyslexia_probability', 'cognitive_load',
+                         'fixation_stability', 'reading_linearity')
         }
-        self.smoothing_window = 30  # 1 second at 30fps
         self.min_active_reading_time = 2.0  # Require 2 seconds of active reading
         self.active_reading_start = None
         self.movement_threshold = 0.05  # Minimum movement to consider as intentional
@@ -74,10 +118,17 @@ class ReadingAnalyzer:
         self.text_scale = 0.8
         self.text_thickness = 2
         self.background_alpha = 0.7
-        self.baseline_metrics = {
-            'fixation_durations': [],
-            'saccade_velocities': [],
-            'gaze_stabilities': []
+        # Rolling baselines: mean/std over the last 1000 measurements and
+        # streaming percentile estimates per metric
+        self.baseline_window = 1000
+        self.baseline_percentiles = (50, 75, 90, 95)
+        self.baseline_stats = {
+            name: RollingWelford(self.baseline_window)
+            for name in ('fixation_durations', 'saccade_velocities', 'gaze_stabilities')
+        }
+        self.baseline_quantiles = {
+            name: {pct: P2Quantile(pct / 100) for pct in self.baseline_percentiles}
+            for name in self.baseline_stats
         }
         
         # Initialize thresholds
@@ -98,6 +149,11 @@ class ReadingAnalyzer:
         self.success_color = (0, 255, 0)
         self.info_color = (255, 165, 0)
         
+        # Cached text/HUD layers; HUD values are redrawn at most hud_refresh_hz times per second
+        self.hud_refresh_hz = 5.0
+        self.overlay = OverlayCompositor(self.font, hud_refresh_hz=self.hud_refresh_hz)
+        self.hud_rows = self._build_hud_rows()
+        
         # Initialize text content
         self.text_to_read = [
             "Please read this text carefully and naturally.",
@@ -106,6 +162,19 @@ class ReadingAnalyzer:
             "coordination between visual processing and comprehension.",
             "Take your time and try to understand each word."
         ]
+        self.default_text_lines = list(self.text_to_read)
+        
+        # Word layout of the reading text, built once per (text, frame width)
+        self.text_layout = None
+        self.frame_size = None
+        self.max_text_width_ratio = 0.9  # Wrap test text to 90% of the frame width
+        self.min_word_dwell = 0.1  # Seconds of gaze before a word counts as read
+        self.word_dwell_times = []
+        self.words_marked_read = []
+        self.furthest_word_read = -1
+        self.current_word = None
+        self.last_sample_time = None
+        self.gaze_heatmap = GazeHeatmap(128, 96)  # Gaze over the frame for the current text
         
         # Initialize regression analysis parameters
         self.regression_thresholds = {
@@ -113,18 +182,24 @@ class ReadingAnalyzer:
             'medium': 0.3,   # 30% of screen width
             'long': 0.45     # 45% of screen width
         }
-        self.regression_patterns = {
-            'short': 0,  # Within-word regressions
-            'medium': 0,  # Previous word regressions
-            'long': 0,   # Multiple word regressions
-            'vertical': 0 # Line change regressions
-        }
-        self.last_regression_time = None
-        self.regression_frequency = []
+        
+        # Incremental fixation/saccade/regression detection. regression_patterns
+        # holds the running counts: short (within-word), medium (previous word),
+        # long (multiple words) and vertical (line change) regressions.
+        self.event_detector = GazeEventDetector(
+            fixation_threshold=self.fixation_threshold,
+            saccade_threshold=self.saccade_threshold,
+            min_fixation_duration=self.min_fixation_duration,
+            regression_thresholds=self.regression_thresholds,
+            vertical_threshold=self.vertical_gaze_threshold
+        )
+        self.regression_patterns = self.event_detector.regression_patterns
+        self.long_fixation_count = 0
+        self.long_saccade_count = 0
         
         # Initialize enhanced detection metrics
-        self.fixation_stability_history = []
-        self.saccade_times = []
+        self.fixation_movement_stats = RollingWelford(30)  # Gaze movement within fixations
+        self.saccade_time_stats = RollingWelford(100)
         self.reading_linearity_scores = []
         self.reread_positions = defaultdict(int)
         
@@ -137,180 +212,270 @@ class ReadingAnalyzer:
         self.min_regression_duration = 0.1
         self.regression_start_time = None
         self.potential_regression = None
+        
+        # Indicator weights for the dyslexia probability (sum to 1.0)
+        self.indicator_weights = {
+            'backward_saccades': 0.15,
+            'frequent_regressions': 0.05,
+            'long_regressions': 0.05,
+            'long_fixations': 0.15,
+            'high_reread_rate': 0.05,
+            'irregular_saccades': 0.10,
+            'slow_saccades': 0.05,
+            'poor_reading_linearity': 0.05,
+            'poor_fixation_stability': 0.15,
+            'high_blink_load': 0.10,
+            'high_pupil_load': 0.05,
+            'high_cognitive_load': 0.05
+        }
 
     def process_frame(self, frame: np.ndarray) -> Tuple[np.ndarray, Dict]:
         """Process a frame and update reading metrics"""
-        if self.test_start_time is None:
-            self.test_start_time = time.time()
+        self._prepare_frame(frame.shape[:2])
         
         # Process frame with eye tracker
+        start = time.perf_counter()
         processed_frame, eye_data = self.eye_tracker.process_frame(frame)
+        tracked = time.perf_counter()
         
         # Draw text overlay
         self._draw_text_overlay(processed_frame)
+        text_drawn = time.perf_counter()
         
         # Update metrics if we have valid gaze data
         if eye_data and 'left_gaze' in eye_data:
             self._update_reading_metrics(eye_data)
+        updated = time.perf_counter()
         
         # Calculate and draw metrics
         metrics = self._analyze_reading_patterns()
+        analyzed = time.perf_counter()
         self._draw_analysis(processed_frame, metrics)
+        done = time.perf_counter()
+        
+        facemesh = self.eye_tracker.stage_times.get('facemesh', 0.0)
+        self.stage_times.update(
+            facemesh=facemesh,
+            eye_metrics=tracked - start - facemesh,
+            update_reading_metrics=updated - text_drawn,
+            analyze_reading_patterns=analyzed - updated,
+            draw=(text_drawn - tracked) + (done - analyzed)
+        )
         
         return processed_frame, metrics
 
+    def process_landmarks(self, face_landmarks, frame_shape: Tuple[int, int],
+                          timestamp: Optional[float] = None) -> Dict:
+        """Update reading metrics from face-mesh landmarks without rendering.
+        
+        Args:
+            face_landmarks: Landmarks as accepted by EyeTracker.process_landmarks
+            frame_shape (tuple): (height, width) of the captured frame
+            timestamp (float): Capture time in seconds; defaults to the clock
+        
+        Returns:
+            dict: Reading metrics after this frame
+        """
+        self._prepare_frame(frame_shape)
+        start = time.perf_counter()
+        eye_data = self.eye_tracker.process_landmarks(face_landmarks, frame_shape, timestamp)
+        tracked = time.perf_counter()
+        if eye_data and 'left_gaze' in eye_data:
+            self._update_reading_metrics(eye_data)
+        updated = time.perf_counter()
+        metrics = self._analyze_reading_patterns()
+
+        self.stage_times.update(
+            eye_metrics=tracked - start,
+            update_reading_metrics=updated - tracked,
+            analyze_reading_patterns=time.perf_counter() - updated
+        )
+        return metrics
+
+    def _prepare_frame(self, frame_shape: Tuple[int, int]):
+        if self.test_start_time is None:
+            self.test_start_time = self.clock()
+        
+        h, w = frame_shape[:2]
+        self.frame_size = (w, h)
+        if self.text_layout is None or self.text_layout.frame_width != w:
+            self._build_text_layout(w)
+
     def _draw_text_overlay(self, frame: np.ndarray):
         """Draw reading text with improved visibility"""
-        h, w = frame.shape[:2]
-        
-        # Create semi-transparent overlay for better text visibility
-        overlay = frame.copy()
-        
-        # Draw dark background for text area
-        text_area_height = len(self.text_to_read) * self.line_spacing + 50
-        cv2.rectangle(overlay, 
-                     (0, self.text_position[1] - 40),
-                     (w, self.text_position[1] + text_area_height),
-                     (0, 0, 0), -1)  # Black background
-        
-        # Add overlay to frame with lower opacity
-        cv2.addWeighted(frame, 0.3, overlay, 0.7, 0, frame)
-        
-        # Draw text lines with better visibility
-        y = self.text_position[1]
-        for i, line in enumerate(self.text_to_read):
-            # Get text size for centering
-            (text_width, text_height), _ = cv2.getTextSize(
-                line, self.font, self.text_scale, self.text_thickness)
-            
-            # Center text horizontally
-            x = (w - text_width) // 2
-            
-            # Draw text with white color and black outline
-            cv2.putText(frame, line, (x, y), self.font, self.text_scale,
-                       (0, 0, 0), self.text_thickness + 2, cv2.LINE_AA)  # Black outline
-            cv2.putText(frame, line, (x, y), self.font, self.text_scale,
-                       (255, 255, 255), self.text_thickness, cv2.LINE_AA)  # White text
-            
-            y += self.line_spacing
+        self.overlay.draw_text(frame, self.text_to_read, self.text_position[1], self.line_spacing,
+                               self.text_scale, self.text_thickness, self.background_alpha)
 
-    def _draw_analysis(self, frame: np.ndarray, metrics: Dict):
-        """Draw analysis results with enhanced metrics"""
-        # Set up display parameters
-        x, y = 10, 30
-        metrics_color = (255, 255, 255)
+    def _build_text_layout(self, frame_width: int):
+        """Lay out the reading text for a frame width and index its word boxes"""
+        if self.test_text:
+            max_width = int(frame_width * self.max_text_width_ratio)
+            self.text_to_read = wrap_text(self.test_text, max_width, self.font,
+                                          self.text_scale, self.text_thickness)
+        else:
+            self.text_to_read = list(self.default_text_lines)
         
-        # Draw main metrics
-        self._draw_text_with_outline(frame, f"Reading Speed: {metrics['reading_speed']} WPM", 
-                                   (x, y), metrics_color)
-        y += 30
+        self.text_layout = TextLayoutIndex(
+            self.text_to_read, frame_width, self.text_position[1], self.line_spacing,
+            self.font, self.text_scale, self.text_thickness
+        )
+        self._reset_word_tracking()
+
+    def _reset_word_tracking(self):
+        """Clear per-word dwell, words read and rereads"""
+        n_words = len(self.text_layout) if self.text_layout is not None else 0
+        self.word_dwell_times = [0.0] * n_words
+        self.words_marked_read = [False] * n_words
+        self.furthest_word_read = -1
+        self.current_word = None
+        self.last_sample_time = None
+        self.words_read = 0
+        self.reread_positions = defaultdict(int)
+        self.gaze_heatmap.reset()
+
+    def _gaze_to_frame(self, gaze_x: float, gaze_y: float) -> Tuple[float, float]:
+        """Map a normalized gaze direction (-1..1) linearly onto frame pixels"""
+        w, h = self.frame_size
+        return (gaze_x + 1.0) * 0.5 * w, (gaze_y + 1.0) * 0.5 * h
+
+    def _update_word_tracking(self, x: float, y: float, timestamp: float):
+        """Attribute a gaze sample at frame position (x, y) to a word"""
+        dt = 0.0 if self.last_sample_time is None else timestamp - self.last_sample_time
+        self.last_sample_time = timestamp
+        
+        word = self.text_layout.lookup(x, y)
+        if word is None:
+            return
         
-        # Draw dyslexia probability with color based on severity
+        # Entering an already read word behind the reading front is a reread
+        if word != self.current_word and self.words_marked_read[word] and word < self.furthest_word_read:
+            self.reread_positions[word] += 1
+        self.current_word = word
+        
+        self.word_dwell_times[word] += dt
+        if not self.words_marked_read[word] and self.word_dwell_times[word] >= self.min_word_dwell:
+            self.words_marked_read[word] = True
+            self.words_read += 1
+            self.furthest_word_read = max(self.furthest_word_read, word)
+
+    def get_word_dwell_times(self) -> List[Dict]:
+        """Return dwell time per word of the current text"""
+        if self.text_layout is None:
+            return []
+        return [
+            {'word': word, 'line': self.text_layout.line_of(i), 'dwell_time': self.word_dwell_times[i],
+             'rereads': self.reread_positions.get(i, 0)}
+            for i, word in enumerate(self.text_layout.words)
+        ]
+
+    def render_heatmap_png(self, width: Optional[int] = None) -> Optional[bytes]:
+        """PNG of the gaze heat map over the reading text, as the reader saw it.
+        
+        Args:
+            width (int): Image width; defaults to the frame width, the height
+                keeps the frame's aspect ratio
+        
+        Returns:
+            bytes: PNG image, or None before the first frame
+        """
+        if self.frame_size is None:
+            return None
+        frame_w, frame_h = self.frame_size
+        width = width or frame_w
+        height = max(1, round(frame_h * width / frame_w))
+        
+        def draw_text():
+            # Drawn at frame size, where the text layout is, and scaled with the heat map
+            background = np.zeros((frame_h, frame_w, 3), dtype=np.uint8)
+            self._draw_text_overlay(background)
+            if (width, height) != (frame_w, frame_h):
+                background = cv2.resize(background, (width, height), interpolation=cv2.INTER_AREA)
+            return background
+        
+        text_key = (tuple(self.text_to_read), frame_w, frame_h)
+        return self.gaze_heatmap.render_png(width, height, draw_text, background_key=text_key)
+
+    def _build_hud_rows(self) -> List[Tuple[str, Tuple[int, int]]]:
+        """Fixed HUD layout: (label, position) per row, values are drawn after the label"""
+        x, y = 10, 30
+        rows = []
+        sections = [
+            (["Reading Speed: ", "Dyslexia Probability: ", "Severity: "], 30, 40),
+            (["Enhanced Metrics:", "Fixation Stability: ", "Reading Linearity: ",
+              "Avg Saccade Time: ", "Reread Score: "], 25, 40),
+            (["Regression Analysis:", "  Short: ", "  Medium: ", "  Long: ", "  Line Changes: ",
+              "Avg Time Between Regressions: "], 25, 40),
+            (["Cognitive Metrics:", "Cognitive Load: ", "Pupil Load: ", "Blink Load: "], 25, 20)
+        ]
+        for labels, row_spacing, section_spacing in sections:
+            for i, label in enumerate(labels):
+                rows.append((label, (x, y)))
+                if i < len(labels) - 1:
+                    y += row_spacing
+            y += section_spacing
+        self.hud_bar_position = (x, y)
+        return rows
+
+    def _hud_values(self, metrics: Dict) -> List[Tuple[str, Tuple[int, int, int]]]:
+        """Format the dynamic HUD values in the order of ``hud_rows``"""
+        metrics_color = self.text_color
+
         prob = metrics['dyslexia_indicators']['probability'] * 100
         severity = metrics['dyslexia_indicators']['severity']
         severity_color = self._get_severity_color(severity)
-        
-        self._draw_text_with_outline(frame, f"Dyslexia Probability: {prob:.1f}%", 
-                                   (x, y), severity_color)
-        y += 30
-        self._draw_text_with_outline(frame, f"Severity: {severity}", 
-                                   (x, y), severity_color)
-        y += 40
-        
-        # Draw enhanced metrics section
+
         enhanced = metrics.get('enhanced_metrics', {})
-        self._draw_text_with_outline(frame, "Enhanced Metrics:", (x, y), metrics_color)
-        y += 25
-        
-        # Draw stability metrics with color coding
-        stability_color = self._get_metric_color(enhanced.get('fixation_stability', 0))
-        self._draw_text_with_outline(frame, 
-            f"Fixation Stability: {enhanced.get('fixation_stability', 0):.2f}", 
-            (x, y), stability_color)
-        y += 25
-        
-        linearity_color = self._get_metric_color(enhanced.get('reading_linearity', 0))
-        self._draw_text_with_outline(frame, 
-            f"Reading Linearity: {enhanced.get('reading_linearity', 0):.2f}", 
-            (x, y), linearity_color)
-        y += 25
-        
-        saccade_color = self._get_metric_color(1.0 - enhanced.get('avg_saccade_time', 0) / 0.1)
-        self._draw_text_with_outline(frame, 
-            f"Avg Saccade Time: {enhanced.get('avg_saccade_time', 0)*1000:.0f}ms", 
-            (x, y), saccade_color)
-        y += 25
-        
-        reread_color = self._get_metric_color(1.0 - enhanced.get('reread_score', 0))
-        self._draw_text_with_outline(frame, 
-            f"Reread Score: {enhanced.get('reread_score', 0):.2f}", 
-            (x, y), reread_color)
-        y += 40
-        
-        # Draw regression analysis
-        if 'regression_analysis' in metrics and metrics['regression_analysis']:
-            reg_analysis = metrics['regression_analysis']
-            patterns = reg_analysis.get('regression_patterns', {})
-            
-            regression_color = self._get_regression_color(reg_analysis.get('regression_severity', 0))
-            self._draw_text_with_outline(frame, "Regression Analysis:", (x, y), regression_color)
-            y += 25
-            
-            # Draw regression counts with severity-based colors
-            counts = [
-                ("Short", patterns.get('short', 0)),
-                ("Medium", patterns.get('medium', 0)),
-                ("Long", patterns.get('long', 0)),
-                ("Line Changes", patterns.get('vertical', 0))
-            ]
-            
-            for label, count in counts:
-                color = self._get_count_color(count, label)
-                self._draw_text_with_outline(frame, f"  {label}: {count}", (x, y), color)
-                y += 25
-            
-            # Draw regression frequency
-            freq = reg_analysis.get('avg_regression_frequency', 0)
-            if freq != float('inf'):
-                self._draw_text_with_outline(frame, 
-                    f"Avg Time Between Regressions: {freq:.1f}s", 
-                    (x, y), regression_color)
-            y += 40
-        
-        # Draw cognitive load section
+        stability = enhanced.get('fixation_stability', 0)
+        linearity = enhanced.get('reading_linearity', 0)
+        saccade_time = enhanced.get('avg_saccade_time', 0)
+        reread = enhanced.get('reread_score', 0)
+
+        reg_analysis = metrics.get('regression_analysis') or {}
+        patterns = reg_analysis.get('regression_patterns', {})
+        regression_color = self._get_regression_color(reg_analysis.get('regression_severity', 0))
+        freq = reg_analysis.get('avg_regression_frequency', float('inf'))
+        counts = [
+            ("Short", patterns.get('short', 0)),
+            ("Medium", patterns.get('medium', 0)),
+            ("Long", patterns.get('long', 0)),
+            ("Line Changes", patterns.get('vertical', 0))
+        ]
+
         cognitive = metrics['cognitive_metrics']
-        load_level = (
-            'High' if cognitive['load_score'] > 0.7 else
-            'Medium' if cognitive['load_score'] > 0.3 else
-            'Low'
-        )
-        load_color = self.load_colors[load_level]
-        
-        self._draw_text_with_outline(frame, "Cognitive Metrics:", (x, y), metrics_color)
-        y += 25
-        self._draw_text_with_outline(frame, 
-            f"Cognitive Load: {cognitive['load_score']:.2f}", 
-            (x, y), load_color)
-        y += 25
-        self._draw_text_with_outline(frame, 
-            f"Pupil Load: {cognitive['pupil_load']:.2f}", 
-            (x, y), load_color)
-        y += 25
-        self._draw_text_with_outline(frame, 
-            f"Blink Load: {cognitive['blink_load']:.2f}", 
-            (x, y), load_color)
-        
-        # Draw cognitive load bar
-        self._draw_load_bar(frame, x, y + 20, cognitive['load_score'], load_color)
-
-    def _draw_text_with_outline(self, frame: np.ndarray, text: str, position: Tuple[int, int], 
-                              color: Tuple[int, int, int]):
-        """Draw text with black outline for better visibility"""
-        x, y = position
-        # Draw black outline
-        cv2.putText(frame, text, (x, y), self.font, 0.7, (0, 0, 0), 4, cv2.LINE_AA)
-        # Draw colored text
-        cv2.putText(frame, text, (x, y), self.font, 0.7, color, 2, cv2.LINE_AA)
+        load_color = self.load_colors[self._get_load_level(cognitive['load_score'])]
+
+        return [
+            (f"{metrics['reading_speed']} WPM", metrics_color),
+            (f"{prob:.1f}%", severity_color),
+            (f"{severity}", severity_color),
+            ("", metrics_color),
+            (f"{stability:.2f}", self._get_metric_color(stability)),
+            (f"{linearity:.2f}", self._get_metric_color(linearity)),
+            (f"{saccade_time * 1000:.0f}ms", self._get_metric_color(1.0 - saccade_time / 0.1)),
+            (f"{reread:.2f}", self._get_metric_color(1.0 - reread)),
+            ("", regression_color),
+            *[(f"{count}", self._get_count_color(count, label)) for label, count in counts],
+            (f"{freq:.1f}s" if freq != float('inf') else "--", regression_color),
+            ("", metrics_color),
+            (f"{cognitive['load_score']:.2f}", load_color),
+            (f"{cognitive['pupil_load']:.2f}", load_color),
+            (f"{cognitive['blink_load']:.2f}", load_color)
+        ]
+
+    def _get_load_level(self, load_score: float) -> str:
+        if load_score > 0.7:
+            return 'High'
+        if load_score > 0.3:
+            return 'Medium'
+        return 'Low'
+
+    def _draw_analysis(self, frame: np.ndarray, metrics: Dict):
+        """Draw analysis results with enhanced metrics"""
+        load_score = metrics['cognitive_metrics']['load_score']
+        load_color = self.load_colors[self._get_load_level(load_score)]
+        bar = (*self.hud_bar_position, load_score, load_color)
+        self.overlay.draw_hud(frame, self.hud_rows, self._hud_values(metrics), self.clock(),
+                              bar=bar, label_color=self.text_color)
 
     def _get_probability_color(self, probability: float) -> Tuple[int, int, int]:
         """Get color based on probability (green to red gradient)"""
@@ -357,104 +522,59 @@ class ReadingAnalyzer:
             return 0.0
 
     def _detect_fixations(self) -> List[Dict]:
-        """Enhanced fixation detection with stability analysis"""
-        fixations = []
-        current_fixation = None
-        
-        for i in range(1, len(self.reading_data)):
-            prev = self.reading_data[i-1]
-            curr = self.reading_data[i]
-            
-            # Extract numeric values from tuples and handle potential None values
-            prev_gaze = prev.get('left_gaze', (0.0, 0.0))
-            curr_gaze = curr.get('left_gaze', (0.0, 0.0))
-            
-            # Calculate movement using both horizontal and vertical components
-            try:
-                prev_x = float(prev_gaze[0]) if prev_gaze else 0.0
-                prev_y = float(prev_gaze[1]) if prev_gaze else 0.0
-                curr_x = float(curr_gaze[0]) if curr_gaze else 0.0
-                curr_y = float(curr_gaze[1]) if curr_gaze else 0.0
-                
-                horizontal_movement = abs(curr_x - prev_x)
-                vertical_movement = abs(curr_y - prev_y)
-                total_movement = math.sqrt(horizontal_movement**2 + vertical_movement**2)
-            except (TypeError, IndexError, ValueError):
-                total_movement = 0.0
-            
-            if total_movement < self.fixation_threshold:
-                if current_fixation is None:
-                    current_fixation = {
-                        'start_time': prev['timestamp'],
-                        'position': prev_gaze,
-                        'start_index': i-1,
-                        'stability': 1.0
-                    }
-                else:
-                    # Update stability based on movement
-                    current_fixation['stability'] *= max(0.0, 1.0 - float(total_movement))
-            elif current_fixation is not None:
-                duration = curr['timestamp'] - current_fixation['start_time']
-                if duration >= self.min_fixation_duration:
-                    current_fixation['duration'] = duration
-                    current_fixation['end_index'] = i
-                    current_fixation['average_stability'] = current_fixation['stability'] / (i - current_fixation['start_index'])
-                    fixations.append(current_fixation)
-                current_fixation = None
-        
-        return fixations
+        """Return recently completed fixations from the incremental detector"""
+        return list(self.event_detector.fixations)
 
     def _detect_saccades(self) -> List[Dict]:
-        """Enhanced saccade detection with direction analysis"""
-        saccades = []
+        """Return recently completed saccades from the incremental detector"""
+        return list(self.event_detector.saccades)
+
+    def _handle_gaze_events(self, events: List[Dict]):
+        """Update running counters from events emitted by the detector"""
+        for event in events:
+            if event['event'] == 'fixation':
+                if event['duration'] > self.fixation_duration_threshold:
+                    self.long_fixation_count += 1
+                self._update_baseline_metrics({'fixation_duration': event['duration']})
+            elif event['event'] == 'saccade':
+                self.saccade_time_stats.update(event['duration'])
+                if event['length'] > self.saccade_length_threshold:
+                    self.long_saccade_count += 1
+                self._update_baseline_metrics({'saccade_velocity': event['velocity']})
         
-        for i in range(1, len(self.reading_data)):
-            prev = self.reading_data[i-1]
-            curr = self.reading_data[i]
-            
-            # Extract numeric values from tuples safely
-            prev_gaze = prev.get('left_gaze', (0.0, 0.0))
-            curr_gaze = curr.get('left_gaze', (0.0, 0.0))
-            
-            try:
-                # Calculate movement components with proper float conversion
-                prev_x = float(prev_gaze[0]) if prev_gaze else 0.0
-                prev_y = float(prev_gaze[1]) if prev_gaze else 0.0
-                curr_x = float(curr_gaze[0]) if curr_gaze else 0.0
-                curr_y = float(curr_gaze[1]) if curr_gaze else 0.0
-                
-                horizontal_movement = curr_x - prev_x
-                vertical_movement = curr_y - prev_y
-                total_movement = math.sqrt(horizontal_movement**2 + vertical_movement**2)
-            except (TypeError, IndexError, ValueError):
-                continue
-            
-            if total_movement > self.saccade_threshold:
-                # Determine saccade direction and type
-                direction = 'backward' if horizontal_movement < 0 else 'forward'
-                saccade_type = 'regression' if direction == 'backward' and abs(float(horizontal_movement)) > self.regression_threshold else 'normal'
-                
-                saccades.append({
-                    'start_position': prev_gaze,
-                    'end_position': curr_gaze,
-                    'length': float(total_movement),
-                    'direction': direction,
-                    'type': saccade_type,
-                    'horizontal_movement': float(horizontal_movement),
-                    'vertical_movement': float(vertical_movement),
-                    'timestamp': curr['timestamp']
-                })
-        
-        return saccades
-
-    def _update_reading_metrics(self, eye_data: Dict):
-        """Update reading metrics based on eye tracking data"""
+        self.fixation_count = self.event_detector.fixation_count
+        self.regression_count = self.event_detector.regression_count
+
+    def _analyze_regression_patterns(self, current_time: float) -> Dict:
+        """Summarize regressions detected so far, by category"""
+        return self.event_detector.get_regression_summary(current_time)
+
+    def _update_reading_metrics(self, eye_data):
+        """Update reading metrics based on eye tracking data.
+        
+        Args:
+            eye_data: EyeSample from the eye tracker, or a dict with its gaze
+                keys and optional 'left/right_pupil_relative', 'blink_data' and
+                'face_detected'
+        """
         # Store current timestamp
-        current_time = time.time()
+        current_time = self.clock()
         
-        # Get gaze data and ensure they are tuples of floats
-        left_gaze = tuple(map(float, eye_data.get('left_gaze', (0.0, 0.0))))
-        right_gaze = tuple(map(float, eye_data.get('right_gaze', (0.0, 0.0))))
+        if isinstance(eye_data, EyeSample):
+            # The tracker's gaze is already tuples of floats; it does not
+            # report pupil positions relative to the eye
+            left_gaze, right_gaze = eye_data.left_gaze, eye_data.right_gaze
+            left_pupil_relative = right_pupil_relative = _NO_POSITION
+            is_blinking = eye_data.is_blink
+            face_detected = eye_data.face_detected
+        else:
+            # Get gaze data and ensure they are tuples of floats
+            left_gaze = tuple(map(float, eye_data.get('left_gaze', _NO_POSITION)))
+            right_gaze = tuple(map(float, eye_data.get('right_gaze', _NO_POSITION)))
+            left_pupil_relative = _as_position(eye_data.get('left_pupil_relative', _NO_POSITION))
+            right_pupil_relative = _as_position(eye_data.get('right_pupil_relative', _NO_POSITION))
+            is_blinking = bool(eye_data.get('blink_data', {}).get('is_blinking', False))
+            face_detected = bool(eye_data.get('face_detected', True))
         
         # Calculate average gaze position
         avg_gaze_x = (left_gaze[0] + right_gaze[0]) / 2.0
@@ -465,57 +585,57 @@ class ReadingAnalyzer:
         if self.last_gaze_x is not None:
             vertical_movement = abs(float(avg_gaze_y))
         
-        # Safely handle pupil relative positions
-        left_pupil_relative = eye_data.get('left_pupil_relative', (0.0, 0.0))
-        right_pupil_relative = eye_data.get('right_pupil_relative', (0.0, 0.0))
+        # Store reading data with proper numeric types
+        self.reading_data.append(ReadingSample(current_time, left_pupil_relative, right_pupil_relative,
+                                               left_gaze, right_gaze, is_blinking, vertical_movement))
         
-        # Convert to tuples of floats if they aren't already
-        try:
-            if isinstance(left_pupil_relative, tuple):
-                left_pupil_relative = tuple(map(float, left_pupil_relative))
-            else:
-                left_pupil_relative = (float(left_pupil_relative), 0.0)
-        except (TypeError, ValueError):
-            left_pupil_relative = (0.0, 0.0)
-            
-        try:
-            if isinstance(right_pupil_relative, tuple):
-                right_pupil_relative = tuple(map(float, right_pupil_relative))
-            else:
-                right_pupil_relative = (float(right_pupil_relative), 0.0)
-        except (TypeError, ValueError):
-            right_pupil_relative = (0.0, 0.0)
+        self.eye_metrics['gaze_positions'].append((avg_gaze_x, avg_gaze_y))
         
-        # Store reading data with proper numeric types
-        self.reading_data.append({
-            'timestamp': current_time,
-            'left_eye': left_pupil_relative,
-            'right_eye': right_pupil_relative,
-            'left_gaze': left_gaze,
-            'right_gaze': right_gaze,
-            'blink_data': eye_data.get('blink_data', {'is_blinking': False}),
-            'vertical_movement': float(vertical_movement)
-        })
-        
-        # Update last gaze position
-        self.last_gaze_x = float(avg_gaze_x)
+        # Movement since the previous sample, used for fixation stability
+        gaze_step = 0.0
+        if self.last_gaze_x is not None and self.last_gaze_y is not None:
+            gaze_step = math.hypot(avg_gaze_x - self.last_gaze_x, avg_gaze_y - self.last_gaze_y)
+        
+        # Update last gaze position; a frame without a face has none
+        if face_detected:
+            self.last_gaze_x = float(avg_gaze_x)
+            self.last_gaze_y = float(avg_gaze_y)
+        else:
+            self.last_gaze_x = self.last_gaze_y = None
         
         # Limit data storage to prevent memory issues
         if len(self.reading_data) > 300:  # Store last 10 seconds at 30fps
             self.reading_data.pop(0)
+        if len(self.eye_metrics['gaze_positions']) > 300:
+            self.eye_metrics['gaze_positions'].pop(0)
         
-        # Update fixation count if gaze is stable
-        if self.last_gaze_x is not None:
-            try:
-                gaze_movement = abs(float(avg_gaze_x - self.last_gaze_x))
-                if gaze_movement < self.fixation_threshold:
-                    self.fixation_count += 1
-                
-                # Update regression count
-                if gaze_movement > self.saccade_threshold and avg_gaze_x < self.last_gaze_x:
-                    self.regression_count += 1
-            except (TypeError, ValueError):
-                pass
+        # Map the gaze onto the frame for the heat map, and onto the text layout
+        # for words read, dwell and rereads
+        if self.frame_size is not None:
+            # Without a face the gaze is a placeholder, and during a blink it is unreliable
+            if face_detected and not is_blinking:
+                frame_x, frame_y = self._gaze_to_frame(avg_gaze_x, avg_gaze_y)
+                self.gaze_heatmap.add(frame_x / self.frame_size[0], frame_y / self.frame_size[1])
+                if self.text_layout is not None:
+                    self._update_word_tracking(frame_x, frame_y, current_time)
+            else:
+                self.last_sample_time = None  # Do not credit the gap to the next word
+        
+        for scheduler in self.analytics_schedulers.values():
+            scheduler.advance()
+        
+        # Advance the fixation/saccade/regression state machine by one sample; lost
+        # tracking is a gap rather than a jump to the placeholder gaze and back
+        if face_detected:
+            events = self.event_detector.update(avg_gaze_x, avg_gaze_y, current_time)
+        else:
+            events = self.event_detector.gap()
+        if events:
+            self._handle_gaze_events(events)
+        if self.event_detector.state == GazeEventDetector.FIXATION:
+            self.fixation_movement_stats.update(gaze_step)
+        if 'gaze_stability' in eye_data:
+            self._update_baseline_metrics({'gaze_stability': eye_data['gaze_stability']})
 
     def _calculate_readability_score(self, text: str) -> float:
         """Calculate Flesch-Kincaid readability score"""
@@ -570,30 +690,27 @@ class ReadingAnalyzer:
     def _update_baseline_metrics(self, metrics: Dict):
         """Update baseline metrics with current measurements"""
         try:
-            if 'fixation_duration' in metrics:
-                self.baseline_metrics['fixation_durations'].append(metrics['fixation_duration'])
-            if 'saccade_velocity' in metrics:
-                self.baseline_metrics['saccade_velocities'].append(metrics['saccade_velocity'])
-            if 'gaze_stability' in metrics:
-                self.baseline_metrics['gaze_stabilities'].append(metrics['gaze_stability'])
-                
-            # Keep only last 1000 measurements to maintain recent baseline
-            max_samples = 1000
-            for key in self.baseline_metrics:
-                if len(self.baseline_metrics[key]) > max_samples:
-                    self.baseline_metrics[key] = self.baseline_metrics[key][-max_samples:]
+            for key, name in (('fixation_duration', 'fixation_durations'),
+                              ('saccade_velocity', 'saccade_velocities'),
+                              ('gaze_stability', 'gaze_stabilities')):
+                if key in metrics:
+                    value = float(metrics[key])
+                    self.baseline_stats[name].update(value)
+                    for estimator in self.baseline_quantiles[name].values():
+                        estimator.update(value)
         except Exception as e:
             print(f"Error updating baseline metrics: {str(e)}")
 
     def _get_percentile_threshold(self, metric_name: str, percentile: float = 90) -> float:
         """Calculate threshold based on baseline percentile"""
         try:
-            if metric_name not in self.baseline_metrics or not self.baseline_metrics[metric_name]:
+            if metric_name not in self.baseline_quantiles or not self.baseline_stats[metric_name].count:
                 return self._get_default_threshold(metric_name)
-                
-            values = sorted(self.baseline_metrics[metric_name])
-            index = int(len(values) * percentile / 100)
-            return values[min(index, len(values) - 1)]
+            
+            # Use the closest tracked percentile
+            estimators = self.baseline_quantiles[metric_name]
+            tracked = min(estimators, key=lambda pct: abs(pct - percentile))
+            return estimators[tracked].value
         except Exception as e:
             print(f"Error calculating percentile threshold: {str(e)}")
             return self._get_default_threshold(metric_name)
@@ -610,41 +727,24 @@ class ReadingAnalyzer:
     def _normalize_saccade_velocity(self, velocity: float) -> float:
         """Normalize saccade velocity based on individual baseline"""
         try:
-            if not self.baseline_metrics['saccade_velocities']:
+            baseline = self.baseline_stats['saccade_velocities']
+            if not baseline.count:
                 return velocity
                 
-            # Calculate mean and std of baseline velocities
-            baseline_velocities = np.array(self.baseline_metrics['saccade_velocities'])
-            mean_vel = np.mean(baseline_velocities)
-            std_vel = np.std(baseline_velocities)
-            
+            std_vel = baseline.std
             if std_vel == 0:
                 return velocity
                 
             # Normalize using z-score
-            normalized_vel = (velocity - mean_vel) / std_vel
-            return normalized_vel
+            return (velocity - baseline.mean) / std_vel
             
         except Exception as e:
             print(f"Error normalizing saccade velocity: {str(e)}")
             return velocity
 
-    def _smooth_metric(self, metric_name: str, new_value: float) -> float:
-        """Apply temporal smoothing to metrics"""
-        history = self.metric_history[metric_name]
-        history.append(new_value)
-        
-        # Keep only recent history
-        if len(history) > self.smoothing_window:
-            history.pop(0)
-            
-        # Apply exponential moving average
-        alpha = 0.1  # Smoothing factor
-        smoothed = history[0]
-        for value in history[1:]:
-            smoothed = alpha * value + (1 - alpha) * smoothed
-            
-        return smoothed
+    def _smooth_metric(self, metric_name: str, new_value: float, steps: int = 1) -> float:
+        """Apply temporal smoothing to metrics; steps is the number of frames the value stands for"""
+        return self.metric_smoothers[metric_name].update(new_value, steps)
 
     def _is_active_reading(self, current_time: float) -> bool:
         """Determine if user is actively reading based on gaze patterns"""
@@ -672,56 +772,134 @@ class ReadingAnalyzer:
         # Check if we've been actively reading long enough
         return (current_time - self.active_reading_start) >= self.min_active_reading_time
 
-    def _analyze_reading_patterns(self) -> Dict:
-        """Analyze reading patterns with enhanced regression analysis"""
-        current_time = time.time()
+    @property
+    def analytics_rates(self) -> Dict[str, Optional[float]]:
+        return {tier: scheduler.hz for tier, scheduler in self.analytics_schedulers.items()}
+
+    def set_analytics_rates(self, **rates: Optional[float]):
+        """Set the rate in Hz of analytics tiers, e.g. metrics=10, indicators=2.
         
-        # Only analyze if actively reading
-        is_active = self._is_active_reading(current_time)
+        Raises:
+            ValueError: On an unknown tier or a negative rate
+        """
+        unknown = set(rates) - set(self.ANALYTICS_RATES)
+        if unknown:
+            raise ValueError(f"Unknown analytics tiers: {', '.join(sorted(unknown))}")
+        for tier, hz in rates.items():
+            if hz is not None and hz < 0:
+                raise ValueError(f"Rate of {tier} must not be negative")
+            self.analytics_schedulers[tier] = RateScheduler(hz)
+            self.analytics_cache[tier] = None
+
+    def _reset_analytics(self):
+        """Recompute every tier on the next frame"""
+        for tier, scheduler in self.analytics_schedulers.items():
+            scheduler.reset()
+            self.analytics_cache[tier] = None
+
+    def _analytics_tier(self, tier: str, current_time: float, compute) -> Dict:
+        """Result of compute(steps) if the tier is due, otherwise its cached result"""
+        scheduler = self.analytics_schedulers[tier]
+        if scheduler.due(current_time) or self.analytics_cache[tier] is None:
+            self.analytics_cache[tier] = compute(max(scheduler.steps, 1))
+        return self.analytics_cache[tier]
+
+    def _analyze_reading_patterns(self) -> Dict:
+        """Reading metrics after the current frame.
         
-        # Get ML features and cognitive metrics
-        ml_features = self.eye_tracker.get_ml_features()
-        cognitive_metrics = self.eye_tracker.get_cognitive_metrics()
+        Counts and reading speed are current; the enhanced and cognitive
+        metrics and the regression analysis, indicators and probability come
+        from their tier's last tick (see ANALYTICS_RATES). Calling this again
+        within a tick only rebuilds the top-level dict; the nested dicts are
+        shared with the cache and must not be modified.
+        """
+        current_time = self.clock()
         
         # Calculate reading speed
-        if self.test_start_time:
+        if self.test_start_time is not None:
             elapsed_time = current_time - self.test_start_time
             reading_speed = int((self.words_read / elapsed_time) * 60) if elapsed_time > 0 else 0
         else:
             reading_speed = 0
-            
+        
+        metrics = self._analytics_tier('metrics', current_time, self._analyze_enhanced_metrics)
+        indicators = self._analytics_tier(
+            'indicators', current_time, lambda steps: self._analyze_indicators(current_time, metrics, steps))
+        
+        return {
+            'fixation_count': self.fixation_count,
+            'regression_count': self.regression_count,
+            'reading_speed': reading_speed,
+            'cognitive_metrics': metrics['cognitive_metrics'],
+            'enhanced_metrics': metrics['enhanced_metrics'],
+            'regression_analysis': indicators['regression_analysis'],
+            'dyslexia_indicators': indicators['dyslexia_indicators']
+        }
+
+    def _analyze_enhanced_metrics(self, steps: int) -> Dict:
+        """Mid-cost tier: smoothed stability, linearity, rereads and cognitive load"""
+        cognitive_metrics = self.eye_tracker.get_cognitive_metrics()
+        
         # Calculate enhanced metrics with smoothing
         fixation_stability = self._smooth_metric('fixation_stability', 
-                                               self._calculate_fixation_stability())
+                                               self._calculate_fixation_stability(), steps)
         reading_linearity = self._smooth_metric('reading_linearity', 
-                                              self._calculate_reading_linearity())
-        avg_saccade_time = np.mean(self.saccade_times) if self.saccade_times else 0
+                                              self._calculate_reading_linearity(), steps)
+        avg_saccade_time = self.saccade_time_stats.mean
         reread_score = self._calculate_reread_score()
         
         # Get cognitive load components with smoothing
         cognitive_load = self._smooth_metric('cognitive_load', 
-                                           min(0.8, cognitive_metrics.get('cognitive_load_score', 0.0)))
+                                           min(0.8, cognitive_metrics.get('cognitive_load_score', 0.0)),
+                                           steps)
         pupil_load = min(0.7, cognitive_metrics.get('pupil_load', 0.0))
         blink_load = min(0.6, cognitive_metrics.get('blink_load', 0.0))
         
+        return {
+            'cognitive_metrics': {
+                'load_score': cognitive_load,
+                'pupil_load': pupil_load,
+                'blink_load': blink_load
+            },
+            'enhanced_metrics': {
+                'fixation_stability': fixation_stability,
+                'reading_linearity': reading_linearity,
+                'avg_saccade_time': avg_saccade_time,
+                'reread_score': reread_score
+            }
+        }
+
+    def _analyze_indicators(self, current_time: float, metrics: Dict, steps: int) -> Dict:
+        """Expensive tier: regression analysis, dyslexia indicators and probability.
+        
+        The probability's rate limit and decay are per frame, so they are
+        scaled by the steps (frames) since the last tick.
+        """
+        # Only analyze if actively reading
+        is_active = self._is_active_reading(current_time)
+        
+        enhanced = metrics['enhanced_metrics']
+        cognitive = metrics['cognitive_metrics']
+        fixation_stability = enhanced['fixation_stability']
+        reading_linearity = enhanced['reading_linearity']
+        avg_saccade_time = enhanced['avg_saccade_time']
+        reread_score = enhanced['reread_score']
+        cognitive_load = cognitive['load_score']
+        pupil_load = cognitive['pupil_load']
+        blink_load = cognitive['blink_load']
+        
         # Get regression analysis only if actively reading
         regression_analysis = {}
-        if is_active and len(self.eye_metrics['gaze_positions']) >= 2:
-            current_gaze = self.eye_metrics['gaze_positions'][-1]
-            previous_gaze = self.eye_metrics['gaze_positions'][-2]
-            regression_analysis = self._analyze_regression_patterns(
-                current_gaze, previous_gaze, current_time
-            )
+        if is_active:
+            regression_analysis = self._analyze_regression_patterns(current_time)
         
         # Calculate probability only if actively reading
         if is_active:
             # Enhanced indicators with smoothed metrics
             indicators = {
                 'backward_saccades': regression_analysis.get('total_regressions', 0) > 0,
-                'long_fixations': len([f for f in self.eye_metrics.get('fixations', [])
-                                     if f.get('duration', 0) > self.fixation_duration_threshold]) > 3,
-                'irregular_saccades': len([s for s in self.eye_metrics.get('saccades', [])
-                                         if s.get('length', 0) > self.saccade_length_threshold]) > 2,
+                'long_fixations': self.long_fixation_count > 3,
+                'irregular_saccades': self.long_saccade_count > 2,
                 'high_cognitive_load': cognitive_load > 0.5,
                 'high_pupil_load': pupil_load > 0.4,
                 'high_blink_load': blink_load > 0.4,
@@ -735,7 +913,7 @@ class ReadingAnalyzer:
             
             # Calculate new probability
             new_probability = sum(
-                weights[k] * float(v) 
+                self.indicator_weights[k] * float(v) 
                 for k, v in indicators.items()
             )
             
@@ -746,18 +924,18 @@ class ReadingAnalyzer:
             new_probability = 1 / (1 + math.exp(-10 * (new_probability - 0.5)))
             
             # Limit rate of change
+            max_change = self.probability_change_rate * steps
             probability_diff = new_probability - self.last_probability
-            if abs(probability_diff) > self.probability_change_rate:
+            if abs(probability_diff) > max_change:
                 new_probability = self.last_probability + (
-                    self.probability_change_rate if probability_diff > 0 
-                    else -self.probability_change_rate
+                    max_change if probability_diff > 0 else -max_change
                 )
             
             self.last_probability = new_probability
-            dyslexia_probability = self._smooth_metric('dyslexia_probability', new_probability)
+            dyslexia_probability = self._smooth_metric('dyslexia_probability', new_probability, steps)
         else:
             # If not actively reading, maintain last probability or decrease slowly
-            dyslexia_probability = max(0, self.last_probability - 0.01)
+            dyslexia_probability = max(0, self.last_probability - 0.01 * steps)
             self.last_probability = dyslexia_probability
         
         # Enhanced severity classification with smoother transitions
@@ -776,20 +954,6 @@ class ReadingAnalyzer:
             severity = "Mild"
             
         return {
-            'fixation_count': self.fixation_count,
-            'regression_count': self.regression_count,
-            'reading_speed': reading_speed,
-            'cognitive_metrics': {
-                'load_score': cognitive_load,
-                'pupil_load': pupil_load,
-                'blink_load': blink_load
-            },
-            'enhanced_metrics': {
-                'fixation_stability': fixation_stability,
-                'reading_linearity': reading_linearity,
-                'avg_saccade_time': avg_saccade_time,
-                'reread_score': reread_score
-            },
             'regression_analysis': regression_analysis,
             'dyslexia_indicators': {
                 'probability': dyslexia_probability,
@@ -830,41 +994,57 @@ class ReadingAnalyzer:
         """Start calibration process"""
         self.calibration_data = []
         self.is_calibrated = False
-        self.calibration_points = [
-            (0.2, 0.2), (0.5, 0.2), (0.8, 0.2),
-            (0.2, 0.5), (0.5, 0.5), (0.8, 0.5),
-            (0.2, 0.8), (0.5, 0.8), (0.8, 0.8)
-        ]
+        self.calibration_points = list(CALIBRATION_GRID)
 
     def start_reading_test(self, text: str):
-        """Start a reading test with given text"""
-        self.test_start_time = time.time()
+        """Start a reading test with given text.
+
+        The test is timed from the next processed frame, as a ReplayClock
+        following the client's capture timestamps only moves when frames arrive.
+        """
+        self.test_start_time = None
         self.test_text = text
         self.reading_data = []  # Clear previous data
-        self.words_read = 0
+        self.eye_metrics['gaze_positions'] = []
+        
+        # Precompute the word layout now if the frame size is known,
+        # otherwise on the first processed frame
+        if self.frame_size is not None:
+            self._build_text_layout(self.frame_size[0])
+        else:
+            self.text_layout = None
+            self._reset_word_tracking()
+        self.event_detector.reset()
+        self.fixation_count = 0
+        self.regression_count = 0
+        self.long_fixation_count = 0
+        self.long_saccade_count = 0
+        self.saccade_time_stats.reset()
+        self.fixation_movement_stats.reset()
+        self._reset_analytics()
+
+    def reset(self):
+        """Return to the state of a new analyzer, keeping the eye tracker's FaceMesh"""
+        eye_tracker = self.eye_tracker
+        eye_tracker.reset()
+        self.__init__(clock=self.clock, eye_tracker=eye_tracker, analytics_rates=self.analytics_rates)
 
     def release(self):
         """Release resources"""
         self.eye_tracker.release()
         self.reading_data = [] 
         self.calibration_data = []
-        self.test_text = None 
+        self.test_text = None
+        self.text_layout = None
 
     def _calculate_fixation_stability(self) -> float:
-        """Calculate how stable fixations are based on gaze position variance"""
+        """Calculate how stable fixations are based on gaze movement within them"""
         try:
-            if len(self.fixation_stability_history) < 2:
+            if not self.fixation_movement_stats.count:
                 return 0.5  # Default middle value
             
-            # Calculate movement between consecutive positions
-            movements = []
-            positions = np.array(self.fixation_stability_history)
-            for i in range(1, len(positions)):
-                movement = np.linalg.norm(positions[i] - positions[i-1])
-                movements.append(movement)
-            
             # Calculate stability score based on average movement
-            avg_movement = np.mean(movements)
+            avg_movement = self.fixation_movement_stats.mean
             stability_score = 1.0 / (1.0 + avg_movement * 20)  # Adjusted sensitivity
             
             # Map to more realistic range (0.3-0.95)
@@ -963,22 +1143,3 @@ class ReadingAnalyzer:
             return (0, 255, 255)  # Yellow
         else:
             return (0, 0, 255)  # Red
-
-    def _draw_load_bar(self, frame: np.ndarray, x: int, y: int, 
-                      load_score: float, color: Tuple[int, int, int]):
-        """Draw a load bar with the given score"""
-        bar_length = 200
-        bar_height = 20
-        
-        # Draw background bar
-        cv2.rectangle(frame, (x, y), (x + bar_length, y + bar_height),
-                     (128, 128, 128), -1)
-        
-        # Draw filled portion based on load
-        filled_length = int(bar_length * load_score)
-        cv2.rectangle(frame, (x, y), (x + filled_length, y + bar_height),
-                     color, -1)
-        
-        # Draw border
-        cv2.rectangle(frame, (x, y), (x + bar_length, y + bar_height),
-                     (255, 255, 255), 1)
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Compact records for per-frame samples and eye events.
+
+Every frame used to produce several dicts: the EyeTracker's metrics, the
+ReadingAnalyzer's copy of them, a saccade or fixation entry and the
+cognitive load analyzer's pupil, blink and load results. Most of them are
+kept in bounded histories, so a long session holds thousands of them.
+
+The classes here declare their fields in ``__slots__``: an instance is a
+fixed-size object with no per-instance ``__dict__``, about a quarter of the
+size of the equivalent dict. They still read like the dicts they replace
+(``record['field']``, ``record.get('field')``, ``'field' in record``), so
+existing callers keep working, and ``to_dict`` converts a record into plain
+JSON-ready values where it leaves the process.
+"""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return [_plain(v) for v in value]
+    return value
+
+
+class Record:
+    """Base of the slotted records; implements the read side of the dict protocol."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(f"{type(self).__name__} has no field {key}")
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def items(self):
+        return ((name, getattr(self, name)) for name in self.__slots__)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Fields as a dict of plain Python values (arrays as lists)"""
+        return {name: _plain(getattr(self, name)) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            other = dict(other.items())
+        return isinstance(other, dict) and dict(self.items()) == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class EyeSample(Record):
+    """Eye metrics of one frame, as returned by EyeTracker.process_landmarks."""
+
+    __slots__ = ('timestamp', 'left_eye', 'right_eye', 'left_ear', 'right_ear', 'avg_ear', 'is_blink',
+                 'left_gaze', 'right_gaze', 'left_pupil_size', 'right_pupil_size', 'gaze_stability',
+                 'blink_rate', 'cognitive_load_score', 'pupil_load', 'blink_load', 'face_detected')
+
+    def __init__(self, timestamp: float, left_eye: np.ndarray, right_eye: np.ndarray, left_ear: float,
+                 right_ear: float, avg_ear: float, is_blink: bool, left_gaze: Tuple[float, float],
+                 right_gaze: Tuple[float, float], left_pupil_size: float, right_pupil_size: float,
+                 gaze_stability: float, blink_rate: float, cognitive_load_score: float = 0.0,
+                 pupil_load: float = 0.0, blink_load: float = 0.0, face_detected: bool = True):
+        self.timestamp = timestamp
+        self.left_eye = left_eye
+        self.right_eye = right_eye
+        self.left_ear = left_ear
+        self.right_ear = right_ear
+        self.avg_ear = avg_ear
+        self.is_blink = is_blink
+        self.left_gaze = left_gaze
+        self.right_gaze = right_gaze
+        self.left_pupil_size = left_pupil_size
+        self.right_pupil_size = right_pupil_size
+        self.gaze_stability = gaze_stability
+        self.blink_rate = blink_rate
+        self.cognitive_load_score = cognitive_load_score
+        self.pupil_load = pupil_load
+        self.blink_load = blink_load
+        self.face_detected = face_detected  # False for the placeholder sample of a frame without a face
+
+
+class ReadingSample(Record):
+    """Gaze sample kept in ReadingAnalyzer.reading_data."""
+
+    __slots__ = ('timestamp', 'left_eye', 'right_eye', 'left_gaze', 'right_gaze', 'is_blinking',
+                 'vertical_movement')
+
+    def __init__(self, timestamp: float, left_eye: Tuple[float, float], right_eye: Tuple[float, float],
+                 left_gaze: Tuple[float, float], right_gaze: Tuple[float, float], is_blinking: bool,
+                 vertical_movement: float):
+        self.timestamp = timestamp
+        self.left_eye = left_eye
+        self.right_eye = right_eye
+        self.left_gaze = left_gaze
+        self.right_gaze = right_gaze
+        self.is_blinking = is_blinking
+        self.vertical_movement = vertical_movement
+
+
+class SaccadeSample(Record):
+    """A frame whose gaze moved faster than the saccade threshold."""
+
+    __slots__ = ('timestamp', 'velocity', 'amplitude')
+
+    def __init__(self, timestamp: float, velocity: float, amplitude: float):
+        self.timestamp = timestamp
+        self.velocity = velocity
+        self.amplitude = amplitude
+
+
+class Fixation(Record):
+    """A run of slow gaze samples; end_time grows while it lasts."""
+
+    __slots__ = ('start_time', 'end_time', 'position')
+
+    def __init__(self, start_time: float, end_time: float, position: Tuple[float, float]):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.position = position
+
+
+class PupilMetrics(Record):
+    """Pupil dilation metrics of CognitiveLoadAnalyzer.update_pupil_size."""
+
+    __slots__ = ('current_dilation', 'mean_dilation', 'dilation_variability', 'dilation_velocity',
+                 'relative_dilation')
+
+    def __init__(self, current_dilation: float, mean_dilation: float, dilation_variability: float,
+                 dilation_velocity: float, relative_dilation: float):
+        self.current_dilation = current_dilation
+        self.mean_dilation = mean_dilation
+        self.dilation_variability = dilation_variability
+        self.dilation_velocity = dilation_velocity
+        self.relative_dilation = relative_dilation
+
+
+class BlinkMetrics(Record):
+    """Blink metrics of CognitiveLoadAnalyzer.update_blink."""
+
+    __slots__ = ('mean_blink_duration', 'blink_variability', 'blink_rate', 'is_blinking')
+
+    def __init__(self, mean_blink_duration: float, blink_variability: float, blink_rate: float,
+                 is_blinking: bool):
+        self.mean_blink_duration = mean_blink_duration
+        self.blink_variability = blink_variability
+        self.blink_rate = blink_rate
+        self.is_blinking = is_blinking
+
+
+class CognitiveLoad(Record):
+    """Combined load of CognitiveLoadAnalyzer.calculate_cognitive_load."""
+
+    __slots__ = ('cognitive_load_score', 'load_level', 'pupil_load_component', 'blink_load_component')
+
+    def __init__(self, cognitive_load_score: float, load_level: str, pupil_load_component: float,
+                 blink_load_component: float):
+        self.cognitive_load_score = cognitive_load_score
+        self.load_level = load_level
+        self.pupil_load_component = pupil_load_component
+        self.blink_load_component = blink_load_component
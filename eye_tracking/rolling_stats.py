@@ -0,0 +1,320 @@
+"""
+Constant-time rolling statistics for per-frame metrics.
+
+Every estimator here updates in O(1) per sample and keeps a fixed amount of
+state, so hundreds of them can run side by side at camera frame rate without
+growing lists or rebuilding numpy arrays on each frame.
+"""
+
+import math
+from typing import Optional
+
+
+class ExponentialMovingAverage:
+    """Incremental exponential moving average."""
+
+    __slots__ = ('alpha', 'value', 'count')
+
+    def __init__(self, alpha: float = 0.1):
+        """Initialize the average.
+
+        Args:
+            alpha (float): Smoothing factor in (0, 1]; higher values react faster
+        """
+        self.alpha = alpha
+        self.value = 0.0
+        self.count = 0
+
+    def update(self, x: float, steps: int = 1) -> float:
+        """Add a sample and return the smoothed value.
+
+        steps > 1 is the same as adding x that many times, for a value that
+        is only sampled every few frames but should smooth at the frame rate.
+        """
+        if self.count == 0:
+            self.value = x
+        elif steps == 1:
+            self.value += self.alpha * (x - self.value)
+        else:
+            self.value += (1.0 - (1.0 - self.alpha) ** steps) * (x - self.value)
+        self.count += steps
+        return self.value
+
+    def reset(self):
+        self.value = 0.0
+        self.count = 0
+
+
+class RollingWelford:
+    """Welford mean/variance over the last ``window`` samples.
+
+    With ``window=None`` the statistics cover every sample seen. Otherwise the
+    samples are kept in a preallocated ring buffer and the oldest one is
+    swapped out of the running mean and M2 when a new one arrives.
+    """
+
+    __slots__ = ('window', '_buffer', '_index', 'count', 'mean', '_m2', 'last')
+
+    def __init__(self, window: Optional[int] = None):
+        """Initialize the accumulator.
+
+        Args:
+            window (int): Number of recent samples to cover, or None for all samples
+        """
+        self.window = window
+        self._buffer = [0.0] * window if window else None
+        self.reset()
+
+    def update(self, x: float) -> float:
+        """Add a sample and return the updated mean"""
+        if self.window and self.count == self.window:
+            # Replace the oldest sample in place
+            old = self._buffer[self._index]
+            old_mean = self.mean
+            self.mean += (x - old) / self.count
+            self._m2 += (x - old) * (x - self.mean + old - old_mean)
+        else:
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (x - self.mean)
+
+        if self._buffer is not None:
+            self._buffer[self._index] = x
+            self._index = (self._index + 1) % self.window
+        self.last = x
+        return self.mean
+
+    @property
+    def variance(self) -> float:
+        """Population variance (matches ``np.var``)"""
+        if self.count == 0:
+            return 0.0
+        return max(self._m2, 0.0) / self.count
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation (matches ``np.std``)"""
+        return math.sqrt(self.variance)
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._index = 0
+        self.last = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class P2Quantile:
+    """Streaming quantile estimate using the P-squared algorithm.
+
+    Jain & Chlamtac (1985): five markers track the minimum, maximum, the target
+    quantile and two intermediate quantiles, and are nudged with a piecewise
+    parabolic fit as samples arrive. Memory and update cost are constant.
+    """
+
+    __slots__ = ('p', 'count', '_heights', '_positions', '_desired', '_increments')
+
+    def __init__(self, p: float):
+        """Initialize the estimator.
+
+        Args:
+            p (float): Target quantile in (0, 1), e.g. 0.9 for the 90th percentile
+        """
+        if not 0.0 < p < 1.0:
+            raise ValueError("Quantile must be between 0 and 1")
+        self.p = p
+        self._heights = [0.0] * 5
+        self._positions = [0] * 5
+        self._desired = [0.0] * 5
+        self._increments = (0.0, p / 2, p, (1 + p) / 2, 1.0)
+        self.reset()
+
+    def update(self, x: float):
+        """Add a sample"""
+        q = self._heights
+        n = self._positions
+
+        if self.count < 5:
+            q[self.count] = x
+            self.count += 1
+            if self.count == 5:
+                q.sort()
+            return
+
+        # Find the cell containing x, extending the extremes if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x < q[1]:
+            k = 0
+        elif x < q[2]:
+            k = 1
+        elif x < q[3]:
+            k = 2
+        elif x <= q[4]:
+            k = 3
+        else:
+            q[4] = x
+            k = 3
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Adjust the three middle markers if they drifted off their desired positions
+        for i in range(1, 4):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if q[i - 1] < candidate < q[i + 1]:
+                    q[i] = candidate
+                else:
+                    q[i] = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                n[i] += step
+
+        self.count += 1
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q = self._heights
+        n = self._positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> float:
+        """Current quantile estimate (0.0 before any sample)"""
+        if self.count == 0:
+            return 0.0
+        if self.count < 5:
+            # Too few samples for the markers; use the exact order statistic
+            values = sorted(self._heights[:self.count])
+            return values[min(int(self.count * self.p), self.count - 1)]
+        return self._heights[2]
+
+    def reset(self):
+        self.count = 0
+        p = self.p
+        for i in range(5):
+            self._heights[i] = 0.0
+            self._positions[i] = i
+        self._desired[:] = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class RollingSums:
+    """Running sum and sum of squares over the last ``window`` samples.
+
+    Behaves like a ``deque(maxlen=window)`` of floats (``len``, indexing,
+    iteration, ``append``, ``clear``) while keeping the mean and standard
+    deviation available in O(1). Values are stored relative to the first
+    sample to limit cancellation in the sum of squares, and the sums are
+    recomputed from the buffer once per ``window`` evictions to stop drift.
+    """
+
+    __slots__ = ('window', '_buffer', '_index', 'count', '_shift', '_sum', '_sum_sq', '_evictions')
+
+    def __init__(self, window: int):
+        """Initialize the window.
+
+        Args:
+            window (int): Number of recent samples to cover
+        """
+        self.window = window
+        self._buffer = [0.0] * window
+        self.clear()
+
+    def append(self, x: float):
+        """Add a sample, evicting the oldest one when the window is full"""
+        if self._shift is None:
+            self._shift = x
+        d = x - self._shift
+
+        if self.count == self.window:
+            old = self._buffer[self._index]
+            self._sum -= old
+            self._sum_sq -= old * old
+            self._evictions += 1
+        else:
+            self.count += 1
+
+        self._buffer[self._index] = d
+        self._index = (self._index + 1) % self.window
+        self._sum += d
+        self._sum_sq += d * d
+
+        if self._evictions >= self.window:
+            self._resync()
+
+    def extend(self, values):
+        for x in values:
+            self.append(float(x))
+
+    def _resync(self):
+        total = 0.0
+        total_sq = 0.0
+        for d in self._buffer:
+            total += d
+            total_sq += d * d
+        self._sum = total
+        self._sum_sq = total_sq
+        self._evictions = 0
+
+    @property
+    def sum(self) -> float:
+        return self._sum + (self._shift or 0.0) * self.count
+
+    @property
+    def mean(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return self._shift + self._sum / self.count
+
+    @property
+    def variance(self) -> float:
+        """Population variance (matches ``np.var``)"""
+        if self.count == 0:
+            return 0.0
+        mean_d = self._sum / self.count
+        return max(self._sum_sq / self.count - mean_d * mean_d, 0.0)
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation (matches ``np.std``)"""
+        return math.sqrt(self.variance)
+
+    def clear(self):
+        self.count = 0
+        self._index = 0
+        self._shift = None
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._evictions = 0
+        for i in range(self.window):
+            self._buffer[i] = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __getitem__(self, i: int) -> float:
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("RollingSums index out of range")
+        return self._buffer[(self._index - self.count + i) % self.window] + self._shift
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
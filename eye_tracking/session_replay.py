@@ -0,0 +1,123 @@
+"""
+Record eye-tracking sessions and replay them through the analyzers.
+
+Replays feed recorded landmarks through ``ReadingAnalyzer`` (and with it
+``EyeTracker`` and ``CognitiveLoadAnalyzer``) on a ``ReplayClock``, so they
+run as fast as the CPU allows and produce the same metrics every time.
+
+Usage:
+    python -m eye_tracking.session_replay record session.eyrec
+    python -m eye_tracking.session_replay replay session.eyrec [--text "..."]
+"""
+
+import argparse
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+from .clock import ReplayClock
+from .reading_analyzer import ReadingAnalyzer
+from .session_recorder import SessionReader
+
+
+def replay_session(path: str, analyzer: Optional[ReadingAnalyzer] = None,
+                   text: Optional[str] = None) -> Iterator[Tuple[float, Dict]]:
+    """Feed a recording through the analyzer stack frame by frame.
+
+    Args:
+        path (str): Recording written by SessionRecorder
+        analyzer (ReadingAnalyzer): Analyzer to drive; must use a ReplayClock.
+            A fresh one is created if omitted.
+        text (str): Optional reading text to start a reading test with
+
+    Yields:
+        tuple: (timestamp, reading metrics) per recorded frame
+
+    Raises:
+        ValueError: If the analyzer does not use a ReplayClock
+    """
+    if analyzer is None:
+        analyzer = ReadingAnalyzer(clock=ReplayClock())
+    clock = analyzer.clock
+    if not isinstance(clock, ReplayClock):
+        raise ValueError("Replays need an analyzer created with a ReplayClock")
+
+    started = False
+    for frame in SessionReader(path):
+        clock.set(frame.timestamp)
+        if not started:
+            started = True
+            if text is not None:
+                analyzer.start_reading_test(text)
+        yield frame.timestamp, analyzer.process_landmarks(frame.landmarks, frame.frame_shape, frame.timestamp)
+
+
+def record(path: str, camera: int = 0):
+    """Run a live reading session and record it until 'q' is pressed"""
+    import cv2
+
+    analyzer = ReadingAnalyzer()
+    analyzer.eye_tracker.start_recording(path)
+    cap = cv2.VideoCapture(camera)
+    print(f"Recording to {path}; press 'q' to stop")
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            processed_frame, _ = analyzer.process_frame(frame)
+            cv2.imshow('Recording', processed_frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        frames = analyzer.eye_tracker.recorder.frame_count
+        cap.release()
+        analyzer.release()
+    print(f"Recorded {frames} frames")
+
+
+def replay(path: str, text: Optional[str] = None):
+    """Replay a recording and print throughput and the final metrics"""
+    start = time.perf_counter()
+    frames = 0
+    first = last = None
+    metrics = None
+    for timestamp, metrics in replay_session(path, text=text):
+        frames += 1
+        if first is None:
+            first = timestamp
+        last = timestamp
+    elapsed = time.perf_counter() - start
+
+    if not frames:
+        print("Recording is empty")
+        return
+    duration = last - first
+    print(f"Replayed {frames} frames ({duration:.1f}s of recording) in {elapsed:.2f}s "
+          f"({duration / elapsed if elapsed > 0 else float('inf'):.1f}x real time)")
+    print(f"Reading speed: {metrics['reading_speed']} WPM")
+    print(f"Fixations: {metrics['fixation_count']}, regressions: {metrics['regression_count']}")
+    print(f"Dyslexia probability: {metrics['dyslexia_indicators']['probability']:.2f} "
+          f"({metrics['dyslexia_indicators']['severity']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay eye-tracking sessions")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help="Record a live session from the webcam")
+    record_parser.add_argument('path')
+    record_parser.add_argument('--camera', type=int, default=0)
+
+    replay_parser = subparsers.add_parser('replay', help="Re-analyze a recorded session")
+    replay_parser.add_argument('path')
+    replay_parser.add_argument('--text', default=None, help="Reading text shown during the session")
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args.path, args.camera)
+    else:
+        replay(args.path, args.text)
+
+
+if __name__ == "__main__":
+    main()
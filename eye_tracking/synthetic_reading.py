@@ -0,0 +1,139 @@
+"""
+Synthetic reading sessions for benchmarks and tests without a camera.
+
+``generate_reading`` simulates a reader going through lines of text at a
+fixed frame rate: fixations of about a quarter second on successive words,
+short forward saccades, occasional regressions to earlier words, return
+sweeps to the start of the next line and blinks. The gaze stream it returns
+can be fed to ``CognitiveLoadAnalyzer`` directly, and ``landmark_frames``
+renders it as face-mesh eye landmarks for ``EyeTracker.process_landmarks``
+and ``ReadingAnalyzer.process_landmarks``.
+"""
+
+from collections import namedtuple
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+N_LANDMARKS = 478  # Face mesh with iris refinement
+
+# Gaze stream: timestamps (N,), gaze (N, 2) direction in -1..1, is_blink (N,),
+# pupil_size (N,) and the number of fixations, regressions, return sweeps and
+# blinks that were simulated
+SyntheticReading = namedtuple('SyntheticReading', [
+    'timestamps', 'gaze', 'is_blink', 'pupil_size',
+    'fixations', 'regressions', 'return_sweeps', 'blinks'
+])
+
+
+def generate_reading(duration: float, fps: float = 30.0, words_per_line: int = 10, lines: int = 8,
+                     regression_probability: float = 0.1, blinks_per_minute: float = 15.0,
+                     start_time: float = 1000.0, seed: int = 0) -> SyntheticReading:
+    """Simulate a reading session.
+
+    Args:
+        duration (float): Session length in seconds
+        fps (float): Frame rate of the generated stream
+        words_per_line (int): Words on each line of the simulated page
+        lines (int): Lines on the page; the reader starts over after the last one
+        regression_probability (float): Chance that a saccade goes back 1-3 words
+        blinks_per_minute (float): Average blink rate
+        start_time (float): Timestamp of the first frame
+        seed (int): Random seed; the same arguments always give the same session
+
+    Returns:
+        SyntheticReading: Per-frame gaze stream and event counts
+    """
+    rng = np.random.default_rng(seed)
+    n_frames = int(round(duration * fps))
+    word_x = np.linspace(-0.8, 0.8, words_per_line)
+    line_y = np.linspace(-0.6, 0.6, lines)
+
+    gaze = np.empty((n_frames, 2))
+    fixations = regressions = return_sweeps = 0
+    word, line = 0, 0
+    position = np.array([word_x[0], line_y[0]])
+    i = 0
+    while i < n_frames:
+        # Fixate the current word, with a little tremor
+        fixation_frames = max(2, int(round(rng.lognormal(np.log(0.225), 0.3) * fps)))
+        end = min(n_frames, i + fixation_frames)
+        gaze[i:end] = position + rng.normal(0, 0.005, (end - i, 2))
+        fixations += 1
+        i = end
+
+        # Pick the next word
+        if rng.random() < regression_probability and word > 0:
+            word = max(0, word - int(rng.integers(1, 4)))
+            regressions += 1
+            saccade_frames = 1
+        elif word + 1 < words_per_line:
+            word += int(rng.choice((1, 1, 1, 2)))
+            word = min(word, words_per_line - 1)
+            saccade_frames = 1
+        else:
+            word, line = 0, (line + 1) % lines
+            return_sweeps += 1
+            saccade_frames = 2
+
+        # Saccade: move to the target over a frame or two
+        target = np.array([word_x[word], line_y[line]])
+        end = min(n_frames, i + saccade_frames)
+        steps = np.arange(1, end - i + 1)[:, None] / (saccade_frames + 1)
+        gaze[i:end] = position + (target - position) * steps
+        position = target
+        i = end
+
+    # Blinks at random times, each closing the eyes for 200-330 ms
+    is_blink = np.zeros(n_frames, dtype=bool)
+    blinks = rng.poisson(blinks_per_minute * duration / 60.0)
+    for start in rng.integers(0, max(1, n_frames - 10), blinks):
+        is_blink[start:start + int(rng.integers(6, 11))] = True
+
+    # Pupil size drifts slowly around a baseline
+    drift = np.cumsum(rng.normal(0, 0.0005, n_frames))
+    pupil_size = 0.3 + 0.02 * np.tanh(drift) + rng.normal(0, 0.005, n_frames)
+
+    timestamps = start_time + np.arange(n_frames) / fps
+    return SyntheticReading(timestamps, gaze, is_blink, pupil_size,
+                            fixations, regressions, return_sweeps, int(blinks))
+
+
+def landmark_frames(reading: SyntheticReading, left_indices: Sequence[int],
+                    right_indices: Sequence[int], face_lost_every: Optional[int] = None,
+                    seed: int = 0) -> Iterator[Optional[np.ndarray]]:
+    """Render a gaze stream as normalized face-mesh landmarks, one array per frame.
+
+    Each eye is an ellipse of contour points; its first index (which the
+    tracker reads as the iris) is offset from the eye center along the gaze,
+    and the lids close during blinks. A single buffer is reused and yielded for
+    every frame, which is all ``EyeTracker.process_landmarks`` needs.
+
+    Args:
+        reading (SyntheticReading): Stream from ``generate_reading``
+        left_indices (list): Left eye landmark indices, e.g. ``EyeTracker.LEFT_EYE_INDICES``
+        right_indices (list): Right eye landmark indices
+        face_lost_every (int): If set, every n-th frame yields None (no face)
+        seed (int): Random seed for the landmark noise
+
+    Yields:
+        np.ndarray: (478, 2) float32 landmarks, or None when the face is lost
+    """
+    rng = np.random.default_rng(seed)
+    landmarks = np.zeros((N_LANDMARKS, 2), dtype=np.float32)
+    eyes = []
+    for center_x, indices in ((0.4, np.asarray(left_indices)), (0.6, np.asarray(right_indices))):
+        angles = np.linspace(0, 2 * np.pi, len(indices), endpoint=False)
+        eyes.append((center_x, indices, 0.05 * np.cos(angles), np.sin(angles)))
+
+    for i, ((gaze_x, gaze_y), blink) in enumerate(zip(reading.gaze.tolist(), reading.is_blink.tolist())):
+        if face_lost_every and i % face_lost_every == face_lost_every - 1:
+            yield None
+            continue
+        opening = 0.002 if blink else 0.02
+        for center_x, indices, contour_x, contour_y in eyes:
+            landmarks[indices, 0] = center_x + contour_x
+            landmarks[indices, 1] = 0.4 + opening * contour_y + rng.normal(0, 0.0005, len(indices))
+            landmarks[indices[0]] = (center_x + 0.02 * gaze_x, 0.4 + 0.02 * gaze_y)
+        yield landmarks
+
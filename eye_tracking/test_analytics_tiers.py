@@ -0,0 +1,104 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from eye_tracking.clock import RateScheduler, ReplayClock
+from eye_tracking.reading_analyzer import ReadingAnalyzer
+
+
+def test_rate_scheduler_keeps_phase():
+    scheduler = RateScheduler(10.0)
+    ticks = []
+    for i in range(90):
+        scheduler.advance()
+        # Asking again within a frame counts nothing
+        if scheduler.due(i / 30) | scheduler.due(i / 30):
+            ticks.append(i)
+    assert ticks == list(range(0, 90, 3))
+    assert scheduler.steps == 3
+    # A stalled clock repeats nothing, a clock jumping back runs at once
+    scheduler.advance()
+    assert not scheduler.due(89 / 30)
+    assert scheduler.due(0.5) and scheduler.steps == 3
+    # Without a rate it runs once per frame
+    unlimited = RateScheduler(None)
+    unlimited.advance()
+    assert [unlimited.due(0.0) for _ in range(3)] == [True, False, False]
+
+
+def feed(analyzer, clock, frames, fps=30.0):
+    for i in range(frames):
+        clock.advance(1 / fps)
+        x = -0.8 + 0.1 * (i % 16)  # Left to right along a line, then back
+        analyzer._update_reading_metrics({'left_gaze': (x, 0.0), 'right_gaze': (x, 0.0)})
+        yield analyzer._analyze_reading_patterns()
+
+
+def test_tiers_run_at_their_rates():
+    clock = ReplayClock(0.0)
+    analyzer = ReadingAnalyzer(clock=clock)
+    analyzer.start_reading_test("one two three four")
+    calls = {'metrics': 0, 'indicators': 0}
+    for tier, method in (('metrics', '_analyze_enhanced_metrics'), ('indicators', '_analyze_indicators')):
+        compute = getattr(analyzer, method)
+
+        def counted(*args, tier=tier, compute=compute):
+            calls[tier] += 1
+            return compute(*args)
+        setattr(analyzer, method, counted)
+
+    results = list(feed(analyzer, clock, 120))
+    assert calls == {'metrics': 40, 'indicators': 16}
+    # Counters are current on every frame
+    assert results[-1]['fixation_count'] == analyzer.fixation_count
+    assert results[-1]['regression_count'] == analyzer.regression_count
+    # Between ticks the cached results are reused, and a repeated call is free
+    assert results[1]['enhanced_metrics'] is results[2]['enhanced_metrics']
+    again = analyzer._analyze_reading_patterns()
+    assert again['dyslexia_indicators'] is results[-1]['dyslexia_indicators']
+    assert calls == {'metrics': 40, 'indicators': 16}
+
+    # A new test recomputes everything on its first frame
+    analyzer.start_reading_test("five six")
+    next(feed(analyzer, clock, 1))
+    assert calls == {'metrics': 41, 'indicators': 17}
+
+
+def test_tiered_probability_follows_per_frame_probability():
+    probabilities = {}
+    for name, rates in (('per_frame', {'metrics': None, 'indicators': None}), ('tiered', None)):
+        clock = ReplayClock(0.0)
+        analyzer = ReadingAnalyzer(clock=clock, analytics_rates=rates)
+        analyzer.start_reading_test("one two three four")
+        probabilities[name] = [r['dyslexia_indicators']['probability'] for r in feed(analyzer, clock, 600)]
+    # Same trajectory, sampled at 4 Hz and held in between
+    for i in range(0, 600, 30):
+        assert probabilities['tiered'][i] == pytest.approx(probabilities['per_frame'][i], abs=0.05)
+    assert probabilities['tiered'][-1] > 0
+
+
+def test_repeated_calls_per_frame_do_not_change_results():
+    probabilities = {}
+    for calls in (1, 2, 5):
+        clock = ReplayClock(0.0)
+        analyzer = ReadingAnalyzer(clock=clock)
+        analyzer.start_reading_test("one two three four")
+        for result in feed(analyzer, clock, 90):
+            for _ in range(calls - 1):
+                result = analyzer._analyze_reading_patterns()
+        probabilities[calls] = result['dyslexia_indicators']['probability']
+    assert probabilities[1] == probabilities[2] == probabilities[5]
+
+
+def test_analytics_rates_are_configurable():
+    analyzer = ReadingAnalyzer(analytics_rates={'indicators': 2.0})
+    assert analyzer.analytics_rates == {'metrics': 10.0, 'indicators': 2.0}
+    analyzer.set_analytics_rates(metrics=0)
+    analyzer.reset()
+    assert analyzer.analytics_rates == {'metrics': 0, 'indicators': 2.0}
+    with pytest.raises(ValueError):
+        analyzer.set_analytics_rates(probability=1.0)
+    with pytest.raises(ValueError):
+        ReadingAnalyzer(analytics_rates={'metrics': -1.0})
@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv
+import json
+
+import cv2
+import numpy as np
+
+from eye_tracking.batch_analysis import load_manifest, run_batch
+
+
+def write_video(path, n_frames=20, shade=0):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 30, (160, 120))
+    for i in range(n_frames):
+        writer.write(np.full((120, 160, 3), (shade + i) % 255, dtype=np.uint8))
+    writer.release()
+
+
+def test_batch_writes_outputs_and_resumes(tmp_path):
+    videos = tmp_path / 'videos'
+    (videos / 'child').mkdir(parents=True)
+    write_video(videos / 'a.avi')
+    write_video(videos / 'child' / 'a.avi', n_frames=10)
+    output = tmp_path / 'results'
+
+    manifest = run_batch(str(videos), str(output), workers=1)
+    assert len(manifest) == 2
+    assert all(entry['status'] == 'done' for entry in manifest.values())
+
+    with open(output / 'a.frames.csv') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 20
+    assert rows[1]['timestamp'] == '0.0333'
+    with open(output / 'child__a.summary.json') as f:
+        summary = json.load(f)
+    assert summary['frames'] == 10
+    assert summary['face_detected_frames'] == 0
+
+    # A second run skips finished videos
+    mtime = os.path.getmtime(output / 'a.frames.csv')
+    run_batch(str(videos), str(output), workers=1)
+    assert os.path.getmtime(output / 'a.frames.csv') == mtime
+
+    # Changed videos are analyzed again
+    write_video(videos / 'a.avi', n_frames=5, shade=100)
+    manifest = run_batch(str(videos), str(output), workers=1)
+    assert manifest[str(videos / 'a.avi')]['frames'] == 5
+    assert load_manifest(str(output)) == manifest
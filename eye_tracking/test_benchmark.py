@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from eye_tracking.benchmark import DEFAULT_IMAGE_DIR, benchmark_facemesh, benchmark_session, find_images
+from eye_tracking.clock import ReplayClock
+from eye_tracking.reading_analyzer import ReadingAnalyzer
+from eye_tracking.synthetic_reading import generate_reading, landmark_frames
+
+
+def test_synthetic_reading_is_deterministic():
+    first = generate_reading(30, seed=4)
+    second = generate_reading(30, seed=4)
+    assert np.array_equal(first.gaze, second.gaze)
+    assert np.array_equal(first.is_blink, second.is_blink)
+    assert len(first.timestamps) == 900
+    assert first.fixations > 100 and first.return_sweeps > 5
+    assert first.regressions > 0 and first.blinks > 0
+    # Gaze moves left to right along a line and sweeps back at its end
+    assert np.mean(np.diff(first.gaze[:, 0]) > 0.05) > np.mean(np.diff(first.gaze[:, 0]) < -0.05)
+
+
+def test_analyzers_see_the_simulated_reading():
+    reading = generate_reading(60, regression_probability=0.2, seed=1)
+    analyzer = ReadingAnalyzer(clock=ReplayClock())
+    tracker = analyzer.eye_tracker
+    blink_frames = 0
+    for timestamp, landmarks in zip(reading.timestamps,
+                                    landmark_frames(reading, tracker.LEFT_EYE_INDICES, tracker.RIGHT_EYE_INDICES)):
+        analyzer.clock.set(timestamp)
+        metrics = analyzer.process_landmarks(landmarks, (480, 640), timestamp)
+        blink_frames += bool(tracker.last_eye_data['is_blink'])
+
+    assert metrics['fixation_count'] > 0
+    assert metrics['regression_count'] > 0
+    assert blink_frames > 0
+    assert set(analyzer.stage_times) >= {'eye_metrics', 'update_reading_metrics', 'analyze_reading_patterns'}
+
+
+def test_benchmark_reports_each_component():
+    results = benchmark_session(10, window=5)
+    assert set(results) == {'eye_tracker', 'reading_analyzer', 'reading_analyzer.update_reading_metrics',
+                            'reading_analyzer.analyze_reading_patterns', 'cognitive_load'}
+    for stats in results.values():
+        assert stats['frames'] == 150
+        assert 0 < stats['p50_ms'] <= stats['p99_ms']
+
+
+def test_facemesh_benchmark_on_stored_images():
+    images = find_images([DEFAULT_IMAGE_DIR])[:2]
+    results = benchmark_facemesh(images, repeats=1)
+    assert results['images'] == len(images)
+    assert results['frames'] == len(images)
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+import numpy as np
+
+from eye_tracking.calibration import CALIBRATION_GRID, GazeCalibration, fit_calibration, polynomial_features
+
+
+def measured_gaze(screen, rng, noise=0.002):
+    """Raw gaze a tracker reports for screen positions: offset, scaled and bent towards the edges"""
+    x, y = screen[:, 0] - 0.5, screen[:, 1] - 0.5
+    raw_x = 0.3 + 0.4 * x + 0.15 * x * x - 0.1 * x * y + 0.2 * x ** 3
+    raw_y = -0.1 + 0.3 * y + 0.12 * y * y + 0.05 * x * x
+    return np.column_stack((raw_x, raw_y)) + rng.normal(0, noise, screen.shape)
+
+
+def test_polynomial_features():
+    features = polynomial_features(np.array([[2.0, 3.0]]), 3)
+    assert features.tolist() == [[1, 2, 3, 4, 6, 9, 8, 12, 18, 27]]
+
+
+def test_polynomial_calibration_beats_linear():
+    rng = np.random.default_rng(0)
+    grid = np.array(CALIBRATION_GRID)
+    gaze = measured_gaze(grid, rng)
+    calibration = fit_calibration(gaze, grid)
+
+    # Held-out positions across the calibrated area
+    test_screen = rng.uniform(0.2, 0.8, (500, 2))
+    test_gaze = measured_gaze(test_screen, rng)
+    polynomial_error = np.linalg.norm(calibration.transform(test_gaze) - test_screen, axis=1).mean()
+    # The former calibration: one least-squares matrix without an offset
+    matrix = np.linalg.lstsq(gaze, grid, rcond=None)[0]
+    linear_error = np.linalg.norm(test_gaze @ matrix - test_screen, axis=1).mean()
+
+    assert calibration.degree > 1
+    assert polynomial_error < linear_error / 3
+    assert polynomial_error < 0.02
+
+
+def test_batch_transform_matches_points_and_round_trips():
+    rng = np.random.default_rng(1)
+    grid = np.array(CALIBRATION_GRID)
+    calibration = fit_calibration(measured_gaze(grid, rng), grid)
+    samples = rng.uniform(-0.1, 0.6, (50, 2))
+
+    batch = calibration.transform(samples)
+    assert batch.shape == (50, 2)
+    assert np.allclose(batch, [calibration.transform_point(p) for p in samples])
+
+    restored = GazeCalibration.from_dict(json.loads(json.dumps(calibration.to_dict())))
+    assert np.allclose(restored.transform(samples), batch)
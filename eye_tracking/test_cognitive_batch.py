@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from eye_tracking.cognitive_load_analyzer import CognitiveLoadAnalyzer
+
+
+def synthetic_session(n_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    timestamps = 1000.0 + np.arange(n_frames) / 30
+    pupil_sizes = 0.3 + rng.normal(0, 0.02, n_frames)
+    eye_closed = np.zeros(n_frames, dtype=bool)
+    for start in rng.choice(n_frames - 5, n_frames // 40, replace=False):
+        eye_closed[start:start + rng.integers(2, 5)] = True
+    return pupil_sizes, eye_closed, timestamps
+
+
+def run_per_frame(analyzer, pupil_sizes, eye_closed, timestamps):
+    loads = []
+    for pupil, closed, t in zip(pupil_sizes, eye_closed, timestamps):
+        pupil_metrics = analyzer.update_pupil_size(float(pupil), t)
+        blink_metrics = analyzer.update_blink(bool(closed), t)
+        load = analyzer.calculate_cognitive_load(pupil_metrics, blink_metrics)
+        loads.append(np.nan if load is None else load['cognitive_load_score'])
+    return np.array(loads)
+
+
+def test_running_window_matches_numpy():
+    analyzer = CognitiveLoadAnalyzer(window_size=20)
+    rng = np.random.default_rng(3)
+    values = rng.uniform(0.2, 0.4, 200)
+    for i, value in enumerate(values):
+        metrics = analyzer.update_pupil_size(float(value), i / 30)
+        if metrics:
+            window = values[max(0, i - 19):i + 1]
+            assert abs(metrics['mean_dilation'] - np.mean(window)) < 1e-12
+            assert abs(metrics['dilation_variability'] - np.std(window)) < 1e-9
+
+
+def test_update_batch_matches_per_frame():
+    pupil_sizes, eye_closed, timestamps = synthetic_session(1500)
+
+    expected = run_per_frame(CognitiveLoadAnalyzer(), pupil_sizes, eye_closed, timestamps)
+    batch = CognitiveLoadAnalyzer().update_batch(pupil_sizes, eye_closed, timestamps)
+
+    assert np.array_equal(np.isnan(expected), np.isnan(batch['cognitive_load_score']))
+    assert np.allclose(expected, batch['cognitive_load_score'], equal_nan=True, atol=1e-9)
+
+
+def test_batch_then_live_updates_continue_state():
+    pupil_sizes, eye_closed, timestamps = synthetic_session(900, seed=1)
+    expected = run_per_frame(CognitiveLoadAnalyzer(), pupil_sizes, eye_closed, timestamps)
+
+    analyzer = CognitiveLoadAnalyzer()
+    first = analyzer.update_batch(pupil_sizes[:500], eye_closed[:500], timestamps[:500])
+    rest = run_per_frame(analyzer, pupil_sizes[500:], eye_closed[500:], timestamps[500:])
+    combined = np.concatenate([first['cognitive_load_score'], rest])
+
+    assert np.allclose(expected, combined, equal_nan=True, atol=1e-9)
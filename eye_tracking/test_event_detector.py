@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eye_tracking.clock import ReplayClock
+from eye_tracking.event_detector import GazeEventDetector
+from eye_tracking.reading_analyzer import ReadingAnalyzer
+
+
+def feed(detector, samples, start_time=0.0, dt=1 / 30):
+    """Feed (x, y) samples at a fixed rate and collect emitted events"""
+    events = []
+    for i, (x, y) in enumerate(samples):
+        events.extend(detector.update(x, y, start_time + i * dt))
+    return events
+
+
+def test_fixation_then_saccade():
+    detector = GazeEventDetector()
+    samples = [(0.0, 0.0)] * 10 + [(0.3, 0.0)] + [(0.3, 0.0)] * 10
+    events = feed(detector, samples)
+
+    fixations = [e for e in events if e['event'] == 'fixation']
+    saccades = [e for e in events if e['event'] == 'saccade']
+    assert len(fixations) == 1
+    assert abs(fixations[0]['duration'] - 10 / 30) < 1e-9
+    assert len(saccades) == 1
+    assert saccades[0]['direction'] == 'forward'
+    assert saccades[0]['type'] == 'normal'
+    assert detector.regression_count == 0
+
+
+def test_regression_categories():
+    detector = GazeEventDetector()
+    # Forward reading, then a medium backward jump, then a jump up one line
+    samples = ([(0.0, 0.0)] * 8 + [(0.35, 0.0)] * 8 +
+               [(0.0, 0.0)] * 8 + [(0.0, -0.4)] * 8)
+    feed(detector, samples)
+
+    assert detector.regression_patterns == {'short': 0, 'medium': 1, 'long': 0, 'vertical': 1}
+    summary = detector.get_regression_summary()
+    assert summary['total_regressions'] == 2
+    assert summary['avg_regression_frequency'] > 0
+    assert 0 < summary['regression_severity'] <= 1.0
+
+
+def test_return_sweep_is_not_a_regression():
+    detector = GazeEventDetector()
+    samples = [(0.5, 0.0)] * 8 + [(-0.5, 0.4)] * 8
+    events = feed(detector, samples)
+
+    saccades = [e for e in events if e['event'] == 'saccade']
+    assert saccades[0]['type'] == 'return_sweep'
+    assert detector.regression_count == 0
+
+
+def test_history_is_bounded():
+    detector = GazeEventDetector(max_events=5)
+    samples = []
+    for i in range(50):
+        samples += [(0.3 * (i % 2), 0.0)] * 8
+    feed(detector, samples)
+
+    assert detector.saccade_count == 49
+    assert len(detector.saccades) == 5
+    assert len(detector.fixations) == 5
+
+
+def test_gap_ends_fixation_without_a_saccade():
+    detector = GazeEventDetector()
+    events = feed(detector, [(0.6, 0.0)] * 10)
+    events += detector.gap()
+    assert [e['event'] for e in events] == ['fixation']
+    assert abs(events[0]['end_time'] - 9 / 30) < 1e-9
+    # The first sample after the gap is not compared with the one before it
+    events = feed(detector, [(0.0, 0.0)] * 10, start_time=1.0)
+    assert [e['event'] for e in events] == []
+    assert detector.saccade_count == 0 and detector.regression_count == 0
+
+
+def test_lost_tracking_is_not_counted_as_saccades():
+    clock = ReplayClock(0.0)
+    analyzer = ReadingAnalyzer(clock=clock)
+    analyzer.start_reading_test("one two three four")
+    for i in range(300):
+        clock.advance(1 / 30)
+        if i % 20 < 15:
+            analyzer._update_reading_metrics({'left_gaze': (0.6, 0.1), 'right_gaze': (0.6, 0.1)})
+        else:
+            analyzer.process_landmarks(None, (480, 640))
+    assert analyzer.event_detector.saccade_count == 0
+    assert analyzer.regression_count == 0
+    # One fixation per tracked stretch
+    assert analyzer.fixation_count == 15
+    analyzer.release()
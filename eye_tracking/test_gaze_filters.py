@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from eye_tracking.clock import ReplayClock
+from eye_tracking.eye_tracker import EyeTracker
+from eye_tracking.gaze_filters import (KalmanFilter, OneEuroFilter, PassthroughFilter, compare_filters,
+                                       create_gaze_filter)
+from eye_tracking.synthetic_reading import generate_reading, landmark_frames
+
+
+@pytest.mark.parametrize('gaze_filter', [OneEuroFilter(), KalmanFilter()])
+def test_filters_follow_a_step_and_smooth_noise(gaze_filter):
+    rng = np.random.default_rng(0)
+    t = 10.0 + np.arange(120) / 30
+    target = np.where(np.arange(120) < 60, 0.0, 0.5)
+    noisy = target + rng.normal(0, 0.02, 120)
+    out = np.array([gaze_filter(x, -x, ts) for x, ts in zip(noisy.tolist(), t.tolist())])
+    # Within a few frames of the step, and steadier than the input once settled
+    assert abs(out[64, 0] - 0.5) < 0.05
+    assert np.allclose(out[:, 1], -out[:, 0])
+    assert np.std(out[90:, 0] - 0.5) < np.std(noisy[90:] - 0.5)
+    # A repeated timestamp returns the last estimate
+    assert gaze_filter(0.9, 0.9, t[-1]) == tuple(out[-1])
+    gaze_filter.reset()
+    assert gaze_filter(0.3, 0.2, 0.0) == (0.3, 0.2)
+
+
+def test_adaptive_filters_lag_less_than_moving_averages():
+    results = compare_filters(duration=60)
+    for adaptive in ('one_euro', 'kalman'):
+        for fixed in ('moving_average_10', 'exponential_0.1'):
+            assert results[adaptive]['lag_ms'] < results[fixed]['lag_ms'] / 4
+            assert results[adaptive]['rmse'] < results[fixed]['rmse']
+        assert results[adaptive]['fixation_noise'] < results['none']['fixation_noise']
+
+
+def test_create_gaze_filter():
+    assert isinstance(create_gaze_filter(None), PassthroughFilter)
+    gaze_filter = create_gaze_filter({'type': 'one_euro', 'beta': 3.0})
+    assert isinstance(gaze_filter, OneEuroFilter) and gaze_filter.beta == 3.0
+    with pytest.raises(ValueError):
+        create_gaze_filter({'type': 'median'})
+    with pytest.raises(ValueError):
+        create_gaze_filter({'type': 'kalman', 'gain': 1.0})
+
+
+def test_eye_tracker_filters_gaze_per_session():
+    reading = generate_reading(10, seed=2)
+    raw, filtered = EyeTracker(clock=ReplayClock()), EyeTracker(clock=ReplayClock())
+    filtered.set_gaze_filter({'type': 'one_euro', 'min_cutoff': 0.5, 'beta': 0.0})
+    gaze = {id(raw): [], id(filtered): []}
+    for tracker in (raw, filtered):
+        frames = landmark_frames(reading, tracker.LEFT_EYE_INDICES, tracker.RIGHT_EYE_INDICES, seed=2)
+        for timestamp, landmarks in zip(reading.timestamps.tolist(), frames):
+            metrics = tracker.process_landmarks(landmarks, (480, 640), timestamp)
+            if landmarks is not None:
+                gaze[id(tracker)].append(metrics['left_gaze'])
+    raw_gaze, filtered_gaze = np.array(gaze[id(raw)]), np.array(gaze[id(filtered)])
+    assert np.abs(np.diff(filtered_gaze, axis=0)).mean() < np.abs(np.diff(raw_gaze, axis=0)).mean() / 2
+
+    with pytest.raises(ValueError):
+        filtered.set_gaze_filter({'type': 'unknown'})
+    assert filtered.gaze_filter_config['type'] == 'one_euro'
+    # A pooled tracker starts the next session with its default filter
+    filtered.reset()
+    assert filtered.gaze_filter_config is None
+    assert isinstance(filtered.left_gaze_filter, PassthroughFilter)
@@ -0,0 +1,89 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from eye_tracking.clock import ReplayClock
+from eye_tracking.gaze_heatmap import GazeHeatmap
+from eye_tracking.reading_analyzer import ReadingAnalyzer
+
+
+def test_add_matches_batch_histogram():
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(-0.1, 1.1, 2000), rng.uniform(-0.1, 1.1, 2000)
+    one_by_one, batched = GazeHeatmap(32, 24), GazeHeatmap(32, 24)
+    inside = sum(one_by_one.add(xi, yi) for xi, yi in zip(x.tolist(), y.tolist()))
+    assert batched.add_many(x, y) == inside == one_by_one.samples
+    assert one_by_one.outside == batched.outside == 2000 - inside
+    assert np.array_equal(one_by_one.counts, batched.counts)
+    expected, _, _ = np.histogram2d(y, x, bins=(24, 32), range=((0, 1), (0, 1)))
+    assert np.array_equal(one_by_one.counts, expected)
+    assert not one_by_one.add(float('nan'), 0.5)
+
+
+def test_png_is_cached_until_a_sample_arrives():
+    heatmap = GazeHeatmap(16, 12)
+    for _ in range(50):
+        heatmap.add(0.25, 0.5)
+    png = heatmap.render_png(160, 120)
+    assert heatmap.render_png(160, 120) is png
+    assert heatmap.render_png(80, 60) is not png
+
+    image = cv2.imdecode(np.frombuffer(png, np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape == (120, 160, 3)
+    # Hottest around the samples, untouched background far from them
+    assert image[60, 40].sum() > 0
+    assert image[10, 150].sum() == 0
+
+    heatmap.add(0.75, 0.5)
+    assert heatmap.render_png(160, 120) is not png
+
+
+def test_reading_analyzer_heatmap_and_dwell():
+    clock = ReplayClock(0.0)
+    analyzer = ReadingAnalyzer(clock=clock)
+    analyzer.frame_size = (640, 480)
+    analyzer.start_reading_test("one two three four")
+    layout = analyzer.text_layout
+    for word in (0, 1, 2, 3):
+        x0, y0, x1, y1 = layout.box(word)
+        gaze = ((x0 + x1) / 640 - 1.0, (y0 + y1) / 480 - 1.0)
+        for _ in range(9 if word == 2 else 6):
+            clock.advance(1 / 30)
+            analyzer._update_reading_metrics({'left_gaze': gaze, 'right_gaze': gaze})
+
+    heatmap = analyzer.gaze_heatmap
+    assert heatmap.samples == 27
+    x0, y0, x1, y1 = layout.box(2)
+    column, row = int((x0 + x1) / 2 / 640 * heatmap.bins_x), int((y0 + y1) / 2 / 480 * heatmap.bins_y)
+    assert heatmap.counts[row, column] == heatmap.counts.max() == 9
+    dwell = [word['dwell_time'] for word in analyzer.get_word_dwell_times()]
+    assert dwell[2] == max(dwell)
+
+    png = analyzer.render_heatmap_png(320)
+    assert cv2.imdecode(np.frombuffer(png, np.uint8), cv2.IMREAD_COLOR).shape == (240, 320, 3)
+    assert analyzer.render_heatmap_png(320) is png
+
+    # A new text starts a new heat map
+    analyzer.start_reading_test("five six")
+    assert heatmap.samples == 0
+    analyzer.release()
+
+
+def test_frames_without_a_face_stay_off_the_heatmap():
+    clock = ReplayClock(0.0)
+    analyzer = ReadingAnalyzer(clock=clock)
+    analyzer.start_reading_test("one two three four")
+    for _ in range(90):
+        clock.advance(1 / 30)
+        analyzer.process_landmarks(None, (480, 640))
+    heatmap = analyzer.gaze_heatmap
+    assert heatmap.samples == heatmap.outside == 0
+    assert not heatmap.counts.any()
+
+    clock.advance(1 / 30)
+    analyzer._update_reading_metrics({'left_gaze': (0.5, 0.5), 'right_gaze': (0.5, 0.5)})
+    assert heatmap.samples == 1
+    analyzer.release()
@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from eye_tracking.eye_tracker import EyeTracker
+
+
+def make_metrics(timestamp, gaze, pupil):
+    return {
+        'timestamp': timestamp,
+        'left_gaze': gaze,
+        'right_gaze': gaze,
+        'left_pupil_size': pupil,
+        'right_pupil_size': pupil,
+        'avg_ear': 0.3
+    }
+
+
+def test_running_aggregates_match_full_history():
+    tracker = EyeTracker(history_seconds=1000)
+    rng = np.random.default_rng(0)
+    for i in range(600):
+        gaze = (float(rng.choice([0.0, 0.0, 0.0, 0.5])), 0.0)
+        tracker._update_ml_features(make_metrics(i / 30, gaze, float(rng.uniform(0.1, 0.3))))
+
+    features = tracker.get_ml_features()
+    fixations = tracker.eye_metrics['fixations']
+    saccades = tracker.eye_metrics['saccades']
+    pupils = [p[0] for p in tracker.eye_metrics['pupil_sizes']]
+
+    assert features['fixation_count'] == len(fixations)
+    assert abs(features['avg_fixation_duration'] -
+               np.mean([f['end_time'] - f['start_time'] for f in fixations])) < 1e-9
+    assert features['saccade_count'] == len(saccades)
+    assert abs(features['avg_saccade_velocity'] - np.mean([s['velocity'] for s in saccades])) < 1e-9
+    assert abs(features['pupil_size_variability'] - np.std(pupils)) < 1e-9
+    tracker.release()
+
+
+def test_history_is_bounded():
+    tracker = EyeTracker(history_seconds=10)
+    for i in range(20 * 60 * 30 // 10):  # two simulated minutes
+        gaze = (0.5 * (i % 2), 0.0)
+        tracker._update_ml_features(make_metrics(i / 30, gaze, 0.2))
+
+    assert len(tracker.eye_metrics['gaze_positions']) == tracker.max_history
+    assert len(tracker.eye_metrics['pupil_sizes']) == tracker.max_history
+    assert len(tracker.eye_metrics['saccades']) <= tracker.max_history
+    assert tracker.get_ml_features()['saccade_count'] > tracker.max_history
+    tracker.release()
+
+
+def test_fps_is_measured_from_timestamps():
+    tracker = EyeTracker()
+    for i in range(50):
+        tracker.process_landmarks(None, (480, 640), timestamp=i / 12)
+    assert abs(tracker.fps - 12) < 1e-6
+
+    # A long pause does not count as a slow frame rate
+    tracker.process_landmarks(None, (480, 640), timestamp=100.0)
+    assert abs(tracker.fps - 12) < 1e-6
+    tracker.release()
@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from eye_tracking.overlay import OverlayCompositor
+
+
+LINES = ["The quick brown fox", "jumps over the lazy dog."]
+
+
+def test_text_band_matches_full_frame_blend():
+    frame = np.full((480, 640, 3), 200, dtype=np.uint8)
+    compositor = OverlayCompositor()
+    compositor.draw_text(frame, LINES, 150, 40, 0.8, 2, 0.7)
+
+    # Outside the band the frame is untouched
+    assert (frame[:100] == 200).all()
+    assert (frame[300:] == 200).all()
+
+    # The band background matches 0.3 * frame + 0.7 * black
+    assert abs(int(frame[115, 5, 0]) - 60) <= 1
+
+    # Text pixels are drawn
+    assert frame[110:160].max() == 255
+
+
+def test_text_layer_is_cached():
+    compositor = OverlayCompositor()
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    compositor.draw_text(frame, LINES, 150, 40, 0.8, 2)
+    layer = compositor._text_layer
+    compositor.draw_text(frame, list(LINES), 150, 40, 0.8, 2)
+    assert compositor._text_layer is layer
+
+    compositor.draw_text(np.zeros((720, 1280, 3), dtype=np.uint8), LINES, 150, 40, 0.8, 2)
+    assert compositor._text_layer is not layer
+
+
+def test_hud_values_refresh_at_configured_rate():
+    compositor = OverlayCompositor(hud_refresh_hz=5.0)
+    rows = [("Speed: ", (10, 30)), ("Load: ", (10, 60))]
+
+    def draw(values, now):
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        compositor.draw_hud(frame, rows, values, now, bar=(10, 80, 0.5, (0, 255, 0)))
+        return frame
+
+    first = draw([("100", (0, 255, 0)), ("0.10", (0, 255, 0))], 0.0)
+    # Within the refresh interval the cached values are reused
+    cached = draw([("999", (0, 0, 255)), ("0.99", (0, 0, 255))], 0.1)
+    assert np.array_equal(first, cached)
+
+    refreshed = draw([("999", (0, 0, 255)), ("0.99", (0, 0, 255))], 0.25)
+    assert not np.array_equal(first, refreshed)
+
+    # Labels are pre-rendered once and shared by every refresh
+    (label_width, _), _ = cv2.getTextSize("Speed: ", compositor.font, 0.7, 2)
+    assert np.array_equal(first[10:40, :10 + label_width - 2], refreshed[10:40, :10 + label_width - 2])
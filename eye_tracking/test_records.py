@@ -0,0 +1,69 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+import numpy as np
+import pytest
+
+from eye_tracking.clock import ReplayClock
+from eye_tracking.cognitive_load_analyzer import CognitiveLoadAnalyzer
+from eye_tracking.eye_tracker import EyeTracker
+from eye_tracking.records import EyeSample, Fixation, PupilMetrics
+from eye_tracking.synthetic_reading import generate_reading, landmark_frames
+
+
+def test_records_read_like_dicts():
+    fixation = Fixation(1.0, 1.0, (0.2, 0.3))
+    assert fixation['start_time'] == fixation.start_time == 1.0
+    assert fixation.get('position') == (0.2, 0.3)
+    assert fixation.get('duration', 0.0) == 0.0
+    assert 'end_time' in fixation and 'duration' not in fixation
+    fixation['end_time'] = 1.5
+    assert fixation.end_time == 1.5
+    assert fixation == {'start_time': 1.0, 'end_time': 1.5, 'position': (0.2, 0.3)}
+    with pytest.raises(KeyError):
+        fixation['duration']
+    with pytest.raises(KeyError):
+        fixation['duration'] = 0.5
+    with pytest.raises(AttributeError):
+        fixation.duration = 0.5  # No __dict__ to grow into
+
+    metrics = PupilMetrics(np.float64(0.2), 0.2, 0.01, 0.0, 0.0)
+    assert sys.getsizeof(metrics) < sys.getsizeof(metrics.to_dict()) / 2
+
+
+def test_eye_tracker_returns_samples():
+    reading = generate_reading(5, seed=1)
+    tracker = EyeTracker(clock=ReplayClock())
+    frames = landmark_frames(reading, tracker.LEFT_EYE_INDICES, tracker.RIGHT_EYE_INDICES, seed=1)
+    samples = [tracker.process_landmarks(landmarks, (480, 640), timestamp)
+               for timestamp, landmarks in zip(reading.timestamps.tolist(), frames)]
+    assert all(isinstance(sample, EyeSample) for sample in samples)
+    assert all(isinstance(f, Fixation) for f in tracker.eye_metrics['fixations'])
+
+    sample = samples[-1]
+    assert sample['cognitive_load_score'] == tracker.get_cognitive_metrics()['cognitive_load_score']
+    plain = json.loads(json.dumps(sample.to_dict()))
+    assert plain['left_eye'] == sample.left_eye.tolist()
+    assert plain['left_gaze'] == list(sample.left_gaze)
+
+    # Frames without a face share one read-only set of eye landmarks
+    empty, other = tracker.process_landmarks(None, (480, 640)), tracker.process_landmarks(None, (480, 640))
+    assert empty.left_eye is other.right_eye
+    assert not empty.left_eye.flags.writeable
+    assert empty['gaze_stability'] == 1.0 and not empty.is_blink
+
+
+def test_cognitive_load_records():
+    analyzer = CognitiveLoadAnalyzer()
+    load = None
+    for i in range(300):
+        t = i / 30
+        pupil = analyzer.update_pupil_size(0.2 + 0.01 * (i % 7), t)
+        blink = analyzer.update_blink(i % 45 < 4, t)
+        load = analyzer.calculate_cognitive_load(pupil, blink) or load
+    assert load['load_level'] == load.load_level in ('Low', 'Medium', 'High')
+    assert 0.0 <= load.cognitive_load_score <= 1.0
+    assert type(load.cognitive_load_score) is float
@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from eye_tracking.rolling_stats import ExponentialMovingAverage, RollingWelford, P2Quantile
+
+
+def test_exponential_moving_average():
+    ema = ExponentialMovingAverage(alpha=0.1)
+    assert ema.update(1.0) == 1.0
+    assert abs(ema.update(2.0) - 1.1) < 1e-12
+
+    # Three frames of the same value at once equal three updates
+    stepped, repeated = ExponentialMovingAverage(0.1), ExponentialMovingAverage(0.1)
+    stepped.update(1.0)
+    repeated.update(1.0)
+    for _ in range(3):
+        repeated.update(4.0)
+    assert abs(stepped.update(4.0, steps=3) - repeated.value) < 1e-12
+    assert stepped.count == repeated.count == 4
+
+
+def test_rolling_welford_matches_numpy_window():
+    rng = np.random.default_rng(0)
+    values = rng.normal(5.0, 2.0, 500)
+    stats = RollingWelford(window=50)
+    for i, value in enumerate(values):
+        stats.update(value)
+        window = values[max(0, i - 49):i + 1]
+        assert abs(stats.mean - np.mean(window)) < 1e-9
+        assert abs(stats.std - np.std(window)) < 1e-9
+    assert len(stats) == 50
+
+
+def test_rolling_welford_unbounded():
+    stats = RollingWelford()
+    for value in range(10):
+        stats.update(float(value))
+    assert stats.mean == 4.5
+    assert abs(stats.variance - np.var(np.arange(10))) < 1e-12
+
+
+def test_p2_quantile_tracks_percentile():
+    rng = np.random.default_rng(1)
+    values = rng.uniform(0.0, 1.0, 5000)
+    estimator = P2Quantile(0.9)
+    for value in values:
+        estimator.update(value)
+    assert abs(estimator.value - np.percentile(values, 90)) < 0.02
+
+
+def test_p2_quantile_small_sample():
+    estimator = P2Quantile(0.5)
+    for value in (3.0, 1.0, 2.0):
+        estimator.update(value)
+    assert estimator.value == 2.0
@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from eye_tracking.clock import ReplayClock
+from eye_tracking.reading_analyzer import ReadingAnalyzer
+from eye_tracking.session_recorder import SessionRecorder, SessionReader
+from eye_tracking.session_replay import replay_session
+
+FRAME_SHAPE = (480, 640)
+
+
+def synthetic_landmarks(tracker, n_frames, seed=0):
+    """Eye landmarks on two ellipses with the first point drifting like a reading gaze"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_frames):
+        if i % 45 == 40:
+            frames.append(None)  # Face lost
+            continue
+        landmarks = np.zeros((478, 2), dtype=np.float32)
+        gaze = ((i % 60) / 60 - 0.5) * 0.02
+        for center_x, indices in ((0.4, tracker.LEFT_EYE_INDICES), (0.6, tracker.RIGHT_EYE_INDICES)):
+            angles = np.linspace(0, 2 * np.pi, len(indices), endpoint=False)
+            landmarks[indices, 0] = center_x + 0.04 * np.cos(angles)
+            landmarks[indices, 1] = 0.4 + 0.012 * np.sin(angles) + rng.normal(0, 0.0005, len(indices))
+            landmarks[indices[0]] = (center_x + gaze, 0.4)
+        frames.append(landmarks)
+    return frames
+
+
+def record_session(path, n_frames=300):
+    analyzer = ReadingAnalyzer(clock=ReplayClock())
+    tracker = analyzer.eye_tracker
+    tracker.start_recording(str(path))
+    live = []
+    for i, landmarks in enumerate(synthetic_landmarks(tracker, n_frames)):
+        timestamp = 1000.0 + i / 30
+        analyzer.clock.set(timestamp)
+        tracker.recorder.write(timestamp, FRAME_SHAPE, landmarks)
+        live.append(analyzer.process_landmarks(landmarks, FRAME_SHAPE, timestamp))
+    analyzer.release()
+    return live
+
+
+def test_recording_round_trip(tmp_path):
+    path = tmp_path / 'session.eyrec'
+    indices = [33, 133, 362]
+    frames = [np.random.default_rng(1).random((478, 2)).astype(np.float32), None]
+    with SessionRecorder(str(path), indices) as recorder:
+        recorder.write(1.5, FRAME_SHAPE, frames[0])
+        recorder.write(1.6, FRAME_SHAPE, None)
+
+    reader = SessionReader(str(path))
+    assert reader.landmark_indices == indices
+    recorded = reader.frames()
+    assert [f.timestamp for f in recorded] == [1.5, 1.6]
+    assert recorded[0].frame_shape == FRAME_SHAPE
+    assert np.array_equal(recorded[0].landmarks[indices], frames[0][indices])
+    assert recorded[1].landmarks is None
+
+
+def test_recording_is_compact(tmp_path):
+    path = tmp_path / 'session.eyrec'
+    record_session(path, n_frames=300)
+    bytes_per_second = os.path.getsize(path) / 10.0
+    assert bytes_per_second < 10 * 1024
+
+
+def test_replay_matches_live_and_is_deterministic(tmp_path):
+    path = tmp_path / 'session.eyrec'
+    live = record_session(path)
+
+    first = [metrics for _, metrics in replay_session(str(path))]
+    second = [metrics for _, metrics in replay_session(str(path))]
+
+    assert len(first) == len(live)
+    assert first[-1] == live[-1]
+    assert first == second
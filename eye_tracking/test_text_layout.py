@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import pytest
+
+from eye_tracking.clock import ReplayClock
+from eye_tracking.text_layout import TextLayoutIndex, wrap_text
+from eye_tracking.reading_analyzer import ReadingAnalyzer
+
+FONT = cv2.FONT_HERSHEY_DUPLEX
+
+
+def build_index(lines, width=640):
+    return TextLayoutIndex(lines, width, origin_y=150, line_spacing=40,
+                           font=FONT, scale=0.8, thickness=2)
+
+
+def test_lookup_word_centers():
+    index = build_index(["The quick brown fox", "jumps over the lazy dog."])
+    assert index.words == ['The', 'quick', 'brown', 'fox', 'jumps', 'over', 'the', 'lazy', 'dog.']
+    for i, (x0, y0, x1, y1) in enumerate(index.word_boxes):
+        assert index.lookup((x0 + x1) / 2, (y0 + y1) / 2) == i
+
+
+def test_lookup_outside_text():
+    index = build_index(["The quick brown fox"])
+    x0, y0, x1, y1 = index.word_boxes[0]
+    assert index.lookup(x0 - 50, (y0 + y1) / 2) is None
+    assert index.lookup(x0, y0 - 100) is None
+    assert index.lookup(x0, y1 + 100) is None
+
+
+def test_wrap_text_fits_width():
+    text = "Reading is a complex cognitive process that requires coordination " * 4
+    lines = wrap_text(text, 400, FONT, 0.8, 2)
+    assert len(lines) > 1
+    assert ' '.join(lines) == ' '.join(text.split())
+    for line in lines[:-1]:
+        assert cv2.getTextSize(line, FONT, 0.8, 2)[0][0] <= 400
+
+
+def test_words_read_dwell_and_rereads():
+    analyzer = ReadingAnalyzer()
+    analyzer.frame_size = (640, 480)
+    analyzer.start_reading_test("one two three four")
+    layout = analyzer.text_layout
+
+    def look_at(word, start, frames=6):
+        x0, y0, x1, y1 = layout.box(word)
+        for i in range(frames):
+            analyzer._update_word_tracking((x0 + x1) / 2, (y0 + y1) / 2, start + i / 30)
+        return start + frames / 30
+
+    t = look_at(0, 0.0)
+    t = look_at(1, t)
+    t = look_at(2, t)
+    t = look_at(0, t)  # Regression back to the first word
+    t = look_at(3, t)
+
+    assert analyzer.words_read == 4
+    assert analyzer.reread_positions == {0: 1}
+    assert analyzer.get_word_dwell_times()[0]['dwell_time'] > analyzer.get_word_dwell_times()[1]['dwell_time']
+    analyzer.release()
+
+
+def test_frames_without_a_face_read_no_words():
+    clock = ReplayClock(0.0)
+    analyzer = ReadingAnalyzer(clock=clock)
+    analyzer.start_reading_test("The quick brown fox jumps over the lazy dog.")
+    for _ in range(300):
+        clock.advance(1 / 30)
+        metrics = analyzer.process_landmarks(None, (480, 640))
+    assert analyzer.words_read == 0
+    assert sum(word['dwell_time'] for word in analyzer.get_word_dwell_times()) == 0.0
+    assert metrics['reading_speed'] == 0
+
+    # Losing the face while looking at a word does not add the gap to its dwell
+    x0, y0, x1, y1 = analyzer.text_layout.box(1)
+    gaze = ((x0 + x1) / 640 - 1.0, (y0 + y1) / 480 - 1.0)
+    for face_detected in [True] * 4 + [False] * 60 + [True] * 4:
+        clock.advance(1 / 30)
+        analyzer._update_reading_metrics({'left_gaze': gaze, 'right_gaze': gaze, 'face_detected': face_detected})
+    assert analyzer.get_word_dwell_times()[1]['dwell_time'] == pytest.approx(6 / 30)
+    analyzer.release()
@@ -0,0 +1,118 @@
+import cv2
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+
+def wrap_text(text: str, max_width: int, font: int, scale: float, thickness: int) -> List[str]:
+    """Greedily wrap text into lines no wider than max_width pixels.
+
+    Explicit newlines in the text are kept as line breaks.
+    """
+    lines = []
+    for paragraph in text.splitlines():
+        current = ''
+        for word in paragraph.split():
+            candidate = f"{current} {word}" if current else word
+            (width, _), _ = cv2.getTextSize(candidate, font, scale, thickness)
+            if current and width > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        if current:
+            lines.append(current)
+    return lines
+
+
+class TextLayoutIndex:
+    """Spatial index of the word boxes of the reading text.
+
+    The layout mirrors ``ReadingAnalyzer._draw_text_overlay``: lines are
+    centered horizontally and their baselines are ``line_spacing`` pixels
+    apart starting at ``origin_y``. Text is measured once when the index is
+    built; afterwards a point is mapped to a word with two bisect lookups,
+    one over the sorted line bands and one over the word boundaries of the
+    matching line.
+    """
+
+    def __init__(self, lines: List[str], frame_width: int, origin_y: int, line_spacing: int,
+                 font: int, scale: float, thickness: int, margin: int = 10):
+        """Measure the text and build the index.
+
+        Args:
+            lines (list): Text lines as drawn
+            frame_width (int): Width of the frame the text is centered in
+            origin_y (int): Baseline of the first line
+            line_spacing (int): Distance between baselines
+            font (int): OpenCV font face
+            scale (float): Font scale
+            thickness (int): Stroke thickness
+            margin (int): Horizontal slack (pixels) around each line that still maps to its edge words
+        """
+        self.lines = list(lines)
+        self.frame_width = frame_width
+        self.words = []           # Word text in reading order
+        self.word_boxes = []      # (x0, y0, x1, y1) per word
+        self.word_lines = []      # Line index per word
+        self.band_tops = []       # Sorted top edge of each line band
+        self.band_bottoms = []
+        self.line_extents = []    # (x_start, x_end) of each line including margin
+        self.line_bounds = []     # Sorted left boundaries of word regions per line
+        self.line_first_word = []
+
+        y = origin_y
+        for line in self.lines:
+            (text_width, text_height), baseline = cv2.getTextSize(line, font, scale, thickness)
+            x0 = (frame_width - text_width) // 2
+
+            # Bands tile vertically: each covers one line spacing ending just below the descenders
+            band_bottom = y + baseline
+            band_top = band_bottom - line_spacing
+            self.band_tops.append(band_top)
+            self.band_bottoms.append(band_bottom)
+            self.line_extents.append((x0 - margin, x0 + text_width + margin))
+            self.line_first_word.append(len(self.words))
+
+            # Measure word edges from the width of each prefix of the line
+            spans = []
+            start = 0
+            for word in line.split(' '):
+                end = start + len(word)
+                if word:
+                    left = x0 + cv2.getTextSize(line[:start], font, scale, thickness)[0][0] if start else x0
+                    right = x0 + cv2.getTextSize(line[:end], font, scale, thickness)[0][0]
+                    spans.append((word, left, right))
+                start = end + 1
+
+            # Word regions split the gaps between words at their midpoints
+            bounds = []
+            for i, (word, left, right) in enumerate(spans):
+                bounds.append(x0 - margin if i == 0 else (spans[i - 1][2] + left) / 2)
+                self.words.append(word)
+                self.word_boxes.append((left, y - text_height, right, y + baseline))
+                self.word_lines.append(len(self.line_bounds))
+            self.line_bounds.append(bounds)
+
+            y += line_spacing
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def lookup(self, x: float, y: float) -> Optional[int]:
+        """Return the index of the word at (x, y), or None outside the text"""
+        line = bisect_right(self.band_tops, y) - 1
+        if line < 0 or y >= self.band_bottoms[line]:
+            return None
+
+        x_start, x_end = self.line_extents[line]
+        bounds = self.line_bounds[line]
+        if not bounds or x < x_start or x > x_end:
+            return None
+
+        return self.line_first_word[line] + bisect_right(bounds, x) - 1
+
+    def line_of(self, word_index: int) -> int:
+        return self.word_lines[word_index]
+
+    def box(self, word_index: int) -> Tuple[float, float, float, float]:
+        return self.word_boxes[word_index]